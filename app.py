@@ -1,226 +1,256 @@
 import streamlit as st
-import openai
 import json
 import pandas as pd
 import re
-import fitz
 import io
 import datetime
-from docx import Document              
+import time
+import uuid
+from compliance_checklists import dpdpa_checklists
+from compliance_engine import analyze_policy_section, default_cascade_policy, details_cache, extract_text_from_pdf, fetch_section_details, record_section
+from clause_library import assemble_sections, build_clause_context, build_sections, section_fingerprint, split_sections
+from llm_client import call_lane, complete, get_client, lane_stats, pool_stats, request_key, set_call_context
+from run_control import CallCancelled, RunToken, await_each, await_result, submit
+from tracing import enabled as tracing_enabled, phase_summary, reset_context, span, traced
+from knowledge_base import ACT_TEXT_PATH, get_knowledge_index, retrieval_cache, synthesis_cache, synthesize_answer
+from distilled_classifier import get_distilled_classifier
+from exporters import EXPORT_FORMATS, available_formats, export_bytes, iter_evaluation_rows
+from export_service import MIME_TYPES, artifact_cache, artifact_loader
+from draft_store import PAGE_SIZE, get_draft_store
+from speculation import SpeculativeRun, speculation_stats
+from runtime_settings import BATCHING_MODES, DEFAULT_SETTINGS, get_settings, reset_settings, save_settings
+from portfolio_scoring import PARTIAL_CREDIT, SECTION_IDS, get_status_matrix, portfolio_report
+from text_store import SessionTexts, get_text_store, session_usage, text_key
 
 # --- OpenAI Setup ---
 api_key = st.secrets["OPENAI_API_KEY"]
-client = openai.OpenAI(api_key=api_key)
-
-# --- Section Checklists ---
-dpdpa_checklists = {
-    "4": {
-        "title": "Grounds for Processing Personal Data",
-        "items": [
-            {"id" : "4.1", "text" : "The policy must state that personal data is processed **only as per the provisions of the Digital Personal Data Protection Act, 2023**."},
-            {"id" : "4.2", "text" : "The policy must confirm that personal data is processed **only for a lawful purpose**."},
-            {"id" : "4.3", "text" : "The policy must define **lawful purpose** as any purpose **not expressly forbidden by law**."},
-            {"id" : "4.4", "text" : "The policy must include a statement that personal data is processed **only with the consent of the Data Principal**."},
-            {"id" : "4.5", "text" : "Alternatively, the policy must specify that personal data is processed **for certain legitimate uses**, as defined under the Act."}
-        ]
-    },
-    "5": {
-        "title": "Notice",
-        "items": [
-            {"id" : "5.1", "text" : "The policy must state that **every request for consent** is accompanied or preceded by a **notice from the Data Fiduciary to the Data Principal**."},
-            {"id" : "5.2", "text" : "The notice must clearly specify the **personal data proposed to be processed**."},
-            {"id" : "5.3", "text" : "The notice must clearly specify the **purpose for which the personal data is proposed to be processed**."},
-            {"id" : "5.4", "text" : "The notice must explain the **manner in which the Data Principal can exercise her rights under Section 6(4)** (withdrawal of consent)."},
-            {"id" : "5.5", "text" : "The notice must explain the **manner in which the Data Principal can exercise her rights under Section 13** (grievance redressal)."},
-            {"id" : "5.6", "text" : "The notice must specify the **manner in which a complaint can be made to the Data Protection Board**."},
-            {"id" : "5.7", "text" : "If consent was obtained **before the commencement of the Act**, the policy must state that a notice will be sent **as soon as reasonably practicable**."},
-            {"id" : "5.8", "text" : "The post-commencement notice must mention the **personal data that has been processed**."},
-            {"id" : "5.9", "text" : "The post-commencement notice must mention the **purpose for which the personal data has been processed**."},
-            {"id" : "5.10", "text" : "The post-commencement notice must mention the **manner in which the Data Principal can exercise her rights under Section 6(4)**."},
-            {"id" : "5.11", "text" : "The post-commencement notice must mention the **manner in which the Data Principal can exercise her rights under Section 13**."},
-            {"id" : "5.12", "text" : "The post-commencement notice must mention the **manner in which a complaint can be made to the Board**."},
-            {"id" : "5.13", "text" : "The policy must mention that the Data Fiduciary **may continue to process personal data** until the Data Principal **withdraws her consent**."},
-            {"id" : "5.14", "text" : "The policy must provide the Data Principal an **option to access the contents of the notice** in **English or any language listed in the Eighth Schedule of the Constitution**."}
-        ]
-    },
-    "6": {
-        "title": "Consent",
-        "items": [
-            {"id" : "6.1", "text" : "The policy must state that **consent is free, specific, informed, unconditional, and unambiguous**, given through a **clear affirmative action**."},
-            {"id" : "6.2", "text" : "The policy must specify that **consent signifies agreement to process personal data only for the specified purpose**."},
-            {"id" : "6.3", "text" : "The policy must state that **consent is limited to such personal data as is necessary for the specified purpose**."},
-            {"id" : "6.4", "text" : "The policy must mention that **any part of the consent that violates this Act, rules under it, or any other law in force is invalid to that extent**."},
-            {"id" : "6.5", "text" : "The request for consent must be presented in **clear and plain language**."},
-            {"id" : "6.6", "text" : "The request for consent must allow the Data Principal to access it in **English or any language listed in the Eighth Schedule of the Constitution**."},
-            {"id" : "6.7", "text" : "The request for consent must provide **contact details of a Data Protection Officer** or **another authorised person** responsible for handling Data Principal queries."},
-            {"id" : "6.8", "text" : "The policy must clearly state that the **Data Principal has the right to withdraw consent at any time**."},
-            {"id" : "6.9", "text" : "The **ease of withdrawing consent** must be comparable to the **ease with which consent was given**."},
-            {"id" : "6.10", "text" : "The policy must mention that **consequences of withdrawal shall be borne by the Data Principal**."},
-            {"id" : "6.11", "text" : "The policy must state that **withdrawal does not affect the legality of data processing done before withdrawal**."},
-            {"id" : "6.12", "text" : "The policy must mention that upon withdrawal of consent, the **Data Fiduciary and its Data Processors must cease processing** the personal data **within a reasonable time**, unless permitted by law."},
-            {"id" : "6.13", "text" : "The policy must state that consent **can be managed, reviewed, or withdrawn through a Consent Manager**."},
-            {"id" : "6.14", "text" : "The policy must specify that the **Consent Manager is accountable to the Data Principal** and acts on her behalf."},
-            {"id" : "6.15", "text" : "The policy must specify that **every Consent Manager is registered with the Board** under prescribed conditions."},
-            {"id" : "6.16", "text" : "The policy must mention that, in case of dispute, the **Data Fiduciary must prove that proper notice was given and valid consent was obtained** as per the Act and its rules."}
-        ]
-    },
-    "7": {
-        "title": "Certain Legitimate Uses",
-        "items": [
-            {"id" : "7.1", "text" : "The policy must allow personal data to be processed for the **specified purpose for which the Data Principal voluntarily provided the data**, if she has **not indicated non-consent** to such use."},
-            {"id" : "7.2", "text" : "The policy must permit personal data to be processed by the State or its instrumentalities for providing or issuing **subsidy, benefit, service, certificate, licence, or permit**, as prescribed, where the Data Principal has **previously consented** to such processing."},
-            {"id" : "7.3", "text" : "The policy must allow personal data to be processed by the State or its instrumentalities if the data is **already available in digital or digitised form in notified government databases**, subject to prescribed standards and government policies."},
-            {"id" : "7.4", "text" : "The policy must allow personal data to be processed by the State or its instrumentalities for performing any **legal function** under existing Indian laws or **in the interest of sovereignty and integrity of India or State security**."},
-            {"id" : "7.5", "text" : "The policy must allow personal data to be processed to **fulfil a legal obligation** requiring any person to disclose information to the State or its instrumentalities, as per applicable laws."},
-            {"id" : "7.6", "text" : "The policy must permit personal data to be processed for **compliance with any judgment, decree, or order** issued under Indian law, or for **contractual or civil claims under foreign laws**."},
-            {"id" : "7.7", "text" : "The policy must allow personal data to be processed to **respond to a medical emergency** involving a **threat to life or immediate health risk** of the Data Principal or any individual."},
-            {"id" : "7.8", "text" : "The policy must allow personal data to be processed to **provide medical treatment or health services** during an **epidemic, outbreak, or other threat to public health**."},
-            {"id" : "7.9", "text" : "The policy must permit processing of personal data to **ensure safety of or provide assistance/services to individuals** during any **disaster or breakdown of public order**."},
-            {"id" : "7.10", "text" : "The policy must define 'disaster' in accordance with the **Disaster Management Act, 2005 (Section 2(d))**."},
-            {"id" : "7.11", "text" : "The policy must allow personal data to be processed for purposes related to **employment**, or to **safeguard the employer from loss or liability**, including prevention of corporate espionage, confidentiality of trade secrets or IP, and enabling services/benefits to employee Data Principals."}
-        ]
-    },
-    "8": {
-        "title": "General Obligations of Data Fiduciary",
-        "items": [
-            {"id" : "8.1", "text" : "The policy must state that the Data Fiduciary is responsible for complying with the Act and its rules, even if the Data Principal fails to perform her duties."},
-            {"id" : "8.2", "text" : "The policy must state that the Data Fiduciary may engage or involve a Data Processor **only under a valid contract** to process personal data for offering goods or services."},
-            {"id" : "8.3", "text" : "The policy must ensure that if personal data is used to make a decision affecting the Data Principal, the data must be **complete, accurate, and consistent**."},
-            {"id" : "8.4", "text" : "The policy must ensure that if personal data is disclosed to another Data Fiduciary, the data must be **complete, accurate, and consistent**."},
-            {"id" : "8.5", "text" : "The policy must require the Data Fiduciary to implement **appropriate technical and organisational measures** to ensure compliance with the Act and its rules."},
-            {"id" : "8.6", "text" : "The policy must mandate **reasonable security safeguards** to protect personal data from breaches, including breaches by its Data Processors."},
-            {"id" : "8.7", "text" : "The policy must state that in the event of a **personal data breach**, the Data Fiduciary shall **inform both the Board and each affected Data Principal** in the prescribed manner."},
-            {"id" : "8.8", "text" : "The policy must mandate that personal data be **erased upon withdrawal of consent** or as soon as it is reasonable to assume that the **specified purpose is no longer being served**, whichever is earlier."},
-            {"id" : "8.9", "text" : "The policy must mandate that the Data Fiduciary must **cause its Data Processors to erase the data** when retention is no longer justified."},
-            {"id" : "8.10", "text" : "The policy must define that the specified purpose is deemed no longer served if the Data Principal has neither **approached the Data Fiduciary for the purpose** nor **exercised her rights** within the prescribed time period."},
-            {"id" : "8.11", "text" : "The policy must require publishing the **business contact details** of the Data Protection Officer (if applicable) or of an authorised person able to respond to questions about personal data processing."},
-            {"id" : "8.12", "text" : "The policy must provide an **effective grievance redressal mechanism** for Data Principals."},
-            {"id" : "8.13", "text" : "The policy must clarify that a Data Principal is considered as **not having approached** the Data Fiduciary if she has not initiated contact in person, or through physical or electronic communication, for the purpose within a prescribed period."}
-        ]
-    }
-}
-
-# --- PDF Extractor ---
-def extract_text_from_pdf(pdf_file):
-    doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
-    return "\n".join(page.get_text() for page in doc)
-
-# --- Prompt Generator ---
-def create_full_policy_prompt(section_id, full_policy_text, checklist):
-    checklist_text = "\n".join(
-        f"{item['id']}. {item['text']}" for item in checklist
-    )
+client = get_client(api_key)
+reset_context()
+# Each browser session is one tenant for fair LLM scheduling; calls default to the interactive lane
+set_call_context(st.session_state.setdefault("tenant_id", uuid.uuid4().hex[:12]))
+# Large texts (extracted policies, generated drafts) live once per content in the shared text store
+if "texts" not in st.session_state:
+    st.session_state["texts"] = SessionTexts(label=st.session_state["tenant_id"])
+texts = st.session_state["texts"]
+settings = get_settings()
 
-    return f"""
-    You are a compliance analyst evaluating whether the following full privacy policy meets DPDPA Section {section_id}: {dpdpa_checklists[section_id]['title']}.
-    
-    **Checklist:** Use the item numbers (e.g., 4.1, 4.2...) from the checklist below in your response. Do not rephrase or modify the checklist items. Evaluate strictly based on the original items.
-    
-    {checklist_text}
-    
-    **Full Policy Text:**
-    {full_policy_text}
-    
-    Instructions:
-    For each checklist item, search anywhere in the policy and classify it as:
-    - Explicitly Mentioned
-    - Partially Mentioned
-    - Missing
-    
-    Return output in this JSON format only:
-    {{
-      "Checklist Evaluation": [
-        {{
-          "Checklist Item ID": "4.1",
-          "Status": "Explicitly Mentioned",
-          "Justification": "..."
-        }},
-        ...
-      ],
-      "Match Level": "Fully Compliant / Partially Compliant / Non-Compliant",
-      "Compliance Score": 0.0,
-      "Suggested Rewrite": "...",
-      "Simplified Legal Meaning": "..."
-    }}
-    
-    Only return the JSON object. Do not include any commentary or explanation.
-    """
 # --- GPT Call ---
-def call_gpt(prompt, model="gpt-4"):
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    return json.loads(response.choices[0].message.content)
-    
-def call_gpt_text(prompt, model="gpt-4"):
-    response = client.chat.completions.create(
+@traced("call_gpt_text")
+def call_gpt_text(prompt, model="gpt-4", token=None, temperature=0.5):
+    content = complete(
+        client,
+        token=token,
         model=model,
         messages=[{"role": "user", "content": prompt}],
-        temperature=0.5
+        temperature=temperature
     )
-    return response.choices[0].message.content.strip()
+    return content.strip()
 
-def analyze_policy_section(section_id, checklist, policy_text, model="gpt-4"):
-    prompt = create_full_policy_prompt(section_id, policy_text, checklist)
-    
+def run_cancellable(fn, *args, **kwargs):
+    # Runs an LLM call off the script thread so an abandoned run (rerun, closed tab) cancels it
+    token = RunToken(settings["run_timeout"])
+    status = st.empty()
+    started = time.perf_counter()
     try:
-        result = call_gpt(prompt, model=model)
-    except Exception as e:
-        return {
-            "Section": section_id,
-            "Title": dpdpa_checklists[section_id]['title'],
-            "Error": str(e),
-            "Match Level": "Error",
-            "Compliance Score": 0.0,
-            "Matched Details": [],
-            "Checklist Items Matched": [],
-            "Suggested Rewrite": "",
-            "Simplified Legal Meaning": ""
-        }
+        result = await_result(
+            submit(fn, *args, token=token, **kwargs), token,
+            heartbeat=lambda: status.caption(f"⏳ Waiting for GPT ({time.perf_counter() - started:.0f}s)")
+        )
+    finally:
+        token.finish()
+    status.empty()
+    return result
 
-    checklist_dict = {item["id"]: item["text"] for item in checklist}
-    evaluations = []
-
-    matched_count = 0
-    partial_count = 0
-
-    for item in result.get("Checklist Evaluation", []):
-        item_id = item.get("Checklist Item ID", "").strip()
-        status = item.get("Status", "Missing").strip()
-        justification = item.get("Justification", "").strip()
-        text = checklist_dict.get(item_id, "❓")
-
-        if status == "Explicitly Mentioned":
-            matched_count += 1
-        elif status == "Partially Mentioned":
-            partial_count += 1
-
-        evaluations.append({
-            "Checklist Item ID": item_id,
-            "Checklist Text": text,
-            "Status": status,
-            "Justification": justification
-        })
-
-    score = (matched_count + 0.5 * partial_count) / len(checklist) if checklist else 0
-    level = (
-        "Fully Compliant" if score == 1 else
-        "Non-Compliant" if score == 0 else
-        "Partially Compliant"
-    )
+def draft_sections(prompts, titles):
+    # Outline-then-sections drafting: each section is its own GPT call and all of them run at once;
+    # every finished section is shown in its slot straight away. Returns ({id: text}, {id: error}).
+    # The caller stitches the drafts back in outline order.
+    token = RunToken(settings["run_timeout"])
+    started = time.perf_counter()
+    drafts, failed = {}, {}
+    with st.status(f"Drafting {len(prompts)} section(s) in parallel...", expanded=True) as status:
+        slots = {sid: st.empty() for sid in prompts}
+        for sid in prompts:
+            slots[sid].caption(f"⏳ {titles[sid]}")
+        # The analyst is waiting on screen for these, so they stay in the interactive lane
+        with call_lane("interactive"):
+            futures = {
+                submit(call_gpt_text, prompt, model=settings["generator_model"], token=token, temperature=settings["generator_temperature"]): sid
+                for sid, prompt in prompts.items()
+            }
 
-    return {
-        "Section": section_id,
-        "Title": dpdpa_checklists[section_id]['title'],
-        "Match Level": result.get("Match Level", level),
-        "Compliance Score": round(score, 2),
-        "Matched Details": evaluations,
-        "Checklist Items Matched": [f"{e['Checklist Item ID']} — {e['Checklist Text']}" for e in evaluations if e["Status"] in ["Explicitly Mentioned", "Partially Mentioned"]],
-        "Suggested Rewrite": result.get("Suggested Rewrite", ""),
-        "Simplified Legal Meaning": result.get("Simplified Legal Meaning", "")
-    }
+        def heartbeat():
+            status.update(label=f"Drafting {len(prompts)} section(s) in parallel... {len(drafts) + len(failed)} done ({time.perf_counter() - started:.0f}s)")
+
+        try:
+            for future in await_each(futures, token, heartbeat):
+                sid = futures[future]
+                try:
+                    drafts[sid] = future.result()
+                    slots[sid].markdown(f"**{titles[sid]}**\n\n{drafts[sid]}")
+                except CallCancelled:
+                    raise
+                except Exception as e:
+                    failed[sid] = e
+                    slots[sid].caption(f"❌ {titles[sid]}: {e}")
+        except BaseException:
+            token.cancel("run abandoned")
+            raise
+        finally:
+            token.finish()
+        status.update(label=f"Drafted {len(drafts)} of {len(prompts)} section(s) in {time.perf_counter() - started:.1f}s", state="complete", expanded=False)
+    return drafts, failed
+
+# --- Cascade Policy ---
+CASCADE_POLICY = default_cascade_policy(settings)
+
+def check_key(policy_text, lean=False, **options):
+    # lean is spelled out so a normal check matches a speculative run made with lean=False
+    return request_key(policy_text=policy_text, model=settings["check_model"], lean=lean, **options)
+
+def speculate_sections(policy_text, first_section=None, **options):
+    # Starts (or keeps) a background evaluation of every section for this text and these options
+    key = check_key(policy_text, **options)
+    speculation = st.session_state.get("speculative_run")
+    if speculation is not None and speculation.key == key:
+        return speculation
+    if speculation is not None:
+        speculation.cancel()
+    model = settings["check_model"]
+    section_ids = sorted(dpdpa_checklists, key=lambda sid: sid != first_section)
+    with call_lane("background"):
+        speculation = SpeculativeRun(
+            key, section_ids,
+            # Not recorded: verdicts are written only for sections a check actually uses
+            lambda sid, token: analyze_policy_section(client, sid, dpdpa_checklists[sid]["items"], policy_text, model=model, record=False, token=token, **options),
+            timeout=settings["run_timeout"]
+        )
+    st.session_state["speculative_run"] = speculation
+    return speculation
+
+def evaluate_sections(section_ids, policy_text, **options):
+    # Sections run under one deadline, all at once or one after another depending on the batching
+    # mode; abandoning the run cancels all of them. Sections already pre-evaluated for the same
+    # text and options are taken from the speculative run. Multi-section runs go in the
+    # background scheduling lane so they do not hold up other users' single-section checks.
+    token = RunToken(settings["run_timeout"])
+    lane = "background" if len(section_ids) > 1 else "interactive"
+
+    def start(sid):
+        with call_lane(lane):
+            return submit(
+                analyze_policy_section, client, sid, dpdpa_checklists[sid]["items"], policy_text,
+                model=settings["check_model"], token=token, **options
+            )
+
+    futures = {}
+    speculation = st.session_state.get("speculative_run")
+    if speculation is not None and speculation.key == check_key(policy_text, **options):
+        for sid in section_ids:
+            future = speculation.claim(sid)
+            if future is not None:
+                futures[sid] = future
+    speculative = set(futures)
+    sequential = settings["batching_mode"] == "sequential"
+    if not sequential:
+        futures.update({sid: start(sid) for sid in section_ids if sid not in futures})
+    status = st.empty()
+    started = time.perf_counter()
+
+    def heartbeat():
+        done = sum(future.done() for future in futures.values())
+        status.caption(f"⏳ {done}/{len(section_ids)} section(s) evaluated ({time.perf_counter() - started:.0f}s)")
+
+    results = {}
+    try:
+        for sid in section_ids:
+            if sid not in futures:
+                futures[sid] = start(sid)
+            try:
+                results[sid] = await_result(futures[sid], token, heartbeat)
+                if sid in speculative:
+                    record_section(results[sid], policy_text)
+            except CallCancelled:
+                # The speculative run hit its own deadline; evaluate the section again
+                if token.cancelled or sid not in speculative:
+                    raise
+                futures[sid] = start(sid)
+                results[sid] = await_result(futures[sid], token, heartbeat)
+    finally:
+        token.finish()
+    status.empty()
+    return results
+
+def reuse_summary(results):
+    reused = [r for r in results if "Inherited Items" in r]
+    if not reused:
+        return None
+    inherited = sum(r["Inherited Items"] for r in reused)
+    total = sum(len(dpdpa_checklists[r["Section"]]["items"]) for r in reused)
+    return f"♻️ Reused {inherited} of {total} verdicts from near-duplicate clauses in previously checked policies ({inherited / total:.0%})." if total else None
+
+def local_model_summary(results):
+    predicted = [r for r in results if "Local Model Items" in r]
+    if not predicted:
+        return None
+    answered = sum(r["Local Model Items"] for r in predicted)
+    total = sum(len(dpdpa_checklists[r["Section"]]["items"]) for r in predicted)
+    return f"🖥️ Local model answered {answered} of {total} checklist items without calling GPT ({answered / total:.0%})." if total else None
+
+def escalation_summary(results, cascade_policy):
+    cascaded = [r for r in results if "Escalated Items" in r]
+    if not cascaded:
+        return None
+    escalated = sum(r["Escalated Items"] for r in cascaded)
+    total = sum(len(dpdpa_checklists[r["Section"]]["items"]) for r in cascaded)
+    return f"⚡ Cascade mode: {escalated} of {total} checklist items escalated to {cascade_policy['strong_model']} ({escalated / total:.0%})." if total else None
+
+def render_lean_results(results, policy_text, model):
+    # Statuses render straight away; a section's justifications, rewrite and legal meaning are
+    # fetched the first time its expander is opened (and cached for everyone after that)
+    status_colors = {"Explicitly Mentioned": "#198754", "Partially Mentioned": "#FFC107", "Missing": "#DC3545"}
+    st.markdown("## ⚡ Compliance Status")
+    st.caption("Open a section to load its justifications, suggested rewrite and legal meaning.")
+    st.dataframe(pd.DataFrame([
+        {"Section": r["Section"], "Title": r["Title"], "Compliance Score": r["Compliance Score"], "Match Level": r["Match Level"]}
+        for r in results
+    ]), hide_index=True)
+    for result in results:
+        expander_key = f"lean_details_{result['Section']}"
+        with st.expander(f"Section {result['Section']} — {result['Title']} · {result['Match Level']} ({result['Compliance Score']})", key=expander_key, on_change="rerun"):
+            if result.get("Error"):
+                st.error(result["Error"])
+                continue
+            details = None
+            if st.session_state.get(expander_key):
+                try:
+                    with st.spinner("Loading justifications..."):
+                        details, _ = run_cancellable(fetch_section_details, client, result, policy_text, model=model)
+                except CallCancelled as e:
+                    st.warning(f"Loading stopped: {e}")
+                except Exception as e:
+                    st.error(f"❌ GPT Error: {e}")
+            justifications = details["Justifications"] if details else {}
+            for item in result["Matched Details"]:
+                status = item["Status"]
+                justification = item.get("Justification") or justifications.get(item["Checklist Item ID"], "")
+                st.markdown(f"""
+                **{item['Checklist Item ID']} — {item['Checklist Text']}**  
+                <span style="color:white;background-color:{status_colors.get(status, "#6c757d")};padding:3px 10px;border-radius:6px;font-size:13px;">{status}</span>{f" <small>♻️ inherited ({item['Inherited']})</small>" if item.get("Inherited") else ""}{f" <small>🖥️ local model ({item['Local Model']})</small>" if item.get("Local Model") else ""}  
+                {f"<br><small>📝 {justification}</small>" if justification else ""}
+                """, unsafe_allow_html=True)
+            if details:
+                st.markdown("### ✏️ Suggested Rewrite:")
+                st.info(details["Suggested Rewrite"])
+                st.markdown("### 🧾 Simplified Legal Meaning:")
+                st.success(details["Simplified Legal Meaning"])
+
+def save_draft_version(name, content, organisation="", kind=""):
+    if not name.strip():
+        st.error("Please give the draft a name.")
+        return
+    _, version = get_draft_store().save(name.strip(), content, organisation.strip(), kind)
+    st.success(f"Draft `{name.strip()}` saved as version {version}.")
 
 def set_custom_css():
     st.markdown("""
@@ -365,6 +395,16 @@ menu = st.sidebar.radio("", [
     "Knowledge Assistant",
     "Admin Settings"
 ])
+with st.sidebar.expander("🔌 Connection Pool", expanded=False):
+    for stat, value in pool_stats().items():
+        st.markdown(f"**{stat}:** {value}")
+if tracing_enabled():
+    with st.sidebar.expander("⏱️ Phase Latency", expanded=False):
+        phase_rows = phase_summary()
+        if phase_rows:
+            st.dataframe(pd.DataFrame(phase_rows).set_index("Phase"))
+        else:
+            st.caption("No spans recorded yet.")
 st.sidebar.markdown("<br><br><br><br><br><br><br><br><br><br><br>", unsafe_allow_html=True)
 st.sidebar.markdown("""
     <div style='padding: 0px 12px 0px 0px;'>
@@ -448,8 +488,19 @@ elif menu == "Policy Generator":
             st.markdown("**Grievance Officer Contact Email***  \n_As per Section 10, provide a contact for complaints or data requests._")
             grievance_email = st.text_input(" ", key="grievance_email")
 
+        # --- Group 6: Sector-specific & Custom Clauses ---
+        with st.expander("Additional Clauses (Optional)", expanded=False):
+            st.markdown("**Sector-specific clauses**  \n_Standard sections are assembled instantly from the clause library. Tick this to have GPT add provisions specific to your sector._")
+            sector_clauses = st.checkbox("Add sector-specific clauses with GPT", key="sector_clauses")
+        
+            st.markdown("**Custom paragraphs**  \n_Describe any additional paragraphs you need, e.g. 'CCTV monitoring at our stores'. Drafted with GPT._")
+            custom_clauses = st.text_area(" ", height=100, key="custom_clauses")
+
+            st.markdown("**Tailored wording**  \n_Have GPT rewrite every section for your organization. Sections are drafted in parallel from the policy outline, so a long policy takes about as long as its longest section._")
+            tailor_sections = st.checkbox("Tailor every section with GPT", key="tailor_sections")
+
         # --- Generate Button ---
-        if st.button("Generate DPDPA-Compliant Policy with GPT"):
+        if st.button("Generate DPDPA-Compliant Policy"):
             errors = []
             if policy_type == "-- Select Policy Type --":
                 errors.append("Policy Type")
@@ -471,109 +522,173 @@ elif menu == "Policy Generator":
             else:
                 sector_final = sector_custom if sector_custom else sector_dropdown
                 data_types_final = data_types_common + [dt.strip() for dt in data_types_custom.split(",") if dt.strip()]
-                special_uses = ", ".join(legitimate_use) if legitimate_use else "None"
+                clause_context = build_clause_context(
+                    policy_type, org_name, sector_final, data_types_final, children_data, lawful_purpose,
+                    consent_type, legitimate_use, retention_period, cross_border, grievance_email
+                )
+                # Sections whose inputs did not change keep their text, including manual edits. Tailored
+                # sections also depend on who the organization is, so a change there redrafts them all.
+                draft_mode = section_fingerprint({"policy_type": policy_type, "org_name": org_name, "sector": sector_final}) if tailor_sections else None
+                previous_sections = st.session_state.get("policy_sections")
+                if st.session_state.get("policy_draft_mode") != draft_mode:
+                    previous_sections = None
+                current_draft = st.session_state.get("full_policy_editor", texts.get("full_policy_draft"))
+                if previous_sections and current_draft is not None:
+                    edited_texts = split_sections(current_draft, previous_sections)
+                    if edited_texts is None:
+                        st.warning("Section headings were changed in the editor, so the whole policy has been regenerated.")
+                        previous_sections = None
+                    else:
+                        previous_sections = [dict(section, text=edited_texts[section["id"]]) for section in previous_sections]
+                extra_sections = []
+                prompts = {}
     
-                with st.spinner("Generating policy... please wait."):
-                    prompt = f"""
-    You are a legal policy assistant. Draft a comprehensive, DPDPA-compliant {policy_type.lower()} for the following organization.
+                # GPT is only needed for sector-specific or custom paragraphs
+                if sector_clauses or custom_clauses.strip():
+                    extra_title = f"{sector_final} Sector Provisions" if sector_clauses else "Additional Provisions"
+                    extra_fingerprint = section_fingerprint({
+                        "policy_type": policy_type, "org_name": org_name, "sector": sector_final, "data_types": data_types_final,
+                        "sector_clauses": sector_clauses, "custom_clauses": custom_clauses.strip()
+                    })
+                    previous_extra = next((section for section in previous_sections or [] if section["id"] == "extra"), None)
+                    if previous_extra and previous_extra["fingerprint"] == extra_fingerprint:
+                        extra_sections.append(previous_extra)
+                    else:
+                        with st.spinner("Drafting additional clauses... please wait."):
+                            prompt = f"""
+    You are a legal policy assistant. Draft additional clauses for a DPDPA-compliant {policy_type.lower()} of the following organization. The standard sections (Purpose, Scope, Data Types, Lawful Use, Consent, Security, Retention, Cross-Border Transfers, Rights, Grievance Redressal, Contact) are already written; do not repeat them.
     
     **Organization Details**:
     - Name: {org_name}
     - Sector: {sector_final}
-    
-    **Data Handling**:
     - Data Types Collected: {", ".join(data_types_final)}
-    - Applicable to Children (<18): {children_data}
-    - Shared Internationally: {cross_border}
     
-    **Legal Basis**:
-    - Lawful Purpose: {lawful_purpose}
-    - Consent Type: {consent_type}
-    - Special Use Cases (Sec 7): {special_uses}
+    {"Write provisions specific to the " + sector_final + " sector (for example sectoral regulators, sector-specific data categories and their handling)." if sector_clauses else ""}
+    {f"Also write the following custom paragraphs: {custom_clauses.strip()}" if custom_clauses.strip() else ""}
+    
+    Write in clear, professional English as plain paragraphs that can be inserted under a single heading.
+    Return only the clause text (no headings, disclaimers or titles).
+                            """
+                            if tailor_sections:
+                                # Drafted below, together with the other sections
+                                prompts["extra"] = prompt
+                                extra_sections.append({"id": "extra", "title": extra_title, "text": "", "fingerprint": extra_fingerprint})
+                            else:
+                                try:
+                                    extra_text = run_cancellable(call_gpt_text, prompt, model=settings["generator_model"], temperature=settings["generator_temperature"])
+                                    extra_sections.append({"id": "extra", "title": extra_title, "text": extra_text, "fingerprint": extra_fingerprint})
+                                except Exception as e:
+                                    st.error(f"❌ GPT Error: {e}")
     
-    **Retention & Redressal**:
+                sections, regenerated = build_sections(clause_context, extra_sections, previous_sections)
+                if tailor_sections:
+                    # The outline is the clause library's section list; each regenerated section is
+                    # rewritten from its standard clause with the outline and organization as shared context
+                    titles = {section["id"]: f"{i}. {section['title']}" for i, section in enumerate(sections, start=1)}
+                    outline = "\n".join(titles.values())
+                    for section in sections:
+                        if section["id"] in regenerated and section["id"] not in prompts:
+                            prompts[section["id"]] = f"""
+    You are a legal policy assistant drafting one section of a DPDPA-compliant {policy_type.lower()}. The other sections are drafted separately; do not repeat their content.
+    
+    **Organization Details**:
+    - Name: {org_name}
+    - Sector: {sector_final}
+    - Data Types Collected: {", ".join(data_types_final)}
+    - Lawful Purpose: {lawful_purpose}
+    - Consent: {consent_type}
+    - Applies to Children: {children_data}
     - Retention Period: {retention_period}
+    - Cross-Border Transfers: {cross_border}
     - Grievance Contact: {grievance_email}
     
-    **Compliance Requirements**:
-    Ensure the policy covers all obligations under the Digital Personal Data Protection Act, 2023 (India), including:
-    - Lawful purpose (Sec 4)
-    - Informed consent (Sec 6)
-    - Notice obligations (Sec 5)
-    - Grievance handling (Sec 10)
-    - Data accuracy (Sec 8.3)
-    - Security safeguards (Sec 8.5)
-    - Erasure after purpose is fulfilled or consent withdrawn (Sec 8.7)
-    - Special clauses for children (Sec 9) if applicable
-    - International transfer declaration (Sec 16)
+    **Policy Outline**:
+    {outline}
     
-    Write the policy in clear, professional English with practical sections like: Purpose, Scope, Data Types, Lawful Use, Consent, Security, Retention, Rights, Grievance Redressal, Contact.
+    Write section {titles[section["id"]]}. Start from the standard clause below: keep every obligation, right and fact it states, and tailor the wording and level of detail to this organization and sector.
     
-    Return only the policy draft (no disclaimers or titles).
-                    """
-                    try:
-                        draft = call_gpt_text(prompt)
-                        st.session_state["full_policy_draft"] = draft
-                        st.success("✅ DPDPA-compliant draft generated successfully!")
-                    except Exception as e:
-                        st.error(f"❌ GPT Error: {e}")
+    Standard clause:
+    {section["text"]}
+    
+    Write in clear, professional English as plain paragraphs. Return only the section text (no headings, disclaimers or titles).
+                            """
+                    drafts, failed = {}, {}
+                    if prompts:
+                        try:
+                            drafts, failed = draft_sections(prompts, titles)
+                        except CallCancelled as e:
+                            st.error(f"❌ GPT Error: {e}")
+                    # Sections that could not be drafted keep the standard clause text and are redrafted next time
+                    sections = [
+                        dict(section, text=drafts[section["id"]]) if section["id"] in drafts
+                        else dict(section, fingerprint="") if section["id"] in prompts else section
+                        for section in sections
+                    ]
+                    sections = [section for section in sections if section["text"]]
+                    if failed:
+                        st.warning("Could not tailor " + ", ".join(titles[sid] for sid in failed) + "; the standard text was kept where available.")
+                # Only headings and fingerprints are kept; section texts are split from the draft when needed
+                st.session_state["policy_draft_mode"] = draft_mode
+                st.session_state["policy_sections"] = [{key: section[key] for key in ("id", "title", "fingerprint")} for section in sections]
+                st.session_state["full_policy_editor"] = assemble_sections(sections)
+                texts.set("full_policy_draft", st.session_state["full_policy_editor"])
+                if previous_sections:
+                    st.success(f"✅ Regenerated {len(regenerated)} of {len(sections)} section(s); the rest, including your edits, were kept.")
+                else:
+                    st.success("✅ DPDPA-compliant draft generated successfully!")
     
         # --- Output Editor ---
-        if "full_policy_draft" in st.session_state:
+        if texts.has("full_policy_draft"):
             st.markdown("---")
             st.markdown("### Edit Your Policy")
-            edited = st.text_area("Modify the policy text below:", value=st.session_state["full_policy_draft"], height=400, key="full_policy_editor")
+            if "full_policy_editor" not in st.session_state:
+                st.session_state["full_policy_editor"] = texts.get("full_policy_draft")
+            edited = st.text_area("Modify the policy text below:", height=400, key="full_policy_editor")
+            texts.set("full_policy_draft", edited)
+            draft_name = st.text_input("Draft name", value=f"{policy_type} Policy", key="full_policy_draft_name")
     
             col1, col2, col3, col4 = st.columns(4)
 
-            # --- Save in Session ---
+            # --- Save to Draft Store ---
             with col1:
-                if st.button("💾 Save (Session Only)"):
-                    st.session_state["saved_full_policy"] = edited
-                    st.success("Draft saved temporarily in session.")
+                if st.button("💾 Save Draft"):
+                    save_draft_version(draft_name, edited, org_name, "Full Policy")
             
             # --- Export to .docx ---
             with col2:
-                if st.button("⬇️ Export to Word (.docx)"):
-                    doc = Document()
-                    doc.add_heading(f"{policy_type} - Generated Policy", level=1)
-                    for para in edited.split("\n"):
-                        doc.add_paragraph(para)
-                    buffer = io.BytesIO()
-                    doc.save(buffer)
-                    buffer.seek(0)
-                    st.download_button(
-                        label="📄 Download Word File",
-                        data=buffer,
-                        file_name=f"{org_name.replace(' ', '_')}_DPDPA_policy.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    )
+                st.download_button(
+                    label="⬇️ Export to Word (.docx)",
+                    data=artifact_loader(edited, "docx", f"{policy_type} - Generated Policy"),
+                    file_name=f"{org_name.replace(' ', '_')}_DPDPA_policy.docx",
+                    mime=MIME_TYPES["docx"],
+                    on_click="ignore"
+                )
             
             # --- Export to .txt ---
             with col3:
-                if st.button("⬇️ Export to TXT"):
-                    st.download_button(
-                        label="📄 Download TXT File",
-                        data=edited,
-                        file_name=f"{org_name.replace(' ', '_')}_DPDPA_policy.txt",
-                        mime="text/plain"
-                    )
+                st.download_button(
+                    label="⬇️ Export to TXT",
+                    data=artifact_loader(edited, "txt"),
+                    file_name=f"{org_name.replace(' ', '_')}_DPDPA_policy.txt",
+                    mime=MIME_TYPES["txt"],
+                    on_click="ignore"
+                )
             
             # --- Save Draft to JSON ---
             with col4:
-                if st.button("💾 Save to File (.json)"):
-                    draft_data = {
-                        "policy": edited,
-                        "timestamp": str(datetime.datetime.now()),
-                        "org_name": org_name,
-                        "policy_type": policy_type
-                    }
-                    st.download_button(
-                        label="📁 Download Draft as JSON",
-                        data=json.dumps(draft_data, indent=2),
-                        file_name=f"{org_name.replace(' ', '_')}_DPDPA_draft.json",
-                        mime="application/json"
-                    )
+                draft_data = {
+                    "policy": edited,
+                    "timestamp": str(datetime.datetime.now()),
+                    "org_name": org_name,
+                    "policy_type": policy_type
+                }
+                st.download_button(
+                    label="💾 Save to File (.json)",
+                    data=artifact_loader(draft_data, "json"),
+                    file_name=f"{org_name.replace(' ', '_')}_DPDPA_draft.json",
+                    mime=MIME_TYPES["json"],
+                    on_click="ignore"
+                )
 
     with tab2:
         with tab2:
@@ -626,65 +741,61 @@ elif menu == "Policy Generator":
         Return only the section text. Do not include headings or disclaimers.
                         """
                         try:
-                            section_output = call_gpt_text(section_prompt)
-                            st.session_state["section_output"] = section_output
+                            section_output = run_cancellable(call_gpt_text, section_prompt, model=settings["generator_model"], temperature=settings["generator_temperature"])
+                            texts.set("section_output", section_output)
                             st.success("✅ Section draft generated successfully!")
                         except Exception as e:
                             st.error(f"❌ GPT Error: {e}")
         
             # --- Output Editor ---
-            if "section_output" in st.session_state:
+            if texts.has("section_output"):
                 st.markdown("---")
                 st.markdown("### Edit Your Section")
-                edited_section = st.text_area("You can make final changes below:", value=st.session_state["section_output"], height=300, key="section_editor")
+                edited_section = st.text_area("You can make final changes below:", value=texts.get("section_output"), height=300, key="section_editor")
+                draft_name = st.text_input("Draft name", value=section_label, key="section_draft_name")
         
                 col1, col2, col3, col4 = st.columns(4)
         
                 with col1:
-                    if st.button("Save (Session Only)", key="save_section"):
-                        st.session_state["saved_section"] = edited_section
-                        st.success("Section saved temporarily in session.")
+                    if st.button("💾 Save Draft", key="save_section"):
+                        save_draft_version(draft_name, edited_section, st.session_state.get("org_name", ""), "Section")
         
                 with col2:
-                    if st.button("⬇️ Export as Word", key="export_section_docx"):
-                        doc = Document()
-                        doc.add_heading(section_label, level=1)
-                        for para in edited_section.split("\n"):
-                            doc.add_paragraph(para)
-                        buffer = io.BytesIO()
-                        doc.save(buffer)
-                        buffer.seek(0)
-                        st.download_button(
-                            label="📄 Download Word File",
-                            data=buffer,
-                            file_name=f"DPDPA_Section_{section_id}.docx",
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        )
+                    st.download_button(
+                        label="⬇️ Export as Word",
+                        data=artifact_loader(edited_section, "docx", section_label),
+                        file_name=f"DPDPA_Section_{section_id}.docx",
+                        mime=MIME_TYPES["docx"],
+                        on_click="ignore",
+                        key="export_section_docx"
+                    )
         
                 with col3:
-                    if st.button("⬇️ Export as TXT", key="export_section_txt"):
-                        st.download_button(
-                            label="📄 Download TXT File",
-                            data=edited_section,
-                            file_name=f"DPDPA_Section_{section_id}.txt",
-                            mime="text/plain"
-                        )
+                    st.download_button(
+                        label="⬇️ Export as TXT",
+                        data=artifact_loader(edited_section, "txt"),
+                        file_name=f"DPDPA_Section_{section_id}.txt",
+                        mime=MIME_TYPES["txt"],
+                        on_click="ignore",
+                        key="export_section_txt"
+                    )
         
                 with col4:
-                    if st.button("💾 Save to File (JSON)", key="export_section_json"):
-                        section_data = {
-                            "section": section_id,
-                            "title": section_label,
-                            "content": edited_section,
-                            "user_instruction": custom_instruction,
-                            "org_context": org_context
-                        }
-                        st.download_button(
-                            label="📁 Download JSON Draft",
-                            data=json.dumps(section_data, indent=2),
-                            file_name=f"DPDPA_Section_{section_id}_Draft.json",
-                            mime="application/json"
-                        )
+                    section_data = {
+                        "section": section_id,
+                        "title": section_label,
+                        "content": edited_section,
+                        "user_instruction": custom_instruction,
+                        "org_context": org_context
+                    }
+                    st.download_button(
+                        label="💾 Save to File (JSON)",
+                        data=artifact_loader(section_data, "json"),
+                        file_name=f"DPDPA_Section_{section_id}_Draft.json",
+                        mime=MIME_TYPES["json"],
+                        on_click="ignore",
+                        key="export_section_json"
+                    )
 
     with tab3:
         st.markdown("### Generate Policy by Data Lifecycle Stage")
@@ -729,64 +840,60 @@ elif menu == "Policy Generator":
     Only output the draft content, no explanations or headings.
                     """
                     try:
-                        lifecycle_output = call_gpt_text(lifecycle_prompt_text)
-                        st.session_state["lifecycle_output"] = lifecycle_output
+                        lifecycle_output = run_cancellable(call_gpt_text, lifecycle_prompt_text, model=settings["generator_model"], temperature=settings["generator_temperature"])
+                        texts.set("lifecycle_output", lifecycle_output)
                         st.success("✅ Section generated successfully!")
                     except Exception as e:
                         st.error(f"❌ GPT Error: {e}")
     
         # --- Output Area ---
-        if "lifecycle_output" in st.session_state:
+        if texts.has("lifecycle_output"):
             st.markdown("---")
             st.markdown(f"### Edit Lifecycle Section: {lifecycle_stage}")
-            edited_lifecycle = st.text_area("Modify the generated content below:", value=st.session_state["lifecycle_output"], height=300, key="lifecycle_editor")
+            edited_lifecycle = st.text_area("Modify the generated content below:", value=texts.get("lifecycle_output"), height=300, key="lifecycle_editor")
+            draft_name = st.text_input("Draft name", value=f"{lifecycle_stage} Policy", key="lifecycle_draft_name")
     
             col1, col2, col3, col4 = st.columns(4)
     
             with col1:
-                if st.button("💾 Save (Session Only)", key="save_lifecycle"):
-                    st.session_state["saved_lifecycle"] = edited_lifecycle
-                    st.success("Saved in session.")
+                if st.button("💾 Save Draft", key="save_lifecycle"):
+                    save_draft_version(draft_name, edited_lifecycle, st.session_state.get("org_name", ""), "Lifecycle")
     
             with col2:
-                if st.button("⬇️ Export as Word", key="export_lifecycle_docx"):
-                    doc = Document()
-                    doc.add_heading(f"{lifecycle_stage} Policy", level=1)
-                    for para in edited_lifecycle.split("\n"):
-                        doc.add_paragraph(para)
-                    buffer = io.BytesIO()
-                    doc.save(buffer)
-                    buffer.seek(0)
-                    st.download_button(
-                        label="📄 Download Word File",
-                        data=buffer,
-                        file_name=f"{lifecycle_stage.replace(' ', '_')}_Policy.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    )
+                st.download_button(
+                    label="⬇️ Export as Word",
+                    data=artifact_loader(edited_lifecycle, "docx", f"{lifecycle_stage} Policy"),
+                    file_name=f"{lifecycle_stage.replace(' ', '_')}_Policy.docx",
+                    mime=MIME_TYPES["docx"],
+                    on_click="ignore",
+                    key="export_lifecycle_docx"
+                )
     
             with col3:
-                if st.button("⬇️ Export as TXT", key="export_lifecycle_txt"):
-                    st.download_button(
-                        label="📄 Download TXT File",
-                        data=edited_lifecycle,
-                        file_name=f"{lifecycle_stage.replace(' ', '_')}_Policy.txt",
-                        mime="text/plain"
-                    )
+                st.download_button(
+                    label="⬇️ Export as TXT",
+                    data=artifact_loader(edited_lifecycle, "txt"),
+                    file_name=f"{lifecycle_stage.replace(' ', '_')}_Policy.txt",
+                    mime=MIME_TYPES["txt"],
+                    on_click="ignore",
+                    key="export_lifecycle_txt"
+                )
     
             with col4:
-                if st.button("💾 Save as JSON", key="export_lifecycle_json"):
-                    lifecycle_data = {
-                        "stage": lifecycle_stage,
-                        "prompt": lifecycle_prompt,
-                        "context": lifecycle_context,
-                        "content": edited_lifecycle
-                    }
-                    st.download_button(
-                        label="📁 Download JSON Draft",
-                        data=json.dumps(lifecycle_data, indent=2),
-                        file_name=f"{lifecycle_stage.replace(' ', '_')}_Draft.json",
-                        mime="application/json"
-                    )
+                lifecycle_data = {
+                    "stage": lifecycle_stage,
+                    "prompt": lifecycle_prompt,
+                    "context": lifecycle_context,
+                    "content": edited_lifecycle
+                }
+                st.download_button(
+                    label="💾 Save as JSON",
+                    data=artifact_loader(lifecycle_data, "json"),
+                    file_name=f"{lifecycle_stage.replace(' ', '_')}_Draft.json",
+                    mime=MIME_TYPES["json"],
+                    on_click="ignore",
+                    key="export_lifecycle_json"
+                )
 
 
     with tab4:
@@ -826,155 +933,267 @@ elif menu == "Policy Generator":
     Write in clear, professional policy language. Avoid filler text, disclaimers, or general advice. Return only the content of the policy.
                     """
                     try:
-                        gpt_draft_output = call_gpt_text(prompt_draft_text)
-                        st.session_state["gpt_draft_output"] = gpt_draft_output
+                        gpt_draft_output = run_cancellable(call_gpt_text, prompt_draft_text, model=settings["generator_model"], temperature=settings["generator_temperature"])
+                        texts.set("gpt_draft_output", gpt_draft_output)
                         st.success("✅ Draft generated!")
                     except Exception as e:
                         st.error(f"❌ GPT Error: {e}")
     
         # --- Editable Output Area ---
-        if "gpt_draft_output" in st.session_state:
+        if texts.has("gpt_draft_output"):
             st.markdown("---")
             st.markdown("### Edit Your Draft")
-            edited_gpt_draft = st.text_area("Make final changes below:", value=st.session_state["gpt_draft_output"], height=300, key="gpt_draft_editor")
+            edited_gpt_draft = st.text_area("Make final changes below:", value=texts.get("gpt_draft_output"), height=300, key="gpt_draft_editor")
+            draft_name = st.text_input("Draft name", value="Custom Policy Draft", key="gpt_draft_name")
     
             col1, col2, col3, col4 = st.columns(4)
     
             with col1:
-                if st.button("💾 Save (Session Only)", key="save_gpt_draft"):
-                    st.session_state["saved_gpt_draft"] = edited_gpt_draft
-                    st.success("Saved in session.")
+                if st.button("💾 Save Draft", key="save_gpt_draft"):
+                    save_draft_version(draft_name, edited_gpt_draft, st.session_state.get("org_name", ""), "GPT Draft")
     
             with col2:
-                if st.button("⬇️ Export as Word", key="export_gpt_draft_docx"):
-                    doc = Document()
-                    doc.add_heading("Custom Policy Draft", level=1)
-                    for para in edited_gpt_draft.split("\n"):
-                        doc.add_paragraph(para)
-                    buffer = io.BytesIO()
-                    doc.save(buffer)
-                    buffer.seek(0)
-                    st.download_button(
-                        label="📄 Download Word File",
-                        data=buffer,
-                        file_name=f"Custom_Policy_Draft.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    )
+                st.download_button(
+                    label="⬇️ Export as Word",
+                    data=artifact_loader(edited_gpt_draft, "docx", "Custom Policy Draft"),
+                    file_name="Custom_Policy_Draft.docx",
+                    mime=MIME_TYPES["docx"],
+                    on_click="ignore",
+                    key="export_gpt_draft_docx"
+                )
     
             with col3:
-                if st.button("⬇️ Export as TXT", key="export_gpt_draft_txt"):
-                    st.download_button(
-                        label="📄 Download TXT File",
-                        data=edited_gpt_draft,
-                        file_name=f"Custom_Policy_Draft.txt",
-                        mime="text/plain"
-                    )
+                st.download_button(
+                    label="⬇️ Export as TXT",
+                    data=artifact_loader(edited_gpt_draft, "txt"),
+                    file_name="Custom_Policy_Draft.txt",
+                    mime=MIME_TYPES["txt"],
+                    on_click="ignore",
+                    key="export_gpt_draft_txt"
+                )
     
             with col4:
-                if st.button("💾 Save as JSON", key="export_gpt_draft_json"):
-                    gpt_draft_data = {
-                        "prompt": free_prompt,
-                        "sector": sector_tag,
-                        "scope": scope_tag,
-                        "category": category_tag,
-                        "content": edited_gpt_draft
-                    }
-                    st.download_button(
-                        label="📁 Download JSON Draft",
-                        data=json.dumps(gpt_draft_data, indent=2),
-                        file_name="Custom_Policy_Draft.json",
-                        mime="application/json"
-                    )
+                gpt_draft_data = {
+                    "prompt": free_prompt,
+                    "sector": sector_tag,
+                    "scope": scope_tag,
+                    "category": category_tag,
+                    "content": edited_gpt_draft
+                }
+                st.download_button(
+                    label="💾 Save as JSON",
+                    data=artifact_loader(gpt_draft_data, "json"),
+                    file_name="Custom_Policy_Draft.json",
+                    mime=MIME_TYPES["json"],
+                    on_click="ignore",
+                    key="export_gpt_draft_json"
+                )
 
 
     with tab5:
         st.markdown("### View & Manage Saved Drafts")
-        st.caption("This page lets you view, edit, rename, export, or delete any draft stored in your session or uploaded from a file.")
-    
-        # --- Session State: Collect all saved drafts ---
-        saved_drafts = {}
-        for key in st.session_state:
-            if key.startswith("saved_"):
-                label = key.replace("saved_", "").replace("_", " ").title()
-                saved_drafts[label] = st.session_state[key]
-    
+        st.caption("Drafts are stored permanently with their full version history. Search, restore an earlier version, edit, rename, export, or delete any draft.")
+        draft_store = get_draft_store()
+
         # --- Upload JSON Draft ---
         st.markdown("#### Upload a JSON Draft (from export)")
         uploaded = st.file_uploader("Upload JSON file", type="json")
         if uploaded:
             try:
                 loaded = json.load(uploaded)
-                label = f"Uploaded: {uploaded.name}"
-                saved_drafts[label] = loaded["content"]
+                label = loaded.get("name") or f"Uploaded: {uploaded.name}"
+                draft_store.save(label, loaded["content"], loaded.get("org_name", ""), "Uploaded")
                 st.success(f"✅ Loaded draft: {label}")
             except Exception as e:
                 st.error(f"❌ Error loading draft: {e}")
-    
-        if not saved_drafts:
-            st.info("No drafts found in this session. Try generating and saving one in Tabs 1–4.")
+
+        # --- Search & Pagination ---
+        col_search, col_org = st.columns(2)
+        with col_search:
+            draft_search = st.text_input("🔎 Search drafts by name", key="draft_search")
+        with col_org:
+            org_filter = st.selectbox("Organisation", ["All"] + draft_store.organisations(), key="draft_org_filter")
+        org_filter = None if org_filter == "All" else org_filter
+
+        _, total_drafts = draft_store.list(page_size=0, search=draft_search, organisation=org_filter)
+        page_count = max(1, -(-total_drafts // PAGE_SIZE))
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        drafts, _ = draft_store.list(page=page - 1, search=draft_search, organisation=org_filter)
+
+        if not drafts:
+            st.info("No saved drafts found. Try generating and saving one in Tabs 1–4.")
         else:
-            draft_names = list(saved_drafts.keys())
-            selected = st.selectbox("📋 Select a draft to view/edit", draft_names)
-            current_draft = saved_drafts[selected]
-    
+            st.caption(f"Showing {len(drafts)} of {total_drafts} draft(s).")
+            drafts_by_id = {draft["id"]: draft for draft in drafts}
+            selected_id = st.selectbox(
+                "📋 Select a draft to view/edit", list(drafts_by_id),
+                format_func=lambda draft_id: f"{drafts_by_id[draft_id]['name']}"
+                                             f"{' — ' + drafts_by_id[draft_id]['organisation'] if drafts_by_id[draft_id]['organisation'] else ''}"
+                                             f" (v{drafts_by_id[draft_id]['head_version']}, updated {drafts_by_id[draft_id]['updated_at']})"
+            )
+            selected_draft = drafts_by_id[selected_id]
+            selected = selected_draft["name"]
+
+            versions = draft_store.versions(selected_id)
+            selected_version = st.selectbox(
+                "🕘 Version", [v["version"] for v in versions],
+                format_func=lambda version: next(
+                    f"v{v['version']} — {v['created_at']} ({v['size']} characters){' (latest)' if v['version'] == selected_draft['head_version'] else ''}"
+                    for v in versions if v["version"] == version
+                ),
+                key=f"draft_version_{selected_id}"
+            )
+            current_draft = draft_store.load(selected_id, selected_version)
+
             st.markdown(f"#### Editing Draft: `{selected}`")
-            edited_draft = st.text_area("You can update the draft content below:", value=current_draft, height=300, key="edit_draft")
-    
+            edited_draft = st.text_area(
+                "You can update the draft content below:", value=current_draft, height=300,
+                key=f"edit_draft_{selected_id}_{selected_version}"
+            )
+
+            if st.button("💾 Save as New Version", key="save_draft_version"):
+                _, version = draft_store.save(selected, edited_draft, selected_draft["organisation"], selected_draft["kind"])
+                st.success(f"Draft `{selected}` saved as version {version}.")
+
             col1, col2, col3, col4 = st.columns(4)
-    
+
             # --- Rename ---
             with col1:
-                new_name = st.text_input("Rename this draft as", value=selected, key="rename_field")
+                new_name = st.text_input("Rename this draft as", value=selected, key=f"rename_field_{selected_id}")
                 if st.button("🔁 Rename Draft"):
-                    st.session_state[f"saved_{new_name.replace(' ', '_').lower()}"] = edited_draft
-                    if f"saved_{selected.replace(' ', '_').lower()}" in st.session_state:
-                        del st.session_state[f"saved_{selected.replace(' ', '_').lower()}"]
-                    st.success("✅ Draft renamed successfully. Refresh the dropdown to see updated name.")
-    
+                    if draft_store.rename(selected_id, new_name.strip()):
+                        st.success("✅ Draft renamed successfully.")
+                    else:
+                        st.error(f"A draft named `{new_name}` already exists for this organisation.")
+
             # --- Export .docx ---
             with col2:
-                if st.button("⬇️ Export as Word (.docx)", key="export_word_saved"):
-                    doc = Document()
-                    doc.add_heading(f"{selected} Draft", level=1)
-                    for para in edited_draft.split("\n"):
-                        doc.add_paragraph(para)
-                    buffer = io.BytesIO()
-                    doc.save(buffer)
-                    buffer.seek(0)
-                    st.download_button(
-                        label="📄 Download Word File",
-                        data=buffer,
-                        file_name=f"{selected.replace(' ', '_')}.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    )
-    
+                st.download_button(
+                    label="⬇️ Export as Word (.docx)",
+                    data=artifact_loader(edited_draft, "docx", f"{selected} Draft"),
+                    file_name=f"{selected.replace(' ', '_')}.docx",
+                    mime=MIME_TYPES["docx"],
+                    on_click="ignore",
+                    key="export_word_saved"
+                )
+
             # --- Export .txt ---
             with col3:
-                if st.button("⬇️ Export as TXT", key="export_txt_saved"):
-                    st.download_button(
-                        label="📄 Download TXT File",
-                        data=edited_draft,
-                        file_name=f"{selected.replace(' ', '_')}.txt",
-                        mime="text/plain"
-                    )
-    
+                st.download_button(
+                    label="⬇️ Export as TXT",
+                    data=artifact_loader(edited_draft, "txt"),
+                    file_name=f"{selected.replace(' ', '_')}.txt",
+                    mime=MIME_TYPES["txt"],
+                    on_click="ignore",
+                    key="export_txt_saved"
+                )
+
             # --- Export .json ---
             with col4:
-                if st.button("💾 Download JSON", key="export_json_saved"):
-                    st.download_button(
-                        label="📁 Download JSON File",
-                        data=json.dumps({"name": selected, "content": edited_draft}, indent=2),
-                        file_name=f"{selected.replace(' ', '_')}.json",
-                        mime="application/json"
-                    )
-    
-            # --- Delete from session ---
+                st.download_button(
+                    label="💾 Download JSON",
+                    data=artifact_loader({"name": selected, "org_name": selected_draft["organisation"], "content": edited_draft}, "json"),
+                    file_name=f"{selected.replace(' ', '_')}.json",
+                    mime=MIME_TYPES["json"],
+                    on_click="ignore",
+                    key="export_json_saved"
+                )
+
+            # --- Delete (all versions) ---
             if st.button("🗑️ Delete Draft", key="delete_draft_btn"):
-                del_key = f"saved_{selected.replace(' ', '_').lower()}"
-                if del_key in st.session_state:
-                    del st.session_state[del_key]
-                    st.success(f"Draft `{selected}` deleted. Refresh to confirm.")
+                draft_store.delete(selected_id)
+                st.success(f"Draft `{selected}` and its {len(versions)} version(s) deleted.")
+
+        store_stats = draft_store.stats()
+        if store_stats["Versions"]:
+            st.caption(
+                f"{store_stats['Drafts']} draft(s), {store_stats['Versions']} version(s): "
+                f"{store_stats['Text Bytes'] / 1024:.0f} KB of text stored in {store_stats['Stored Bytes'] / 1024:.0f} KB."
+            )
+
+
+# --- Dashboard & Reports ---
+elif menu == "Dashboard & Reports":
+    st.title("Compliance Dashboard")
+    st.caption("Scores for every policy checked so far, computed from the stored checklist verdicts. Changing the weights re-scores all policies instantly, without calling GPT.")
+    matrix = get_status_matrix()
+    if not matrix.documents:
+        st.info("No policies have been checked yet. Results from the Policy Compliance Checker appear here.")
+    else:
+        with st.expander("⚖️ Scoring Weights", expanded=False):
+            partial_credit = st.slider("Credit for a partially mentioned item", 0.0, 1.0, PARTIAL_CREDIT, 0.05, key="dashboard_partial_credit")
+            section_weights = st.data_editor(
+                pd.DataFrame({"Section": SECTION_IDS, "Title": [dpdpa_checklists[sid]["title"] for sid in SECTION_IDS], "Weight": 1.0}),
+                column_config={"Weight": st.column_config.NumberColumn(min_value=0.0, step=0.5)},
+                disabled=["Section", "Title"], hide_index=True, key="dashboard_section_weights"
+            )
+        report, level_counts, gaps = portfolio_report(matrix, partial_credit, section_weights=section_weights["Weight"].fillna(0).to_numpy())
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Policies Checked", len(report))
+        col2.metric("Mean Weighted Score", f"{report['Weighted Score'].mean():.2f}")
+        col3.metric("Fully Compliant", f"{(report['Match Level'] == 'Fully Compliant').mean():.0%}")
+
+        st.markdown("### Match Levels by Section")
+        st.dataframe(level_counts)
+
+        st.markdown("### Biggest Gaps")
+        st.caption("Checklist items that cost the most score across policies whose section was checked.")
+        st.dataframe(gaps.head(20), hide_index=True)
+
+        st.markdown("### Policies")
+        st.dataframe(report.sort_values("Weighted Score", na_position="last"), hide_index=True)
+        st.download_button(
+            label="📥 Download Scores CSV",
+            data=report.to_csv(index=False).encode("utf-8"),
+            file_name="DPDPA_Portfolio_Scores.csv",
+            mime="text/csv",
+            on_click="ignore"
+        )
 
+# --- Knowledge Assistant ---
+elif menu == "Knowledge Assistant":
+    st.title("Knowledge Assistant")
+    knowledge_index = get_knowledge_index(dpdpa_checklists)
+    sources = "the Act, the compliance checklists" if knowledge_index.act_passages else "the compliance checklists"
+    st.caption(f"Ask about DPDPA requirements, e.g. 'What does 8.7 require?' or 'withdrawal of consent'. Answers come from a local index of {sources} and earlier evaluations; GPT is only used if you ask it to summarise.")
+    if not knowledge_index.act_passages:
+        st.warning(f"The text of the Act was not found at {ACT_TEXT_PATH}, so it is not searched. Add a plain-text copy there or set DPDPA_ACT_PATH.")
+
+    question = st.text_input("Your question", key="knowledge_question")
+    top_k = st.slider("Passages to retrieve", 1, 10, 5, key="knowledge_top_k")
+
+    if question.strip():
+        start = time.perf_counter()
+        knowledge_index = get_knowledge_index(dpdpa_checklists)
+        passages = knowledge_index.search(question, top_k=top_k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        st.caption(f"Retrieved {len(passages)} passage(s) from {len(knowledge_index.passages)} indexed in {elapsed_ms:.1f} ms.")
+
+        if not passages:
+            st.info("No matching passages found. Try different keywords or a checklist item number like 6.8.")
+        else:
+            source_color = {
+                "DPDPA Act": "#1a9afa",
+                "Checklist": "#198754",
+                "Prior Evaluation": "#6C757D"
+            }
+            for passage in passages:
+                st.markdown(f"""
+                <span style="color:white;background-color:{source_color.get(passage['source'], '#6c757d')};padding:3px 10px;border-radius:6px;font-size:13px;">{passage['source']}</span> **{passage['ref']}**  
+                {passage['text']}
+                """, unsafe_allow_html=True)
+
+            if st.button("✨ Summarise with GPT", key="knowledge_synthesize"):
+                with st.spinner("Summarising retrieved passages..."):
+                    try:
+                        answer, cached = synthesize_answer(question, passages, lambda prompt: run_cancellable(call_gpt_text, prompt, model=settings["assistant_model"]))
+                        st.markdown("### Answer")
+                        st.success(answer)
+                        if cached:
+                            st.caption("Served from cache.")
+                    except Exception as e:
+                        st.error(f"❌ GPT Error: {e}")
 
 # --- Policy Compliance Checker ---
 elif menu == "Policy Compliance Checker":
@@ -1000,10 +1219,17 @@ elif menu == "Policy Compliance Checker":
             </div>
             """, unsafe_allow_html=True)
 
-            policy_text = extract_text_from_pdf(uploaded_pdf)
+            # Extract once per upload; reruns read the text back from the shared store
+            if st.session_state.get("extracted_pdf_id") != uploaded_pdf.file_id or not texts.has("extracted_pdf"):
+                texts.set("extracted_pdf", extract_text_from_pdf(uploaded_pdf))
+                st.session_state["extracted_pdf_id"] = uploaded_pdf.file_id
+            policy_text = texts.get("extracted_pdf")
             st.subheader("Extracted Policy Text")
-            st.text_area("Full Extracted Text", policy_text, height=500)
+            # Read-only view, so no widget state holds another copy of the text
+            with st.container(height=500):
+                st.text(policy_text)
         else:
+            texts.pop("extracted_pdf")
             policy_text = ""
 
     #st.header("4. Industry Context (Optional)")
@@ -1020,17 +1246,84 @@ elif menu == "Policy Compliance Checker":
     section_id = st.selectbox("", options=section_options)
 
     st.markdown("<h3 style='font-size:24px; font-weight:700;'>4. Run Compliance Check</h3>", unsafe_allow_html=True)
+    use_cascade = st.checkbox("⚡ Cascade mode (fast model first, escalate uncertain items)", key="use_cascade")
+    cascade_policy = None
+    if use_cascade:
+        with st.expander("Cascade settings", expanded=False):
+            cascade_policy = {
+                "fast_model": st.text_input("Fast model", value=CASCADE_POLICY["fast_model"], key="cascade_fast_model"),
+                "strong_model": st.text_input("Strong model", value=CASCADE_POLICY["strong_model"], key="cascade_strong_model"),
+                "escalate_statuses": st.multiselect(
+                    "Always escalate items marked as",
+                    ["Explicitly Mentioned", "Partially Mentioned", "Missing"],
+                    default=CASCADE_POLICY["escalate_statuses"], key="cascade_statuses"
+                ),
+                "min_confidence": st.slider(
+                    "Escalate when confidence is below", 0.0, 1.0,
+                    value=CASCADE_POLICY["min_confidence"], step=0.05, key="cascade_min_confidence"
+                )
+            }
+
+    reuse_verdicts = st.checkbox("♻️ Reuse verdicts from near-duplicate clauses in previously checked policies", key="reuse_verdicts")
+    lean_mode = st.checkbox("🏎️ Lean mode (statuses first; justifications and rewrites load when you open a section)", key="lean_mode")
+
+    local_threshold = None
+    if get_distilled_classifier() is not None:
+        if st.checkbox("🖥️ Answer confident items with the local model (trained on past GPT verdicts)", key="use_local_model"):
+            local_threshold = st.slider(
+                "Minimum local model confidence", 0.5, 1.0, value=0.9, step=0.05, key="local_model_threshold"
+            )
+
+    if settings["speculative_checks"] and policy_text:
+        speculation = speculate_sections(
+            policy_text, first_section=section_id.split(" — ")[0],
+            cascade_policy=cascade_policy, reuse_verdicts=reuse_verdicts, local_threshold=local_threshold, lean=lean_mode
+        )
+        st.caption(f"🔮 {speculation.done_count()} of {len(dpdpa_checklists)} sections already pre-evaluated in the background.")
+    elif "speculative_run" in st.session_state:
+        # Policy text cleared or speculation switched off: stop the old run instead of letting it finish
+        st.session_state.pop("speculative_run").cancel("policy text cleared or speculative checks turned off")
+
     if st.button("Run Compliance Check"):
         if policy_text:
             result = []
             with st.spinner("Running GPT-based compliance evaluation..."):
-                if section_id == "All Sections":
+                check_span = span("compliance_check", section=section_id, policy_chars=len(policy_text))
+                if lean_mode:
+                    section_ids = list(dpdpa_checklists) if section_id == "All Sections" else [section_id.split(" — ")[0]]
+                    try:
+                        section_results = evaluate_sections(
+                            section_ids, policy_text,
+                            cascade_policy=cascade_policy, reuse_verdicts=reuse_verdicts, local_threshold=local_threshold, lean=True
+                        )
+                    except CallCancelled as e:
+                        check_span.end()
+                        st.warning(f"Compliance check stopped: {e}")
+                        st.stop()
+                    # Kept across reruns so sections can be opened (and their details fetched) later
+                    st.session_state["lean_check"] = {
+                        "policy_key": text_key(policy_text),
+                        "results": [section_results[sid] for sid in section_ids],
+                        "model": cascade_policy["strong_model"] if cascade_policy else settings["check_model"]
+                    }
+                    for sid in section_ids:
+                        st.session_state.pop(f"lean_details_{sid}", None)
+                elif section_id == "All Sections":
                     all_results = []  # 🔁 collect each section's result
+                    try:
+                        section_results = evaluate_sections(
+                            list(dpdpa_checklists), policy_text,
+                            cascade_policy=cascade_policy, reuse_verdicts=reuse_verdicts, local_threshold=local_threshold
+                        )
+                    except CallCancelled as e:
+                        check_span.end()
+                        st.warning(f"Compliance check stopped: {e}")
+                        st.stop()
 
+                    render_span = span("render_results", sections=len(section_results))
                     for sid in dpdpa_checklists:
                         st.markdown(f"## ✅ Processing Section {sid} — {dpdpa_checklists[sid]['title']}")
-                        checklist = dpdpa_checklists[sid]["items"]
-                        result = analyze_policy_section(sid, checklist, policy_text)
+                        result = section_results[sid]
                         all_results.append(result)
             
                         with st.expander(f"Section {result['Section']} — {result['Title']}", expanded=True):
@@ -1070,7 +1363,7 @@ elif menu == "Policy Compliance Checker":
             
                                 st.markdown(f"""
                                 **{item['Checklist Item ID']} — {item['Checklist Text']}**  
-                                <span style="color:white;background-color:{badge_color};padding:3px 10px;border-radius:6px;font-size:13px;">{status}</span>  
+                                <span style="color:white;background-color:{badge_color};padding:3px 10px;border-radius:6px;font-size:13px;">{status}</span>{f" <small>♻️ inherited ({item['Inherited']})</small>" if item.get("Inherited") else ""}{f" <small>🖥️ local model ({item['Local Model']})</small>" if item.get("Local Model") else ""}  
                                 <br><small>📝 {item.get("Justification", "No justification")}</small>
                                 """, unsafe_allow_html=True)
             
@@ -1079,50 +1372,63 @@ elif menu == "Policy Compliance Checker":
             
                             st.markdown("### 🧾 Simplified Legal Meaning:")
                             st.success(result["Simplified Legal Meaning"])
+                    render_span.end()
             
+                    cascade_note = escalation_summary(all_results, cascade_policy) if cascade_policy else None
+                    if cascade_note:
+                        st.info(cascade_note)
+                    reuse_note = reuse_summary(all_results)
+                    if reuse_note:
+                        st.info(reuse_note)
+                    local_note = local_model_summary(all_results)
+                    if local_note:
+                        st.info(local_note)
+
                     # ✅ Combined Export Section
                     st.markdown("## 📥 Export Combined Results")
             
                     # --- JSON Export ---
-                    combined_json = json.dumps(all_results, indent=2)
-                    combined_json_bytes = io.BytesIO(combined_json.encode("utf-8"))
                     st.download_button(
                         label="📥 Download Combined JSON",
-                        data=combined_json_bytes,
+                        data=artifact_loader(all_results, "json"),
                         file_name="DPDPA_All_Sections_Combined.json",
-                        mime="application/json"
+                        mime=MIME_TYPES["json"],
+                        on_click="ignore"
                     )
             
-                    # --- CSV Export ---
-                    combined_rows = []
-                    for result in all_results:
-                        for item in result["Matched Details"]:
-                            combined_rows.append({
-                                "Section": result["Section"],
-                                "Checklist Item ID": item["Checklist Item ID"],
-                                "Checklist Text": item["Checklist Text"],
-                                "Status": item["Status"],
-                                "Justification": item["Justification"],
-                                "Match Level": result["Match Level"],
-                                "Score": result["Compliance Score"]
-                            })
-            
-                    combined_csv = pd.DataFrame(combined_rows)
-                    combined_csv_bytes = io.BytesIO()
-                    combined_csv.to_csv(combined_csv_bytes, index=False)
-                    combined_csv_bytes.seek(0)
-            
-                    st.download_button(
-                        label="📥 Download Combined CSV",
-                        data=combined_csv_bytes,
-                        file_name="DPDPA_All_Sections_Evaluation.csv",
-                        mime="text/csv"
-                    )
+                    # --- Tabular Exports (written row by row, built on click) ---
+                    for export_format in available_formats():
+                        export_info = EXPORT_FORMATS[export_format]
+                        st.download_button(
+                            label=f"📥 Download Combined {export_format}",
+                            data=lambda export_format=export_format: export_bytes(export_format, iter_evaluation_rows(all_results)),
+                            file_name=f"DPDPA_All_Sections_Evaluation.{export_info['extension']}",
+                            mime=export_info["mime"],
+                            on_click="ignore",
+                            key=f"combined_export_{export_info['extension']}"
+                        )
                 else:
                     section_num = section_id.split(" — ")[0] if " — " in section_id else section_id
-                    checklist = dpdpa_checklists[section_num]['items']
 
-                    result = analyze_policy_section(section_num, checklist, policy_text)
+                    try:
+                        result = evaluate_sections(
+                            [section_num], policy_text,
+                            cascade_policy=cascade_policy, reuse_verdicts=reuse_verdicts, local_threshold=local_threshold
+                        )[section_num]
+                    except CallCancelled as e:
+                        check_span.end()
+                        st.warning(f"Compliance check stopped: {e}")
+                        st.stop()
+                    render_span = span("render_results", sections=1)
+                    cascade_note = escalation_summary([result], cascade_policy) if cascade_policy else None
+                    if cascade_note:
+                        st.info(cascade_note)
+                    reuse_note = reuse_summary([result])
+                    if reuse_note:
+                        st.info(reuse_note)
+                    local_note = local_model_summary([result])
+                    if local_note:
+                        st.info(local_note)
                     st.markdown(f"""
                     <div style='font-size:20px; font-weight:700; margin-top:25px; margin-bottom:-10px;'>
                     📘 Section {result['Section']} — {result['Title']}
@@ -1173,7 +1479,7 @@ elif menu == "Policy Compliance Checker":
                         
                             st.markdown(f"""
                         **{item_id} — {item_text}**  
-                        <span style="color:white;background-color:{color};padding:3px 10px;border-radius:6px;font-size:13px;">{status}</span>  
+                        <span style="color:white;background-color:{color};padding:3px 10px;border-radius:6px;font-size:13px;">{status}</span>{f" <small>♻️ inherited ({item['Inherited']})</small>" if item.get("Inherited") else ""}{f" <small>🖥️ local model ({item['Local Model']})</small>" if item.get("Local Model") else ""}  
                         <br><small>📝 {justification}</small>
                         """, unsafe_allow_html=True)
                     
@@ -1184,17 +1490,17 @@ elif menu == "Policy Compliance Checker":
                         st.success(result["Simplified Legal Meaning"])
 
                         # --- JSON Export ---
-                        json_str = json.dumps(result, indent=2)
-                        json_bytes = io.BytesIO(json_str.encode("utf-8"))
                         st.download_button(
                             label="📥 Download JSON Report",
-                            data=json_bytes,
+                            data=artifact_loader(result, "json"),
                             file_name=f"DPDPA_Section_{result['Section']}.json",
-                            mime="application/json"
+                            mime=MIME_TYPES["json"],
+                            on_click="ignore"
                         )
                         
                         # --- CSV Export ---
-                        csv_df = pd.DataFrame(result["Matched Details"])
+                        # The per-item model tag is for the verdict store; the CSV keeps its columns
+                        csv_df = pd.DataFrame(result["Matched Details"]).drop(columns="Model", errors="ignore")
                         csv_bytes = io.BytesIO()
                         csv_df.to_csv(csv_bytes, index=False)
                         csv_bytes.seek(0)
@@ -1204,3 +1510,151 @@ elif menu == "Policy Compliance Checker":
                             file_name=f"DPDPA_Section_{result['Section']}.csv",
                             mime="text/csv"
                         )
+                    render_span.end()
+                check_span.end()
+
+    lean_check = st.session_state.get("lean_check")
+    if lean_mode and lean_check and lean_check["policy_key"] == text_key(policy_text):
+        render_span = span("render_results", sections=len(lean_check["results"]), lean=True)
+        render_lean_results(lean_check["results"], policy_text, lean_check["model"])
+        for note in (
+            escalation_summary(lean_check["results"], cascade_policy) if cascade_policy else None,
+            reuse_summary(lean_check["results"]),
+            local_model_summary(lean_check["results"])
+        ):
+            if note:
+                st.info(note)
+        render_span.end()
+
+
+# --- Admin Settings ---
+elif menu == "Admin Settings":
+    st.title("Admin Settings")
+    st.caption("Runtime settings are saved to disk and applied to every session on its next interaction, without restarting the app.")
+
+    admin_password = st.secrets.get("ADMIN_PASSWORD")
+    if admin_password and st.text_input("Admin password", type="password", key="admin_password") != admin_password:
+        st.info("Enter the admin password to change settings.")
+        st.stop()
+
+    with st.form("admin_settings_form"):
+        st.markdown("### 🤖 Models")
+        col1, col2 = st.columns(2)
+        with col1:
+            check_model = st.text_input("Compliance checker model", value=settings["check_model"])
+            cascade_fast_model = st.text_input("Cascade fast model", value=settings["cascade_fast_model"])
+            cascade_strong_model = st.text_input("Cascade strong model", value=settings["cascade_strong_model"])
+        with col2:
+            generator_model = st.text_input("Policy generator model", value=settings["generator_model"])
+            assistant_model = st.text_input("Knowledge assistant model", value=settings["assistant_model"])
+            generator_temperature = st.slider("Generator temperature", 0.0, 1.5, value=float(settings["generator_temperature"]), step=0.05)
+
+        st.markdown("### ⚙️ Concurrency & Timeouts")
+        col1, col2 = st.columns(2)
+        with col1:
+            llm_concurrency = st.number_input("Max concurrent LLM calls", min_value=1, max_value=256, value=int(settings["llm_concurrency"]))
+            batching_mode = st.selectbox(
+                "Batching mode (All Sections)", BATCHING_MODES, index=BATCHING_MODES.index(settings["batching_mode"]),
+                help="parallel: one request per section, all sent at once. sequential: one section at a time."
+            )
+        with col2:
+            request_timeout = st.number_input("Request timeout (s)", min_value=1.0, max_value=600.0, value=float(settings["request_timeout"]))
+            run_timeout = st.number_input("Run deadline (s)", min_value=5.0, max_value=3600.0, value=float(settings["run_timeout"]))
+
+        st.markdown("### 🔮 Speculative Pre-evaluation")
+        col1, col2 = st.columns(2)
+        with col1:
+            speculative_checks = st.checkbox(
+                "Pre-evaluate all sections as soon as a policy is loaded", value=settings["speculative_checks"],
+                help="Results are ready (or partly ready) when Run Compliance Check is clicked. Work is cancelled if the text or options change."
+            )
+        with col2:
+            speculative_budget = st.number_input(
+                "Speculative section evaluations per hour (all sessions)", min_value=1, max_value=10000, value=int(settings["speculative_budget"])
+            )
+
+        st.markdown("### 🗄️ Caches")
+        cache_inputs = {}
+        for cache_name, label in [("retrieval", "Knowledge retrieval"), ("synthesis", "Knowledge answers"), ("artifact", "Export artifacts"), ("details", "Lean-mode details")]:
+            col1, col2 = st.columns(2)
+            with col1:
+                cache_inputs[f"{cache_name}_cache_size"] = st.number_input(f"{label} cache size (entries)", min_value=1, max_value=100000, value=int(settings[f"{cache_name}_cache_size"]))
+            with col2:
+                cache_inputs[f"{cache_name}_cache_ttl"] = st.number_input(f"{label} cache TTL (s)", min_value=1, max_value=30 * 24 * 3600, value=int(settings[f"{cache_name}_cache_ttl"]))
+        text_memory_mb = st.number_input(
+            "Shared text store memory (MB); colder policy texts and drafts spill to disk beyond this",
+            min_value=1, max_value=65536, value=int(settings["text_memory_mb"])
+        )
+
+        st.markdown("### 🔍 Diagnostics")
+        tracing_on = st.checkbox("Record phase tracing spans", value=settings["tracing"])
+
+        if st.form_submit_button("💾 Save & Apply"):
+            settings = save_settings({
+                "check_model": check_model,
+                "cascade_fast_model": cascade_fast_model,
+                "cascade_strong_model": cascade_strong_model,
+                "generator_model": generator_model,
+                "assistant_model": assistant_model,
+                "generator_temperature": generator_temperature,
+                "llm_concurrency": llm_concurrency,
+                "batching_mode": batching_mode,
+                "request_timeout": request_timeout,
+                "run_timeout": run_timeout,
+                "speculative_checks": speculative_checks,
+                "speculative_budget": speculative_budget,
+                "text_memory_mb": text_memory_mb,
+                "tracing": tracing_on,
+                **cache_inputs
+            })
+            st.success("✅ Settings saved and applied.")
+
+    if st.button("↩️ Reset to Defaults"):
+        settings = reset_settings()
+        st.success("Settings reset to defaults.")
+
+    changed = {key: value for key, value in settings.items() if value != DEFAULT_SETTINGS[key]}
+    if changed:
+        st.caption("Changed from defaults: " + ", ".join(f"{key} = {value}" for key, value in changed.items()))
+
+    # --- Live Counters ---
+    st.markdown("---")
+    st.markdown("### 📈 Live Counters")
+    if st.button("🔄 Refresh Counters"):
+        st.rerun()
+
+    st.markdown("#### LLM Calls & Connections")
+    st.dataframe(pd.DataFrame([pool_stats()]), hide_index=True)
+
+    st.markdown("#### LLM Scheduling Lanes")
+    st.caption("Wait = time a call queued for a worker thread and a concurrency slot. Interactive: single-section checks, generators, assistant. Background: All Sections, speculative runs, check service.")
+    st.dataframe(pd.DataFrame(lane_stats()), hide_index=True)
+
+    st.markdown("#### Caches")
+    st.dataframe(pd.DataFrame([
+        {"Cache": "Knowledge retrieval", **retrieval_cache.stats()},
+        {"Cache": "Knowledge answers", **synthesis_cache.stats()},
+        {"Cache": "Export artifacts", **artifact_cache.stats()},
+        {"Cache": "Lean-mode details", **details_cache.stats()}
+    ]), hide_index=True)
+
+    st.markdown("#### Drafts")
+    st.dataframe(pd.DataFrame([get_draft_store().stats()]), hide_index=True)
+
+    st.markdown("#### Speculative Pre-evaluation")
+    st.dataframe(pd.DataFrame([speculation_stats()]), hide_index=True)
+
+    st.markdown("#### Session Memory")
+    st.caption("Large texts held by open sessions. Attributed = each session's share of texts it references together with other sessions.")
+    st.dataframe(pd.DataFrame([get_text_store().stats()]), hide_index=True)
+    session_rows = session_usage()
+    if session_rows:
+        st.dataframe(pd.DataFrame(session_rows[:50]), hide_index=True)
+
+    if tracing_enabled():
+        st.markdown("#### Phase Latency")
+        phase_rows = phase_summary()
+        if phase_rows:
+            st.dataframe(pd.DataFrame(phase_rows), hide_index=True)
+        else:
+            st.caption("No spans recorded yet.")
@@ -0,0 +1,483 @@
+import argparse
+import io
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import wait as wait_futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from compliance_checklists import dpdpa_checklists
+from compliance_engine import analyze_policy_section, default_cascade_policy, extract_text_from_pdf
+from exporters import EXPORT_FORMATS, available_formats, iter_evaluation_rows, stream_export
+from llm_client import get_client, lane_stats, pool_stats, set_call_context
+from run_control import CallCancelled, RunToken, submit
+from runtime_settings import get_settings
+from tracing import enabled as tracing_enabled, phase_summary, span
+
+# --- Compliance Check Service ---
+# HTTP front end to the compliance engine for programmatic checks (e.g. from a document
+# management system). Submitting a document only queues it and returns a job id; a fixed
+# number of job workers drain the queue, so a burst of submissions never runs more than
+# SERVICE_WORKERS documents at once, and a full queue is answered with 429 instead of piling
+# up. Results can be polled, streamed section by section (server-sent events) or exported.
+# Runs as its own process next to the Streamlit app and shares its data directory, verdict
+# store and Admin Settings (models, timeouts, batching mode).
+#
+#   python check_service.py --port 8600
+#
+#   POST   /v1/checks                  JSON {"text", "sections", "cascade", "reuse_verdicts", "local_threshold", "lean"}
+#                                      or a raw PDF (Content-Type: application/pdf, options in the query)
+#   GET    /v1/checks/<id>             status and the sections finished so far
+#   GET    /v1/checks/<id>/events      server-sent events, one per finished section, then "done"
+#   GET    /v1/checks/<id>/export      ?format=json|csv|jsonl|xlsx|parquet
+#   DELETE /v1/checks/<id>             cancel a queued or running check
+#   GET    /healthz, /metrics
+#
+# An optional X-Tenant header identifies the calling system for fair LLM scheduling.
+SERVICE_HOST = os.environ.get("DPDPA_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("DPDPA_SERVICE_PORT", 8600))
+SERVICE_WORKERS = int(os.environ.get("DPDPA_SERVICE_WORKERS", 2))
+QUEUE_SIZE = int(os.environ.get("DPDPA_SERVICE_QUEUE", 100))
+SERVICE_TOKEN = os.environ.get("DPDPA_SERVICE_TOKEN")
+MAX_BODY_BYTES = 20 * 1024 * 1024
+JOB_RETENTION = 3600
+EVENT_KEEPALIVE = 15
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+EXPORT_EXTENSIONS = {EXPORT_FORMATS[fmt]["extension"]: fmt for fmt in EXPORT_FORMATS}
+
+
+class CheckJob:
+    def __init__(self, policy_text, section_ids, options, tenant="service"):
+        self.id = uuid.uuid4().hex
+        self.tenant = tenant
+        self.policy_text = policy_text
+        self.section_ids = section_ids
+        self.options = options
+        self.status = "queued"
+        self.error = None
+        self.results = {}
+        self.completed = []
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Cancelled by DELETE; the run's deadline token follows it
+        self.token = RunToken()
+        self.changed = threading.Condition()
+
+    def add_result(self, section_id, result):
+        with self.changed:
+            self.results[section_id] = result
+            self.completed.append(section_id)
+            self.changed.notify_all()
+
+    def start(self):
+        with self.changed:
+            if self.status != "queued":
+                return False
+            self.status = "running"
+            self.started_at = time.time()
+            self.changed.notify_all()
+        return True
+
+    def finish(self, status, error=None, only_if=None):
+        # False if the job already finished (or is not in the only_if state)
+        with self.changed:
+            if self.status in FINISHED_STATUSES or (only_if and self.status != only_if):
+                return False
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self.changed.notify_all()
+        return True
+
+    def ordered_results(self):
+        return [self.results[sid] for sid in self.section_ids if sid in self.results]
+
+    def describe(self, include_results=True):
+        with self.changed:
+            description = {
+                "id": self.id,
+                "status": self.status,
+                "sections": self.section_ids,
+                "completed_sections": len(self.completed),
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+            if self.error:
+                description["error"] = self.error
+            if include_results:
+                description["results"] = self.ordered_results()
+        return description
+
+
+class CheckService:
+    def __init__(self, client, workers=SERVICE_WORKERS, queue_size=QUEUE_SIZE):
+        self.client = client
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "cancelled": 0, "started": time.time()}
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"check-job-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, policy_text, section_ids, options, tenant="service"):
+        # Returns the queued job, or None when the queue is full
+        self._expire()
+        job = CheckJob(policy_text, section_ids, options, tenant)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return None
+        with self._lock:
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.token.cancel("cancelled by client")
+        # Still in the queue: the worker skips it when it comes up
+        self._finished(job, "cancelled", "cancelled by client", only_if="queued")
+        return job
+
+    def _expire(self):
+        cutoff = time.time() - JOB_RETENTION
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def _finished(self, job, status, error=None, only_if=None):
+        if job.finish(status, error, only_if):
+            with self._lock:
+                self._stats[status] += 1
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job.start():
+                    self._run(job)
+            except CallCancelled as e:
+                self._finished(job, "cancelled", str(e))
+            except Exception as e:
+                self._finished(job, "failed", str(e))
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        # Picks up Admin Settings changes (models, timeouts, batching) for every job. Service
+        # checks are bulk work: background lane, one scheduling tenant per client
+        settings = get_settings()
+        set_call_context(job.tenant, "background")
+        options = dict(job.options)
+        if options.pop("cascade", False):
+            options["cascade_policy"] = default_cascade_policy(settings)
+        token = RunToken(settings["run_timeout"])
+        job.token.on_cancel(lambda: token.cancel(job.token.reason))
+
+        def start(sid):
+            def collect(future):
+                if future.exception() is None:
+                    job.add_result(sid, future.result())
+
+            future = submit(
+                analyze_policy_section, self.client, sid, dpdpa_checklists[sid]["items"], job.policy_text,
+                model=settings["check_model"], token=token, **options
+            )
+            future.add_done_callback(collect)
+            return future
+
+        with span("service.check", sections=len(job.section_ids), job=job.id):
+            try:
+                if settings["batching_mode"] == "sequential":
+                    for sid in job.section_ids:
+                        start(sid).result()
+                else:
+                    futures = [start(sid) for sid in job.section_ids]
+                    wait_futures(futures)
+                    for future in futures:
+                        future.result()
+            finally:
+                token.finish()
+        self._finished(job, "done")
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            jobs = list(self._jobs.values())
+        by_status = {}
+        for job in jobs:
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        metrics = {
+            "service": {
+                "Workers": self.workers,
+                "Live Workers": sum(thread.is_alive() for thread in self._threads),
+                "Queue Depth": self._queue.qsize(),
+                "Queue Capacity": self._queue.maxsize,
+                "Jobs Submitted": stats["submitted"],
+                "Jobs Rejected": stats["rejected"],
+                "Jobs Done": stats["done"],
+                "Jobs Failed": stats["failed"],
+                "Jobs Cancelled": stats["cancelled"],
+                "Uptime (s)": round(time.time() - stats["started"])
+            },
+            "jobs": by_status,
+            "llm": pool_stats(),
+            "lanes": lane_stats()
+        }
+        if tracing_enabled():
+            metrics["phases"] = phase_summary()
+        return metrics
+
+
+def parse_options(values):
+    # values: decoded JSON body, or query parameters for PDF uploads
+    if not isinstance(values, dict):
+        raise ValueError("The request body must be a JSON object")
+    sections = values.get("sections")
+    if sections is not None and (not isinstance(sections, list) or not all(isinstance(sid, str) for sid in sections)):
+        raise ValueError("sections must be a list of section ids, e.g. [\"4\", \"5\"]")
+    unknown = [sid for sid in sections or [] if sid not in dpdpa_checklists]
+    if unknown:
+        raise ValueError(f"Unknown DPDPA section(s): {', '.join(unknown)}")
+    section_ids = list(sections or dpdpa_checklists.keys())
+    options = {}
+    for name in ("cascade", "reuse_verdicts", "lean"):
+        value = values.get(name, False)
+        if not isinstance(value, bool):
+            raise ValueError(f"{name} must be true or false")
+        options[name] = value
+    threshold = values.get("local_threshold")
+    if threshold is not None:
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float, str)):
+            raise ValueError("local_threshold must be a number")
+        options["local_threshold"] = float(threshold)
+    return section_ids, options
+
+
+def _query_flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+class CheckServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    def log_message(self, *args):
+        pass
+
+    # --- Responses ---
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _start_chunked(self, content_type, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        if data:
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    # --- Routing ---
+    def _authorized(self):
+        if not SERVICE_TOKEN or urlparse(self.path).path == "/healthz":
+            return True
+        if self.headers.get("Authorization") == f"Bearer {SERVICE_TOKEN}":
+            return True
+        self._error(401, "Missing or invalid bearer token")
+        return False
+
+    def _route(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        return url, parts
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url, parts = self._route()
+        if parts == ["healthz"]:
+            metrics = self.service.metrics()["service"]
+            healthy = metrics["Live Workers"] == metrics["Workers"]
+            return self._send_json(200 if healthy else 503, {"status": "ok" if healthy else "degraded", "queue_depth": metrics["Queue Depth"]})
+        if parts == ["metrics"]:
+            return self._send_json(200, self.service.metrics())
+        if len(parts) in (3, 4) and parts[:2] == ["v1", "checks"]:
+            job = self.service.get(parts[2])
+            if job is None:
+                return self._error(404, "Unknown check id")
+            if len(parts) == 3:
+                return self._send_json(200, job.describe())
+            if parts[3] == "events":
+                return self._stream_events(job)
+            if parts[3] == "export":
+                return self._export(job, parse_qs(url.query).get("format", ["json"])[0])
+        self._error(404, "Not found")
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        url, parts = self._route()
+        if parts != ["v1", "checks"]:
+            return self._error(404, "Not found")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self._error(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            return self._error(413, f"Document larger than {MAX_BODY_BYTES // (1024 * 1024)} MB")
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/pdf"):
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                section_ids, options = parse_options({
+                    "sections": [sid for sid in query.get("sections", "").split(",") if sid],
+                    "cascade": _query_flag(query.get("cascade", "")),
+                    "reuse_verdicts": _query_flag(query.get("reuse_verdicts", "")),
+                    "lean": _query_flag(query.get("lean", "")),
+                    "local_threshold": query.get("local_threshold")
+                })
+                policy_text = extract_text_from_pdf(io.BytesIO(body))
+            else:
+                values = json.loads(body or b"{}")
+                section_ids, options = parse_options(values)
+                policy_text = values.get("text") or ""
+                if not isinstance(policy_text, str):
+                    raise ValueError("text must be a string")
+        except (ValueError, TypeError) as e:
+            return self._error(400, str(e))
+        except Exception as e:
+            return self._error(400, f"Could not read the document: {e}")
+        if not policy_text.strip():
+            return self._error(400, "The document has no text")
+
+        tenant = self.headers.get("X-Tenant") or "service"
+        job = self.service.submit(policy_text, section_ids, options, f"service:{tenant}")
+        if job is None:
+            return self._error(429, "Check queue is full, retry later", {"Retry-After": "30"})
+        base = f"/v1/checks/{job.id}"
+        self._send_json(202, {
+            "id": job.id,
+            "status": job.status,
+            "links": {"self": base, "events": f"{base}/events", "export": f"{base}/export"}
+        }, {"Location": base})
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        _, parts = self._route()
+        if len(parts) != 3 or parts[:2] != ["v1", "checks"]:
+            return self._error(404, "Not found")
+        job = self.service.cancel(parts[2])
+        if job is None:
+            return self._error(404, "Unknown check id")
+        self._send_json(200, job.describe(include_results=False))
+
+    # --- Streaming ---
+    def _stream_events(self, job):
+        # One "section" event per finished section (including those already done), then "done".
+        # Disconnecting only stops the stream; the check itself keeps running.
+        self._start_chunked("text/event-stream", {"Cache-Control": "no-cache"})
+        sent = 0
+        try:
+            while True:
+                with job.changed:
+                    if sent == len(job.completed) and job.status not in FINISHED_STATUSES:
+                        job.changed.wait(EVENT_KEEPALIVE)
+                    new = [job.results[sid] for sid in job.completed[sent:]]
+                    finished = job.status in FINISHED_STATUSES and sent + len(new) == len(job.completed)
+                sent += len(new)
+                for result in new:
+                    self._write_chunk(f"event: section\ndata: {json.dumps(result, default=str)}\n\n".encode("utf-8"))
+                if finished:
+                    self._write_chunk(f"event: done\ndata: {json.dumps(job.describe(include_results=False), default=str)}\n\n".encode("utf-8"))
+                    break
+                if not new:
+                    self._write_chunk(b": keep-alive\n\n")
+            self._end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _export(self, job, extension):
+        if job.status != "done":
+            return self._error(409, f"Check is {job.status}; exports are available once it is done")
+        if extension == "json":
+            return self._send_json(200, job.ordered_results())
+        fmt = EXPORT_EXTENSIONS.get(extension)
+        if fmt is None or fmt not in available_formats():
+            return self._error(400, f"Unsupported export format: {extension}")
+        self._start_chunked(EXPORT_FORMATS[fmt]["mime"], {
+            "Content-Disposition": f'attachment; filename="dpdpa-check-{job.id}.{extension}"'
+        })
+        try:
+            for chunk in stream_export(fmt, iter_evaluation_rows(job.ordered_results())):
+                self._write_chunk(chunk)
+            self._end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+def start_check_service(client, host=SERVICE_HOST, port=SERVICE_PORT, workers=SERVICE_WORKERS, queue_size=QUEUE_SIZE):
+    handler = type("Handler", (CheckServiceHandler,), {"service": CheckService(client, workers, queue_size)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP service for programmatic DPDPA compliance checks.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="documents checked at once")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    args = parser.parse_args()
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        parser.error("OPENAI_API_KEY must be set")
+    server = start_check_service(get_client(api_key), args.host, args.port, args.workers, args.queue_size)
+    print(f"Compliance check service listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,212 @@
+import json
+import os
+import re
+import threading
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from ttl_cache import TTLCache
+from verdict_store import DATA_DIR, document_hash
+
+# --- Near-duplicate Clause Fingerprints ---
+# MinHash signatures per paragraph, bucketed with LSH banding, across every policy checked so far.
+# A verdict is attached to the paragraph its justification points at; when a new policy has a
+# near-identical paragraph, the stored verdict is inherited instead of asking GPT again.
+# If nearly every paragraph of the new policy matches one earlier policy, all of that policy's
+# verdicts (including "Missing") are inherited.
+FINGERPRINTS_PATH = os.path.join(DATA_DIR, "fingerprints.jsonl")
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+MIN_PARAGRAPH_WORDS = 12
+PARAGRAPH_SIMILARITY = 0.85
+DOCUMENT_COVERAGE = 0.9
+MERSENNE_PRIME = (1 << 61) - 1
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+_rng = np.random.RandomState(20230811)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def split_paragraphs(text):
+    blocks = [block.strip() for block in re.split(r"\n\s*\n", text)]
+    # Text pasted from PDFs often has no blank lines; fall back to single lines
+    if len(blocks) <= 1:
+        blocks = [line.strip() for line in text.split("\n")]
+    return [block for block in blocks if len(block.split()) >= MIN_PARAGRAPH_WORDS]
+
+
+def minhash(paragraph):
+    words = WORD_PATTERN.findall(paragraph.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature):
+    return [(band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()) for band in range(BANDS)]
+
+
+def best_supporting_paragraph(justification, paragraphs):
+    # Justifications usually quote or paraphrase the clause; pick the paragraph sharing most words
+    words = set(WORD_PATTERN.findall(justification.lower()))
+    if not words or not paragraphs:
+        return None
+    overlaps = [len(words & set(WORD_PATTERN.findall(p.lower()))) for p in paragraphs]
+    best = max(range(len(paragraphs)), key=overlaps.__getitem__)
+    return best if overlaps[best] >= 3 else None
+
+
+class FingerprintIndex:
+    def __init__(self, path=FINGERPRINTS_PATH):
+        self.path = path
+        self.signatures = {}
+        self.doc_paragraph_counts = {}
+        self.buckets = defaultdict(set)
+        self.paragraph_verdicts = defaultdict(dict)
+        self.document_sections = {}
+        self._signature_cache = TTLCache(max_size=32, ttl=3600)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    continue
+
+    def _apply(self, record):
+        doc_hash = record["doc_hash"]
+        if record.get("signatures") is not None and doc_hash not in self.doc_paragraph_counts:
+            self.doc_paragraph_counts[doc_hash] = len(record["signatures"])
+            for idx, hex_signature in enumerate(record["signatures"]):
+                signature = np.frombuffer(bytes.fromhex(hex_signature), dtype=np.uint32)
+                self.signatures[(doc_hash, idx)] = signature
+                for key in band_keys(signature):
+                    self.buckets[key].add((doc_hash, idx))
+        if record.get("section") is not None:
+            self.document_sections[(doc_hash, record["section"])] = record
+            for verdict in record["verdicts"]:
+                if verdict.get("paragraph") is not None:
+                    self.paragraph_verdicts[(doc_hash, verdict["paragraph"])][verdict["item_id"]] = verdict
+
+    def _append(self, record):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self._apply(record)
+
+    def fingerprint(self, policy_text):
+        doc_hash = document_hash(policy_text)
+        cached = self._signature_cache.get(doc_hash)
+        if cached is None:
+            paragraphs = split_paragraphs(policy_text)
+            cached = (paragraphs, [minhash(p) for p in paragraphs])
+            self._signature_cache.set(doc_hash, cached)
+        return doc_hash, cached[0], cached[1]
+
+    def _matches(self, signature):
+        candidates = set()
+        for key in band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        matches = []
+        for candidate in candidates:
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= PARAGRAPH_SIMILARITY:
+                matches.append((similarity, candidate))
+        return sorted(matches, reverse=True)
+
+    def find_inherited(self, section_id, checklist, policy_text):
+        # Returns ({item_id: evaluation}, source section record or None)
+        _, paragraphs, signatures = self.fingerprint(policy_text)
+        with self._lock:
+            per_paragraph = [self._matches(signature) for signature in signatures]
+
+            # Whole-document near-duplicate: inherit every verdict, "Missing" included
+            doc_votes = Counter()
+            for matches in per_paragraph:
+                for source_doc in {candidate[0] for _, candidate in matches}:
+                    doc_votes[source_doc] += 1
+            for source_doc, matched in doc_votes.most_common():
+                source_count = self.doc_paragraph_counts.get(source_doc, 0)
+                record = self.document_sections.get((source_doc, section_id))
+                if (record and paragraphs and matched / len(paragraphs) >= DOCUMENT_COVERAGE
+                        and source_count and matched / source_count >= DOCUMENT_COVERAGE):
+                    wanted = {item["id"] for item in checklist}
+                    return {
+                        v["item_id"]: self._inherited(v, source_doc, "document")
+                        for v in record["verdicts"] if v["item_id"] in wanted
+                    }, record
+
+            # Otherwise only positive verdicts tied to a near-identical paragraph carry over
+            inherited = {}
+            source_records = Counter()
+            wanted = {item["id"] for item in checklist}
+            for matches in per_paragraph:
+                for _, candidate in matches:
+                    for item_id, verdict in self.paragraph_verdicts.get(candidate, {}).items():
+                        if item_id in wanted and item_id not in inherited:
+                            inherited[item_id] = self._inherited(verdict, candidate[0], "paragraph")
+                            source_records[candidate[0]] += 1
+            source = None
+            if source_records:
+                source = self.document_sections.get((source_records.most_common(1)[0][0], section_id))
+            return inherited, source
+
+    @staticmethod
+    def _inherited(verdict, source_doc, level):
+        return {
+            "Checklist Item ID": verdict["item_id"],
+            "Status": verdict["status"],
+            "Justification": verdict["justification"],
+            "Inherited": f"{level} match with {source_doc[:10]}"
+        }
+
+    def record(self, section_result, policy_text):
+        if section_result.get("Match Level") == "Error":
+            return
+        doc_hash, paragraphs, signatures = self.fingerprint(policy_text)
+        section_id = section_result["Section"]
+        with self._lock:
+            if (doc_hash, section_id) in self.document_sections:
+                return
+            verdicts = []
+            for item in section_result["Matched Details"]:
+                paragraph = None
+                if item["Status"] in ("Explicitly Mentioned", "Partially Mentioned"):
+                    paragraph = best_supporting_paragraph(item["Justification"], paragraphs)
+                verdicts.append({
+                    "item_id": item["Checklist Item ID"],
+                    "status": item["Status"],
+                    "justification": item["Justification"],
+                    "paragraph": paragraph
+                })
+            self._append({
+                "doc_hash": doc_hash,
+                "section": section_id,
+                "signatures": None if doc_hash in self.doc_paragraph_counts else [s.tobytes().hex() for s in signatures],
+                "verdicts": verdicts,
+                "rewrite": section_result.get("Suggested Rewrite", ""),
+                "meaning": section_result.get("Simplified Legal Meaning", "")
+            })
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_fingerprint_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex()
+        return _index
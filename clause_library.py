@@ -0,0 +1,176 @@
+import hashlib
+import json
+import re
+
+import jinja2
+from jinja2 import meta
+
+# --- Clause Library ---
+# Standard DPDPA policy sections, rendered locally from the Full Policy Generator form.
+# Only sector-specific wording is left to GPT; everything here is deterministic.
+policy_clauses = [
+    {
+        "id": "purpose",
+        "title": "Purpose",
+        "template": """This {{ policy_type }} describes how {{ org_name }} ("we", "us", "our") collects, uses, stores, shares and protects personal data in accordance with the Digital Personal Data Protection Act, 2023 ("DPDPA") and the rules made under it. We process personal data only as per the provisions of the DPDPA and only for a lawful purpose, being any purpose that is not expressly forbidden by law."""
+    },
+    {
+        "id": "scope",
+        "title": "Scope",
+        "template": """This policy applies to all personal data of Data Principals processed by {{ org_name }}, a {{ sector }} organisation, in digital form or in non-digital form that is subsequently digitised, including personal data processed on our behalf by our Data Processors. It applies to all employees, contractors and Data Processors who handle such personal data."""
+    },
+    {
+        "id": "data_types",
+        "title": "Data Types",
+        "template": """We collect and process only such personal data as is necessary for the specified purpose. The categories of personal data we collect are:
+{% for data_type in data_types %}
+- {{ data_type }}
+{% endfor %}
+We do not collect categories of personal data beyond those listed above without first providing a fresh notice to the Data Principal."""
+    },
+    {
+        "id": "lawful_use",
+        "title": "Lawful Use",
+        "template": """We process personal data for the following lawful purpose: {{ lawful_purpose }}. Personal data is processed only with the consent of the Data Principal{% if legitimate_uses %} or for the certain legitimate uses set out in this policy{% endif %}. Where personal data is used to make a decision that affects the Data Principal or is disclosed to another Data Fiduciary, we take reasonable steps to ensure that it is complete, accurate and consistent."""
+    },
+    {
+        "id": "consent",
+        "title": "Consent",
+        "template": """{% if consent_type == "Explicit Consent" %}We obtain consent through a clear affirmative action of the Data Principal, such as an opt-in, before processing their personal data. {% elif consent_type == "Deemed Consent" %}Where the Data Principal voluntarily provides personal data for a specified purpose and has not indicated that they do not consent to its use, we process that personal data for that purpose. {% else %}Personal data is processed on the basis of notice only in the limited cases permitted under the DPDPA. {% endif %}Every request for consent is accompanied or preceded by a notice setting out the personal data to be processed, the purpose of processing, the manner in which the Data Principal may withdraw consent or seek grievance redressal, and the manner in which a complaint may be made to the Data Protection Board of India. The notice and request for consent are presented in clear and plain language and can be accessed in English or any language listed in the Eighth Schedule to the Constitution of India.
+
+Consent is free, specific, informed, unconditional and unambiguous, and is limited to such personal data as is necessary for the specified purpose. Any part of a consent that infringes the DPDPA, the rules made under it or any other law in force is invalid to that extent. The Data Principal may withdraw consent at any time, with the same ease with which it was given, including through a registered Consent Manager. Withdrawal does not affect the legality of processing carried out before withdrawal, and the consequences of withdrawal are borne by the Data Principal. On withdrawal, we and our Data Processors cease processing the personal data within a reasonable time unless processing is required or authorised by law."""
+    },
+    {
+        "id": "legitimate_uses",
+        "title": "Certain Legitimate Uses",
+        "when": "legitimate_uses",
+        "template": """In addition to consent, we may process personal data without consent for the following legitimate uses permitted under Section 7 of the DPDPA:
+{% for use in legitimate_uses %}
+- {{ use }}{% if use == "Employment Purposes" %}: for purposes of employment or to safeguard us from loss or liability, including prevention of corporate espionage and maintenance of confidentiality of trade secrets and intellectual property{% elif use == "Medical Emergency" %}: to respond to a medical emergency involving a threat to the life or an immediate threat to the health of the Data Principal or any other individual{% elif use == "Government Function" %}: to fulfil a legal obligation to disclose information to the State or any of its instrumentalities, or to comply with any judgment, decree or order under the law{% elif use == "Disaster Response" %}: to ensure the safety of, or provide assistance or services to, any individual during a disaster or any breakdown of public order{% elif use == "Public Interest" %}: to provide medical treatment or health services during an epidemic, outbreak or other threat to public health{% endif %}
+{% endfor %}"""
+    },
+    {
+        "id": "children",
+        "title": "Children's Data",
+        "when": "children",
+        "template": """Our services may be used by children under the age of eighteen. Before processing any personal data of a child, we obtain verifiable consent of the parent or lawful guardian. We do not undertake processing that is likely to cause any detrimental effect on the well-being of a child, and we do not undertake tracking, behavioural monitoring or targeted advertising directed at children."""
+    },
+    {
+        "id": "security",
+        "title": "Security",
+        "template": """We implement appropriate technical and organisational measures to ensure effective compliance with the DPDPA and protect personal data in our possession or under our control, including personal data processed by our Data Processors, by taking reasonable security safeguards to prevent personal data breach. We engage Data Processors only under a valid contract. In the event of a personal data breach, we will inform the Data Protection Board of India and each affected Data Principal in the prescribed form and manner."""
+    },
+    {
+        "id": "retention",
+        "title": "Retention",
+        "template": """We retain personal data for {{ retention_period }}, or for such shorter period as is necessary for the specified purpose. Personal data is erased on withdrawal of consent or as soon as it is reasonable to assume that the specified purpose is no longer being served, whichever is earlier, unless retention is required by law, and we cause our Data Processors to erase it as well. The specified purpose is deemed to be no longer served if the Data Principal has neither approached us for the performance of the specified purpose nor exercised any of their rights within the prescribed period."""
+    },
+    {
+        "id": "cross_border",
+        "title": "Cross-Border Transfers",
+        "template": """{% if cross_border == "Yes" %}Personal data may be transferred to and processed in countries or territories outside India, except any country or territory restricted by the Central Government by notification. Such transfers are made only under contracts that require the recipient to protect personal data in line with this policy and the DPDPA.{% else %}Personal data is stored and processed within India and is not transferred outside India.{% endif %}"""
+    },
+    {
+        "id": "rights",
+        "title": "Rights of Data Principals",
+        "template": """Data Principals have the right to obtain a summary of their personal data and the processing activities undertaken, to correct, complete, update and erase their personal data, to withdraw consent, to nominate another individual to exercise their rights in the event of death or incapacity, and to have readily available means of grievance redressal. Data Principals can exercise these rights by contacting us at {{ grievance_email }}."""
+    },
+    {
+        "id": "grievance",
+        "title": "Grievance Redressal",
+        "template": """We provide an effective mechanism to redress the grievances of Data Principals. Grievances may be raised with our Grievance Officer at {{ grievance_email }} and will be responded to within the period prescribed under the DPDPA. A Data Principal must exhaust this grievance redressal mechanism before approaching the Data Protection Board of India, with which a complaint may then be filed in the manner prescribed by the Board."""
+    },
+    {
+        "id": "contact",
+        "title": "Contact",
+        "template": """For any questions about the processing of your personal data or this policy, please contact {{ org_name }} at {{ grievance_email }}."""
+    }
+]
+
+_env = jinja2.Environment(undefined=jinja2.StrictUndefined, trim_blocks=True, keep_trailing_newline=False)
+_compiled = {clause["id"]: _env.from_string(clause["template"]) for clause in policy_clauses}
+
+
+def build_clause_context(policy_type, org_name, sector, data_types_final, children_data, lawful_purpose,
+                         consent_type, legitimate_use, retention_period, cross_border, grievance_email):
+    return {
+        "policy_type": policy_type.lower(),
+        "org_name": org_name.strip(),
+        "sector": sector.strip(),
+        "data_types": data_types_final,
+        "children": children_data == "Yes",
+        "lawful_purpose": lawful_purpose.strip().rstrip("."),
+        "consent_type": consent_type,
+        "legitimate_uses": [use for use in legitimate_use if use != "None of the Above"],
+        "retention_period": retention_period.strip().rstrip("."),
+        "cross_border": cross_border,
+        "grievance_email": grievance_email.strip()
+    }
+
+
+def _clause_inputs(clause):
+    # The form fields a clause depends on are exactly the variables its template reads
+    names = set(meta.find_undeclared_variables(_env.parse(clause["template"])))
+    if clause.get("when"):
+        names.add(clause["when"])
+    return sorted(names)
+
+
+clause_inputs = {clause["id"]: _clause_inputs(clause) for clause in policy_clauses}
+
+
+def section_fingerprint(values):
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def build_sections(context, extra_sections=None, previous=None):
+    # Returns (sections, regenerated ids). A section whose inputs are unchanged since `previous`
+    # is carried over as-is, including any edits the user made to its text.
+    # extra_sections: [{"id", "title", "text", "fingerprint"}] inserted before Contact
+    previous_by_id = {section["id"]: section for section in previous or []}
+    sections = []
+    regenerated = []
+    for clause in policy_clauses:
+        if clause.get("when") and not context[clause["when"]]:
+            continue
+        if clause["id"] == "contact":
+            for extra in extra_sections or []:
+                sections.append(extra)
+                if previous_by_id.get(extra["id"], {}).get("fingerprint") != extra["fingerprint"]:
+                    regenerated.append(extra["id"])
+        fingerprint = section_fingerprint({name: context[name] for name in clause_inputs[clause["id"]]})
+        old = previous_by_id.get(clause["id"])
+        if old is not None and old["fingerprint"] == fingerprint:
+            sections.append(old)
+            continue
+        sections.append({
+            "id": clause["id"],
+            "title": clause["title"],
+            "text": _compiled[clause["id"]].render(context).strip(),
+            "fingerprint": fingerprint
+        })
+        regenerated.append(clause["id"])
+    return sections, regenerated
+
+
+def assemble_sections(sections):
+    return "\n\n".join(f"{i}. {section['title']}\n{section['text']}" for i, section in enumerate(sections, start=1))
+
+
+def split_sections(policy_text, sections):
+    # Maps an edited policy back onto its sections by their numbered headings; None if a heading
+    # was removed or renamed, since the edits can then no longer be attributed to one section
+    positions = []
+    search_from = 0
+    for i, section in enumerate(sections, start=1):
+        heading = re.compile(rf"^{i}\.\s*{re.escape(section['title'])}\s*$", re.MULTILINE)
+        match = heading.search(policy_text, search_from)
+        if match is None:
+            return None
+        positions.append((match.start(), match.end()))
+        search_from = match.end()
+    texts = {}
+    for i, section in enumerate(sections):
+        end = positions[i + 1][0] if i + 1 < len(positions) else len(policy_text)
+        texts[section["id"]] = policy_text[positions[i][1]:end].strip()
+    return texts
@@ -0,0 +1,364 @@
+import json
+
+import fitz
+
+from clause_fingerprints import get_fingerprint_index
+from compliance_checklists import dpdpa_checklists
+from distilled_classifier import get_distilled_classifier
+from llm_client import complete, request_key
+from run_control import CallCancelled
+from tracing import span, traced
+from ttl_cache import TTLCache
+from verdict_store import document_hash, record_verdicts
+
+# --- Compliance Engine ---
+# Checklist evaluation shared by the Streamlit checker and the HTTP check service: prompt
+# building, the GPT call, the fast/strong cascade, verdict reuse, the local classifier and
+# scoring. Nothing here touches Streamlit; callers pass in the OpenAI client and RunToken.
+STATUS_CODES = {"E": "Explicitly Mentioned", "P": "Partially Mentioned", "M": "Missing"}
+
+# Lean-mode justifications/rewrites, fetched when a section is opened
+details_cache = TTLCache(max_size=256, ttl=24 * 3600)
+
+
+# --- PDF Extractor ---
+@traced("extract_text_from_pdf")
+def extract_text_from_pdf(pdf_file):
+    doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
+    return "\n".join(page.get_text() for page in doc)
+
+
+# --- Prompt Generator ---
+@traced("create_full_policy_prompt")
+def create_full_policy_prompt(section_id, full_policy_text, checklist, with_confidence=False, lean=False):
+    checklist_text = "\n".join(
+        f"{item['id']}. {item['text']}" for item in checklist
+    )
+    # Cascade first pass also asks for a self-reported confidence per item
+    confidence_field = ',\n          "Confidence": 0.9' if with_confidence else ""
+    confidence_note = "\n    Also give a Confidence between 0.0 and 1.0 for each status you assign." if with_confidence else ""
+
+    prompt = f"""
+    You are a compliance analyst evaluating whether the following full privacy policy meets DPDPA Section {section_id}: {dpdpa_checklists[section_id]['title']}.
+    
+    **Checklist:** Use the item numbers (e.g., 4.1, 4.2...) from the checklist below in your response. Do not rephrase or modify the checklist items. Evaluate strictly based on the original items.
+    
+    {checklist_text}
+    
+    **Full Policy Text:**
+    {full_policy_text}
+    
+    Instructions:
+    For each checklist item, search anywhere in the policy and classify it as:
+    - Explicitly Mentioned
+    - Partially Mentioned
+    - Missing{confidence_note}
+    
+    Return output in this JSON format only:
+    {{
+      "Checklist Evaluation": [
+        {{
+          "Checklist Item ID": "4.1",
+          "Status": "Explicitly Mentioned",
+          "Justification": "..."{confidence_field}
+        }},
+        ...
+      ],
+      "Match Level": "Fully Compliant / Partially Compliant / Non-Compliant",
+      "Compliance Score": 0.0,
+      "Suggested Rewrite": "...",
+      "Simplified Legal Meaning": "..."
+    }}
+    
+    Only return the JSON object. Do not include any commentary or explanation.
+    """
+    if lean:
+        # Status codes only: a fraction of the output tokens, so scores come back much sooner
+        example = '["E", 0.9]' if with_confidence else '"E"'
+        prompt = prompt[:prompt.index("    Return output in this JSON format only:")] + f"""    Return only a JSON object mapping each checklist item number to its status code, for example:
+    {{"4.1": {example}, "4.2": ...}}
+    Codes: E = Explicitly Mentioned, P = Partially Mentioned, M = Missing.{" The number is your confidence." if with_confidence else ""}
+    Do not include justifications, commentary or any other keys.
+    """
+    return prompt
+
+
+# --- GPT Call ---
+@traced("call_gpt")
+def call_gpt(client, prompt, model="gpt-4", token=None):
+    content = complete(
+        client,
+        token=token,
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0
+    )
+    with span("parse_json", chars=len(content)):
+        return json.loads(content)
+
+
+def expand_lean_result(result):
+    # {"4.1": "E"} or {"4.1": ["E", 0.9]} -> the usual "Checklist Evaluation" shape
+    if "Checklist Evaluation" in result:
+        return result
+    evaluations = []
+    for item_id, value in result.items():
+        code, confidence = (value[0], value[1] if len(value) > 1 else None) if isinstance(value, list) else (value, None)
+        evaluation = {
+            "Checklist Item ID": str(item_id).strip(),
+            "Status": STATUS_CODES.get(str(code).strip()[:1].upper(), "Missing"),
+            "Justification": ""
+        }
+        if confidence is not None:
+            evaluation["Confidence"] = confidence
+        evaluations.append(evaluation)
+    return {"Checklist Evaluation": evaluations}
+
+
+def call_gpt_checklist(client, section_id, policy_text, checklist, model, token=None, with_confidence=False, lean=False):
+    result = call_gpt(client, create_full_policy_prompt(section_id, policy_text, checklist, with_confidence, lean), model=model, token=token)
+    result = expand_lean_result(result) if lean else result
+    # Each verdict remembers the model that produced it; a cascade mixes two
+    for item in result.get("Checklist Evaluation", []):
+        item["Model"] = model
+    return result
+
+
+# --- Cascade Policy ---
+# Fast model evaluates the whole checklist; uncertain items are re-evaluated by the strong model.
+def default_cascade_policy(settings):
+    return {
+        "fast_model": settings["cascade_fast_model"],
+        "strong_model": settings["cascade_strong_model"],
+        "escalate_statuses": ["Partially Mentioned"],
+        "min_confidence": 0.7
+    }
+
+
+def needs_escalation(item, cascade_policy):
+    if item.get("Status", "Missing").strip() in cascade_policy["escalate_statuses"]:
+        return True
+    try:
+        confidence = float(item.get("Confidence", 0))
+    except (TypeError, ValueError):
+        confidence = 0
+    return confidence < cascade_policy["min_confidence"]
+
+
+def run_cascade(client, section_id, checklist, policy_text, cascade_policy, token=None, lean=False):
+    fast_result = call_gpt_checklist(
+        client, section_id, policy_text, checklist, cascade_policy["fast_model"],
+        token=token, with_confidence=True, lean=lean
+    )
+    fast_items = {
+        item.get("Checklist Item ID", "").strip(): item
+        for item in fast_result.get("Checklist Evaluation", [])
+    }
+    # Items the fast model skipped are escalated too
+    escalated = [
+        item for item in checklist
+        if item["id"] not in fast_items or needs_escalation(fast_items[item["id"]], cascade_policy)
+    ]
+
+    result = dict(fast_result)
+    if escalated:
+        strong_result = call_gpt_checklist(
+            client, section_id, policy_text, escalated, cascade_policy["strong_model"], token=token, lean=lean
+        )
+        for item in strong_result.get("Checklist Evaluation", []):
+            fast_items[item.get("Checklist Item ID", "").strip()] = item
+        result["Suggested Rewrite"] = strong_result.get("Suggested Rewrite", fast_result.get("Suggested Rewrite", ""))
+        result["Simplified Legal Meaning"] = strong_result.get("Simplified Legal Meaning", fast_result.get("Simplified Legal Meaning", ""))
+
+    # Model-reported Match Level no longer covers the merged items, so let the score decide
+    result.pop("Match Level", None)
+    result["Checklist Evaluation"] = [fast_items[item["id"]] for item in checklist if item["id"] in fast_items]
+    return result, len(escalated)
+
+
+def predict_locally(checklist, policy_text, threshold):
+    # Items the distilled classifier is confident about never reach GPT
+    classifier = get_distilled_classifier()
+    if classifier is None:
+        return {}
+    predicted = {}
+    for item in checklist:
+        prediction = classifier.predict(item["id"], item["text"], policy_text)
+        if prediction and prediction[1] >= threshold:
+            predicted[item["id"]] = {
+                "Checklist Item ID": item["id"],
+                "Status": prediction[0],
+                "Justification": f"Predicted by the local model from similar previously checked policies (confidence {prediction[1]:.2f}).",
+                "Local Model": round(prediction[1], 2)
+            }
+    return predicted
+
+
+@traced("analyze_policy_section")
+def analyze_policy_section(client, section_id, checklist, policy_text, model="gpt-4", cascade_policy=None, reuse_verdicts=False, local_threshold=None, lean=False, record=True, token=None):
+    # record=False leaves the verdict store and fingerprint index untouched (evaluation runs)
+    escalated_count = None
+    inherited, inherited_source = {}, None
+    if reuse_verdicts:
+        inherited, inherited_source = get_fingerprint_index().find_inherited(section_id, checklist, policy_text)
+    pending = [item for item in checklist if item["id"] not in inherited]
+    local = {}
+    if local_threshold is not None:
+        local = predict_locally(pending, policy_text, local_threshold)
+        pending = [item for item in pending if item["id"] not in local]
+
+    try:
+        if not pending:
+            result = {
+                "Suggested Rewrite": inherited_source.get("rewrite", "") if inherited_source else "",
+                "Simplified Legal Meaning": inherited_source.get("meaning", "") if inherited_source else ""
+            }
+        elif cascade_policy:
+            result, escalated_count = run_cascade(client, section_id, pending, policy_text, cascade_policy, token=token, lean=lean)
+        else:
+            result = call_gpt_checklist(client, section_id, policy_text, pending, model, token=token, lean=lean)
+    except CallCancelled:
+        raise
+    except Exception as e:
+        return {
+            "Section": section_id,
+            "Title": dpdpa_checklists[section_id]['title'],
+            "Error": str(e),
+            "Match Level": "Error",
+            "Compliance Score": 0.0,
+            "Matched Details": [],
+            "Checklist Items Matched": [],
+            "Suggested Rewrite": "",
+            "Simplified Legal Meaning": ""
+        }
+
+    if inherited or local:
+        # The model only saw the remaining items, so its Match Level does not apply
+        result.pop("Match Level", None)
+        evaluated = {item.get("Checklist Item ID", "").strip(): item for item in result.get("Checklist Evaluation", [])}
+        evaluated.update(inherited)
+        evaluated.update(local)
+        result["Checklist Evaluation"] = [evaluated[item["id"]] for item in checklist if item["id"] in evaluated]
+
+    scoring_span = span("score_evaluations", section=section_id)
+    checklist_dict = {item["id"]: item["text"] for item in checklist}
+    evaluations = []
+
+    matched_count = 0
+    partial_count = 0
+
+    for item in result.get("Checklist Evaluation", []):
+        item_id = item.get("Checklist Item ID", "").strip()
+        status = item.get("Status", "Missing").strip()
+        justification = item.get("Justification", "").strip()
+        text = checklist_dict.get(item_id, "❓")
+
+        if status == "Explicitly Mentioned":
+            matched_count += 1
+        elif status == "Partially Mentioned":
+            partial_count += 1
+
+        evaluation = {
+            "Checklist Item ID": item_id,
+            "Checklist Text": text,
+            "Status": status,
+            "Justification": justification
+        }
+        if item.get("Inherited"):
+            evaluation["Inherited"] = item["Inherited"]
+        if item.get("Local Model"):
+            evaluation["Local Model"] = item["Local Model"]
+        if item.get("Model"):
+            evaluation["Model"] = item["Model"]
+        evaluations.append(evaluation)
+
+    score = (matched_count + 0.5 * partial_count) / len(checklist) if checklist else 0
+    level = (
+        "Fully Compliant" if score == 1 else
+        "Non-Compliant" if score == 0 else
+        "Partially Compliant"
+    )
+
+    section_result = {
+        "Section": section_id,
+        "Title": dpdpa_checklists[section_id]['title'],
+        "Match Level": result.get("Match Level", level),
+        "Compliance Score": round(score, 2),
+        "Matched Details": evaluations,
+        "Checklist Items Matched": [f"{e['Checklist Item ID']} — {e['Checklist Text']}" for e in evaluations if e["Status"] in ["Explicitly Mentioned", "Partially Mentioned"]],
+        "Suggested Rewrite": result.get("Suggested Rewrite", ""),
+        "Simplified Legal Meaning": result.get("Simplified Legal Meaning", "")
+    }
+    scoring_span.end()
+    if escalated_count is not None:
+        section_result["Escalated Items"] = escalated_count
+        section_result["Escalation Rate"] = round(escalated_count / len(checklist), 2) if checklist else 0.0
+    if reuse_verdicts:
+        section_result["Inherited Items"] = len(inherited)
+    if local_threshold is not None:
+        section_result["Local Model Items"] = len(local)
+    if lean:
+        section_result["Lean"] = True
+    if record:
+        record_section(section_result, policy_text)
+    return section_result
+
+
+def record_section(section_result, policy_text):
+    # Adds a section's verdicts to the verdict store and fingerprint index; for results evaluated
+    # with record=False that turn out to be used after all (pre-evaluated sections)
+    record_verdicts(section_result, policy_text)
+    if not section_result.get("Lean"):
+        # Inherited verdicts are anchored on their justification, which lean results do not have
+        get_fingerprint_index().record(section_result, policy_text)
+
+
+# --- Lean-mode Details ---
+def create_details_prompt(section_id, policy_text, evaluations):
+    checklist_text = "\n".join(
+        f"{item['Checklist Item ID']}. {item['Checklist Text']} — {item['Status']}" for item in evaluations
+    )
+    return f"""
+    You are a compliance analyst. The following full privacy policy has already been checked against DPDPA Section {section_id}: {dpdpa_checklists[section_id]['title']}, with the status shown for each checklist item.
+
+    **Checklist and statuses:**
+    {checklist_text}
+
+    **Full Policy Text:**
+    {policy_text}
+
+    Explain each status by quoting or pointing to the relevant part of the policy (or noting what is absent). Do not change the statuses.
+
+    Return output in this JSON format only:
+    {{
+      "Justifications": {{"4.1": "...", "4.2": "..."}},
+      "Suggested Rewrite": "...",
+      "Simplified Legal Meaning": "..."
+    }}
+    """
+
+
+@traced("fetch_section_details")
+def fetch_section_details(client, section_result, policy_text, model="gpt-4", token=None):
+    # Returns (details, cached); details = {"Justifications": {item id: text}, "Suggested Rewrite", "Simplified Legal Meaning"}
+    section_id = section_result["Section"]
+    evaluations = [item for item in section_result["Matched Details"] if not item.get("Justification")]
+    key = request_key(
+        doc_hash=document_hash(policy_text), section=section_id, model=model,
+        statuses=[(item["Checklist Item ID"], item["Status"]) for item in evaluations]
+    )
+    cached = details_cache.get(key)
+    if cached is not None:
+        return cached, True
+    result = call_gpt(client, create_details_prompt(section_id, policy_text, evaluations), model=model, token=token)
+    justifications = result.get("Justifications") or {
+        item.get("Checklist Item ID", "").strip(): item.get("Justification", "")
+        for item in result.get("Checklist Evaluation", [])
+    }
+    details = {
+        "Justifications": {str(item_id).strip(): str(text).strip() for item_id, text in justifications.items()},
+        "Suggested Rewrite": result.get("Suggested Rewrite", ""),
+        "Simplified Legal Meaning": result.get("Simplified Legal Meaning", "")
+    }
+    details_cache.set(key, details)
+    return details, False
@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from verdict_store import DATA_DIR, load_document, load_verdicts
+
+# --- Distilled Local Classifier ---
+# Learns from the GPT verdicts collected in the verdict store: for every checklist item, a
+# softmax regression over hashed TF-IDF features of the policy paragraphs most relevant to
+# that item. CPU-only, NumPy-only. Used as an optional first pass: confident items are
+# answered locally, the rest still go to GPT.
+MODEL_PATH = os.path.join(DATA_DIR, "distilled_model.npz")
+STATUSES = ["Explicitly Mentioned", "Partially Mentioned", "Missing"]
+N_FEATURES = 1 << 14
+EVIDENCE_PARAGRAPHS = 3
+MIN_EXAMPLES_PER_ITEM = 20
+HOLDOUT_FRACTION = 0.2
+L2_PENALTY = 1e-3
+LEARNING_RATE = 0.5
+EPOCHS = 300
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95]
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokens(text):
+    words = WORD_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hashed_counts(text):
+    counts = defaultdict(float)
+    for token in tokens(text):
+        counts[zlib.crc32(token.encode()) % N_FEATURES] += 1.0
+    return counts
+
+
+def evidence_text(policy_text, item_text):
+    # The paragraphs sharing most words with the checklist item stand in for the whole policy
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n|\n", policy_text) if len(p.split()) >= 5] or [policy_text]
+    item_words = set(WORD_PATTERN.findall(item_text.lower().replace("**", "")))
+    ranked = sorted(paragraphs, key=lambda p: len(item_words & set(WORD_PATTERN.findall(p.lower()))), reverse=True)
+    return "\n".join(ranked[:EVIDENCE_PARAGRAPHS])
+
+
+class Vectorizer:
+    def __init__(self, idf=None):
+        self.idf = idf
+
+    def fit(self, texts):
+        doc_freq = np.zeros(N_FEATURES, dtype=np.float32)
+        for text in texts:
+            doc_freq[list(hashed_counts(text).keys())] += 1
+        self.idf = np.log((1 + len(texts)) / (1 + doc_freq)).astype(np.float32) + 1
+        return self
+
+    def transform(self, texts):
+        matrix = np.zeros((len(texts), N_FEATURES), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in hashed_counts(text).items():
+                matrix[row, feature] = 1 + np.log(count)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def fit_softmax(features, labels):
+    weights = np.zeros((features.shape[1], len(STATUSES)), dtype=np.float32)
+    bias = np.zeros(len(STATUSES), dtype=np.float32)
+    targets = np.eye(len(STATUSES), dtype=np.float32)[labels]
+    for _ in range(EPOCHS):
+        grad = (softmax(features @ weights + bias) - targets) / len(labels)
+        weights -= LEARNING_RATE * (features.T @ grad + L2_PENALTY * weights)
+        bias -= LEARNING_RATE * grad.sum(axis=0)
+    return weights, bias
+
+
+def collect_examples(checklists):
+    # Latest GPT verdict per (document, item); inherited or locally predicted verdicts are not labels
+    item_texts = {item["id"]: item["text"] for section in checklists.values() for item in section["items"]}
+    latest = {}
+    verdicts, _ = load_verdicts()
+    for verdict in verdicts:
+        if verdict.get("origin", "gpt") != "gpt" or verdict.get("status") not in STATUSES:
+            continue
+        if verdict.get("item_id") in item_texts:
+            latest[(verdict["doc_hash"], verdict["item_id"])] = verdict["status"]
+
+    documents = {}
+    examples = []
+    for (doc_hash, item_id), status in latest.items():
+        if doc_hash not in documents:
+            documents[doc_hash] = load_document(doc_hash)
+        if documents[doc_hash] is None:
+            continue
+        examples.append({
+            "doc_hash": doc_hash,
+            "item_id": item_id,
+            "text": evidence_text(documents[doc_hash], item_texts[item_id]),
+            "label": STATUSES.index(status)
+        })
+    return examples
+
+
+def is_holdout(doc_hash, fraction=HOLDOUT_FRACTION):
+    # Split by document so a policy never appears on both sides
+    return int(doc_hash[:8], 16) / 0xFFFFFFFF < fraction
+
+
+def train(checklists, holdout_fraction=HOLDOUT_FRACTION):
+    examples = collect_examples(checklists)
+    train_examples = [e for e in examples if not is_holdout(e["doc_hash"], holdout_fraction)]
+    test_examples = [e for e in examples if is_holdout(e["doc_hash"], holdout_fraction)]
+    vectorizer = Vectorizer().fit([e["text"] for e in train_examples])
+
+    by_item = defaultdict(list)
+    for example in train_examples:
+        by_item[example["item_id"]].append(example)
+    models = {}
+    for item_id, item_examples in by_item.items():
+        labels = np.array([e["label"] for e in item_examples])
+        if len(item_examples) < MIN_EXAMPLES_PER_ITEM or len(set(labels)) < 2:
+            continue
+        models[item_id] = fit_softmax(vectorizer.transform([e["text"] for e in item_examples]), labels)
+
+    classifier = DistilledClassifier(vectorizer, models)
+    return classifier, evaluate(classifier, test_examples), len(train_examples)
+
+
+def evaluate(classifier, test_examples):
+    # Agreement with held-out GPT labels, overall and at each confidence threshold
+    predictions = []
+    for example in test_examples:
+        prediction = classifier.predict_evidence(example["item_id"], example["text"])
+        if prediction:
+            predictions.append((example["item_id"], prediction[1], STATUSES.index(prediction[0]) == example["label"]))
+
+    report = {"held_out": len(test_examples), "covered": len(predictions), "thresholds": [], "per_item": {}}
+    report["accuracy"] = round(float(np.mean([p[2] for p in predictions])), 3) if predictions else None
+    for threshold in THRESHOLDS:
+        confident = [p for p in predictions if p[1] >= threshold]
+        report["thresholds"].append({
+            "threshold": threshold,
+            "coverage": round(len(confident) / len(test_examples), 3) if test_examples else 0.0,
+            "accuracy": round(float(np.mean([p[2] for p in confident])), 3) if confident else None
+        })
+    per_item = defaultdict(list)
+    for item_id, _, correct in predictions:
+        per_item[item_id].append(correct)
+    report["per_item"] = {item_id: {"n": len(v), "accuracy": round(float(np.mean(v)), 3)} for item_id, v in sorted(per_item.items())}
+    return report
+
+
+class DistilledClassifier:
+    def __init__(self, vectorizer, models):
+        self.vectorizer = vectorizer
+        self.models = models
+
+    def predict_evidence(self, item_id, evidence):
+        if item_id not in self.models:
+            return None
+        weights, bias = self.models[item_id]
+        probabilities = softmax(self.vectorizer.transform([evidence]) @ weights + bias)[0]
+        best = int(probabilities.argmax())
+        return STATUSES[best], float(probabilities[best])
+
+    def predict(self, item_id, item_text, policy_text):
+        return self.predict_evidence(item_id, evidence_text(policy_text, item_text))
+
+    def save(self, path=MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"idf": self.vectorizer.idf}
+        for item_id, (weights, bias) in self.models.items():
+            arrays[f"w_{item_id}"] = weights.astype(np.float16)
+            arrays[f"b_{item_id}"] = bias
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as data:
+            models = {
+                key[2:]: (data[key].astype(np.float32), data[f"b_{key[2:]}"])
+                for key in data.files if key.startswith("w_")
+            }
+            return cls(Vectorizer(data["idf"]), models)
+
+
+_classifier = None
+_classifier_mtime = None
+_classifier_lock = threading.Lock()
+
+
+def get_distilled_classifier(path=MODEL_PATH):
+    # Reloaded when a newer model file is trained, shared by every session otherwise
+    global _classifier, _classifier_mtime
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    with _classifier_lock:
+        if _classifier is None or mtime != _classifier_mtime:
+            _classifier = DistilledClassifier.load(path)
+            _classifier_mtime = mtime
+        return _classifier
+
+
+def format_report(report, train_count, model_count):
+    lines = [
+        f"Trained {model_count} item model(s) on {train_count} GPT verdicts.",
+        f"Held-out verdicts: {report['held_out']}, covered by a model: {report['covered']}, accuracy: {report['accuracy']}",
+        "",
+        "Threshold  Coverage  Accuracy"
+    ]
+    for row in report["thresholds"]:
+        lines.append(f"{row['threshold']:>9}  {row['coverage']:>8}  {row['accuracy']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the distilled local classifier from collected GPT verdicts.")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT_FRACTION, help="Fraction of documents held out for evaluation.")
+    parser.add_argument("--report", help="Optional path for the JSON accuracy report.")
+    args = parser.parse_args()
+
+    from compliance_checklists import dpdpa_checklists
+
+    classifier, report, train_count = train(dpdpa_checklists, args.holdout)
+    classifier.save()
+    print(format_report(report, train_count, len(classifier.models)))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,216 @@
+import datetime
+import difflib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from verdict_store import DATA_DIR
+
+# --- Persistent Draft Store ---
+# SQLite-backed, versioned drafts. Each save is a new version stored as a zlib-compressed
+# line delta against the previous version; every SNAPSHOT_INTERVAL versions a full copy is
+# stored instead, so restoring any version replays at most that many deltas. Listing only
+# touches the small drafts table and is paginated.
+DRAFTS_DB_PATH = os.path.join(DATA_DIR, "drafts.db")
+SNAPSHOT_INTERVAL = 20
+PAGE_SIZE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    organisation TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    head_version INTEGER NOT NULL DEFAULT 0,
+    head_size INTEGER NOT NULL DEFAULT 0,
+    head_hash INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (name, organisation)
+);
+CREATE INDEX IF NOT EXISTS drafts_by_organisation ON drafts (organisation, updated_at);
+CREATE INDEX IF NOT EXISTS drafts_by_updated ON drafts (updated_at);
+CREATE TABLE IF NOT EXISTS draft_versions (
+    draft_id INTEGER NOT NULL REFERENCES drafts (id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    is_snapshot INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (draft_id, version)
+);
+"""
+
+
+def make_delta(previous, current):
+    # Opcodes over lines: ["=", start, end] copies from the previous version, a string inserts text
+    old_lines = previous.splitlines(keepends=True)
+    new_lines = current.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(previous, ops):
+    old_lines = previous.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[1]:op[2]])
+    return "".join(parts)
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class DraftStore:
+    def __init__(self, path=DRAFTS_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def save(self, name, content, organisation="", kind=""):
+        # Returns (draft_id, version); saving unchanged content does not add a version
+        organisation = organisation or ""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id, head_version, head_size, head_hash FROM drafts WHERE name = ? AND organisation = ?",
+                (name, organisation)
+            ).fetchone()
+            now = _now()
+            if row is None:
+                draft_id = self._conn.execute(
+                    "INSERT INTO drafts (name, organisation, kind, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (name, organisation, kind, now, now)
+                ).lastrowid
+                head_version = 0
+            else:
+                draft_id, head_version = row["id"], row["head_version"]
+                if row["head_size"] == len(content) and row["head_hash"] == zlib.crc32(content.encode("utf-8")):
+                    return draft_id, head_version
+
+            version = head_version + 1
+            if head_version == 0 or version % SNAPSHOT_INTERVAL == 1:
+                payload, is_snapshot = content, 1
+            else:
+                payload, is_snapshot = json.dumps(make_delta(self._load(draft_id, head_version), content)), 0
+            blob = zlib.compress(payload.encode("utf-8"), 9)
+            self._conn.execute(
+                "INSERT INTO draft_versions (draft_id, version, created_at, is_snapshot, size, stored_size, payload) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (draft_id, version, now, is_snapshot, len(content), len(blob), blob)
+            )
+            self._conn.execute(
+                "UPDATE drafts SET head_version = ?, head_size = ?, head_hash = ?, updated_at = ?, kind = COALESCE(NULLIF(?, ''), kind) WHERE id = ?",
+                (version, len(content), zlib.crc32(content.encode("utf-8")), now, kind, draft_id)
+            )
+            return draft_id, version
+
+    def _load(self, draft_id, version):
+        # Start at the nearest snapshot at or before the version and replay deltas forward
+        snapshot = self._conn.execute(
+            "SELECT MAX(version) FROM draft_versions WHERE draft_id = ? AND version <= ? AND is_snapshot = 1",
+            (draft_id, version)
+        ).fetchone()[0]
+        if snapshot is None:
+            return None
+        content = None
+        for row in self._conn.execute(
+            "SELECT is_snapshot, payload FROM draft_versions WHERE draft_id = ? AND version BETWEEN ? AND ? ORDER BY version",
+            (draft_id, snapshot, version)
+        ):
+            payload = zlib.decompress(row["payload"]).decode("utf-8")
+            content = payload if row["is_snapshot"] else apply_delta(content, json.loads(payload))
+        return content
+
+    def load(self, draft_id, version=None):
+        with self._lock:
+            if version is None:
+                row = self._conn.execute("SELECT head_version FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+                if row is None:
+                    return None
+                version = row["head_version"]
+            return self._load(draft_id, version)
+
+    def get(self, draft_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, page=0, page_size=PAGE_SIZE, search="", organisation=None):
+        # Returns (drafts on this page, total matching drafts), most recently updated first
+        clauses, params = [], []
+        if search:
+            # Match % and _ in the search text literally
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        if organisation is not None:
+            clauses.append("organisation = ?")
+            params.append(organisation)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM drafts {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, name, organisation, kind, created_at, updated_at, head_version, head_size FROM drafts {where} "
+                "ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [page_size, page * page_size]
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def organisations(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT organisation FROM drafts ORDER BY organisation")]
+
+    def versions(self, draft_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, created_at, is_snapshot, size, stored_size FROM draft_versions WHERE draft_id = ? ORDER BY version DESC",
+                (draft_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def rename(self, draft_id, new_name):
+        # False if the organisation already has a draft with that name
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE drafts SET name = ?, updated_at = ? WHERE id = ?", (new_name, _now(), draft_id))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def delete(self, draft_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
+
+    def stats(self):
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM draft_versions").fetchone()
+            drafts = self._conn.execute("SELECT COUNT(*) FROM drafts").fetchone()[0]
+        return {"Drafts": drafts, "Versions": row[0], "Text Bytes": row[1], "Stored Bytes": row[2]}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_draft_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DraftStore()
+        return _store
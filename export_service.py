@@ -0,0 +1,74 @@
+import functools
+import hashlib
+import io
+import json
+import re
+
+from docx import Document
+
+from ttl_cache import TTLCache
+
+# --- Export Artifact Service ---
+# Renders DOCX/TXT/JSON downloads on demand and caches the bytes by a hash of
+# (content, format, title), so repeated downloads of unchanged drafts are served immediately.
+MIME_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "txt": "text/plain",
+    "json": "application/json"
+}
+NUMBERED_HEADING = re.compile(r"^\d{1,2}\.\s+\S.{0,80}$")
+BULLET = re.compile(r"^\s*[-•*]\s+")
+
+artifact_cache = TTLCache(max_size=64, ttl=3600)
+
+
+def artifact_key(content, fmt, title):
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True, default=str)
+    digest = hashlib.sha256()
+    for part in (fmt, title or "", content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_docx(content, title):
+    # Single pass: numbered short lines become headings, "- " lines become bullets
+    doc = Document()
+    if title:
+        doc.add_heading(title, level=1)
+    for line in content.split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if NUMBERED_HEADING.match(stripped) and not stripped.endswith("."):
+            doc.add_heading(stripped, level=2)
+        elif BULLET.match(stripped):
+            doc.add_paragraph(BULLET.sub("", stripped), style="List Bullet")
+        else:
+            doc.add_paragraph(stripped)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_artifact(content, fmt, title=""):
+    key = artifact_key(content, fmt, title)
+    cached = artifact_cache.get(key)
+    if cached is not None:
+        return cached
+    if fmt == "docx":
+        data = build_docx(content, title)
+    elif fmt == "txt":
+        data = content.encode("utf-8")
+    elif fmt == "json":
+        data = json.dumps(content, indent=2).encode("utf-8")
+    else:
+        raise ValueError(f"Unsupported artifact format: {fmt}")
+    artifact_cache.set(key, data)
+    return data
+
+
+def artifact_loader(content, fmt, title=""):
+    # Zero-argument callable for st.download_button, so nothing is rendered until clicked
+    return functools.partial(render_artifact, content, fmt, title)
@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import tempfile
+
+from openpyxl import Workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# --- Streaming Tabular Exporters ---
+# Rows are consumed lazily and written in small batches, so memory stays flat however many
+# documents/sections are exported. CSV and JSON Lines can be streamed chunk by chunk;
+# Parquet and XLSX need a finished file, so they are written to a spooled temp file that
+# moves to disk once it outgrows SPOOL_MAX_BYTES.
+EVALUATION_COLUMNS = ["Section", "Checklist Item ID", "Checklist Text", "Status", "Justification", "Match Level", "Score"]
+CHUNK_ROWS = 500
+READ_CHUNK_BYTES = 64 * 1024
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+EXPORT_FORMATS = {
+    "CSV": {"extension": "csv", "mime": "text/csv"},
+    "JSON Lines": {"extension": "jsonl", "mime": "application/x-ndjson"},
+    "Excel (.xlsx)": {"extension": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "Parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"}
+}
+
+
+def available_formats():
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "Parquet" or pa is not None]
+
+
+def iter_evaluation_rows(results):
+    for result in results:
+        for item in result["Matched Details"]:
+            yield {
+                "Section": result["Section"],
+                "Checklist Item ID": item["Checklist Item ID"],
+                "Checklist Text": item["Checklist Text"],
+                "Status": item["Status"],
+                "Justification": item["Justification"],
+                "Match Level": result["Match Level"],
+                "Score": result["Compliance Score"]
+            }
+
+
+def _batched(rows, size=CHUNK_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(rows, columns=EVALUATION_COLUMNS):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for batch in _batched(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_jsonl(rows, columns=None):
+    for batch in _batched(rows):
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode("utf-8")
+
+
+def write_xlsx(rows, fileobj, columns=EVALUATION_COLUMNS, sheet_title="Evaluation"):
+    # write_only mode streams each row to the zip instead of keeping the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(columns)
+    for row in rows:
+        sheet.append([row.get(column) for column in columns])
+    workbook.save(fileobj)
+
+
+def write_parquet(rows, fileobj, columns=EVALUATION_COLUMNS):
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow to be installed.")
+    writer = None
+    for batch in _batched(rows):
+        table = pa.Table.from_pylist([{column: row.get(column) for column in columns} for row in batch])
+        if writer is None:
+            writer = pq.ParquetWriter(fileobj, table.schema)
+        writer.write_table(table.cast(writer.schema))
+    if writer is None:
+        pq.write_table(pa.table({column: pa.array([], type=pa.string()) for column in columns}), fileobj)
+    else:
+        writer.close()
+
+
+def export_to_file(fmt, rows, columns=EVALUATION_COLUMNS):
+    # Returns a rewound file object; small exports stay in memory, large ones spill to disk
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if fmt == "CSV":
+        for chunk in iter_csv(rows, columns):
+            spool.write(chunk)
+    elif fmt == "JSON Lines":
+        for chunk in iter_jsonl(rows, columns):
+            spool.write(chunk)
+    elif fmt == "Excel (.xlsx)":
+        write_xlsx(rows, spool, columns)
+    elif fmt == "Parquet":
+        write_parquet(rows, spool, columns)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    spool.seek(0)
+    return spool
+
+
+def export_bytes(fmt, rows, columns=EVALUATION_COLUMNS):
+    # For st.download_button, which needs bytes and builds the whole payload before the download starts
+    with export_to_file(fmt, rows, columns) as spool:
+        return spool.read()
+
+
+def stream_export(fmt, rows, columns=EVALUATION_COLUMNS):
+    # Yields bytes as soon as they are ready: row batches for CSV/JSON Lines, file chunks otherwise
+    if fmt == "CSV":
+        yield from iter_csv(rows, columns)
+    elif fmt == "JSON Lines":
+        yield from iter_jsonl(rows, columns)
+    else:
+        with export_to_file(fmt, rows, columns) as spool:
+            while True:
+                chunk = spool.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
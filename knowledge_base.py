@@ -0,0 +1,195 @@
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+from ttl_cache import TTLCache
+from verdict_store import load_verdicts
+
+# --- Knowledge Assistant Index ---
+# BM25 inverted index over the Act's text (if a copy is provided), the DPDPA checklists and
+# justifications from earlier compliance checks. Retrieval is local; GPT is only used to
+# synthesise an answer from the retrieved passages.
+ACT_TEXT_PATH = os.environ.get("DPDPA_ACT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "dpdpa_act.txt"))
+ITEM_ID_PATTERN = re.compile(r"\b(\d{1,2}\.\d{1,2})\b")
+SECTION_PATTERN = re.compile(r"\bsection\s+(\d{1,2})\b", re.I)
+TOKEN_PATTERN = re.compile(r"\d+\.\d+|[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "its", "must", "of", "on", "or", "should", "that", "the", "this", "to", "what", "when",
+    "which", "who", "with", "policy", "require", "requires", "required"
+}
+BM25_K1 = 1.5
+BM25_B = 0.75
+MAX_JUSTIFICATIONS_PER_ITEM = 20
+
+retrieval_cache = TTLCache(max_size=512, ttl=3600)
+synthesis_cache = TTLCache(max_size=256, ttl=24 * 3600)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower().replace("**", "")) if token not in STOPWORDS]
+
+
+def load_act_passages(path=ACT_TEXT_PATH):
+    # Splits a plain-text copy of the Act on "N. Heading" lines into one passage per section
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    passages = []
+    for match in re.finditer(r"(?ms)^\s*(\d{1,2})\.\s+(.+?)(?=^\s*\d{1,2}\.\s+|\Z)", text):
+        section, body = match.group(1), match.group(2).strip()
+        passages.append({
+            "source": "DPDPA Act",
+            "ref": f"Section {section}",
+            "section": section,
+            "text": body
+        })
+    return passages
+
+
+def checklist_passages(checklists):
+    passages = []
+    for section_id, section in checklists.items():
+        passages.append({
+            "source": "Checklist",
+            "ref": f"Section {section_id}",
+            "section": section_id,
+            "text": f"Section {section_id}: {section['title']}. " + " ".join(item["text"] for item in section["items"])
+        })
+        for item in section["items"]:
+            passages.append({
+                "source": "Checklist",
+                "ref": item["id"],
+                "section": section_id,
+                "item_id": item["id"],
+                "text": f"{item['id']} ({section['title']}): {item['text']}"
+            })
+    return passages
+
+
+class KnowledgeIndex:
+    def __init__(self):
+        self.passages = []
+        self.act_passages = 0
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        self.item_refs = defaultdict(list)
+        self.section_refs = defaultdict(list)
+        self._justification_counts = Counter()
+        self._verdict_offset = 0
+        self._lock = threading.Lock()
+
+    def add(self, passage):
+        doc_id = len(self.passages)
+        tokens = tokenize(passage["text"])
+        self.passages.append(passage)
+        self.doc_lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings[term].append((doc_id, tf))
+        if passage.get("item_id"):
+            self.item_refs[passage["item_id"]].append(doc_id)
+        self.section_refs[passage["section"]].append(doc_id)
+
+    def refresh_verdicts(self):
+        # Picks up justifications appended to the verdict log since the last refresh
+        # Load and advance the offset under the lock, so concurrent refreshes never index the same verdicts twice
+        with self._lock:
+            verdicts, self._verdict_offset = load_verdicts(self._verdict_offset)
+            added = 0
+            for verdict in verdicts:
+                item_id = verdict.get("item_id", "")
+                if not verdict.get("justification") or self._justification_counts[item_id] >= MAX_JUSTIFICATIONS_PER_ITEM:
+                    continue
+                self._justification_counts[item_id] += 1
+                self.add({
+                    "source": "Prior Evaluation",
+                    "ref": f"{item_id} — {verdict.get('status', '')}",
+                    "section": verdict.get("section", item_id.split(".")[0]),
+                    "item_id": item_id,
+                    "text": verdict["justification"]
+                })
+                added += 1
+        if added:
+            retrieval_cache.clear()
+        return added
+
+    def search(self, query, top_k=5):
+        key = (" ".join(tokenize(query)), top_k)
+        cached = retrieval_cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            scores = defaultdict(float)
+            total = len(self.passages)
+            avg_length = sum(self.doc_lengths) / total if total else 0
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term, [])
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            # Explicit references ("8.7", "Section 6") outrank free-text matches
+            for item_id in ITEM_ID_PATTERN.findall(query):
+                for doc_id in self.item_refs.get(item_id, []):
+                    scores[doc_id] += 100 if self.passages[doc_id]["source"] == "Checklist" else 10
+            for section_id in SECTION_PATTERN.findall(query):
+                for doc_id in self.section_refs.get(section_id, []):
+                    scores[doc_id] += 5
+
+            ranked = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:top_k]
+            results = [dict(self.passages[doc_id], score=round(score, 2), doc_id=doc_id) for doc_id, score in ranked]
+
+        retrieval_cache.set(key, results)
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index(checklists):
+    # Built once per server process; later calls only pull in new verdicts
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = KnowledgeIndex()
+            act_passages = load_act_passages()
+            for passage in act_passages + checklist_passages(checklists):
+                index.add(passage)
+            index.act_passages = len(act_passages)
+            _index = index
+    _index.refresh_verdicts()
+    return _index
+
+
+def create_synthesis_prompt(question, passages):
+    context = "\n\n".join(f"[{i}] ({p['source']} {p['ref']}) {p['text']}" for i, p in enumerate(passages, start=1))
+    return f"""
+    You are a DPDPA (Digital Personal Data Protection Act, 2023) compliance assistant.
+    Answer the question using only the numbered passages below, citing them like [1], [2].
+    If the passages do not answer the question, say so.
+
+    **Passages:**
+    {context}
+
+    **Question:** {question}
+
+    Answer in at most 150 words of plain English.
+    """
+
+
+def synthesize_answer(question, passages, call_llm):
+    key = (" ".join(tokenize(question)), tuple(p["doc_id"] for p in passages))
+    cached = synthesis_cache.get(key)
+    if cached is not None:
+        return cached, True
+    answer = call_llm(create_synthesis_prompt(question, passages))
+    synthesis_cache.set(key, answer)
+    return answer, False
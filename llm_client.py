@@ -0,0 +1,400 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+import httpx
+import openai
+
+from run_control import RunToken, take_queue_delay
+from run_control import call_context as _call_context
+from tracing import span
+
+# --- Connection Pool Settings ---
+POOL_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120)
+REQUEST_TIMEOUT = httpx.Timeout(connect=5.0, read=float(os.environ.get("DPDPA_LLM_TIMEOUT", 120)), write=20.0, pool=10.0)
+MAX_RETRIES = 2
+MAX_CONCURRENT_CALLS = int(os.environ.get("DPDPA_LLM_CONCURRENCY", 16))
+LANES = ["interactive", "background"]
+INTERACTIVE_RESERVE = 0.25
+WAIT_SAMPLES = 1000
+
+_lock = threading.Lock()
+_clients = {}
+_stats = {"requests": 0, "connections_opened": 0, "prompt_tokens": 0, "completion_tokens": 0, "started": time.time()}
+_seen_connections = weakref.WeakSet()
+_flights = {}
+_flight_stats = {"calls": 0, "coalesced": 0}
+_limits = {"read_timeout": REQUEST_TIMEOUT.read, "concurrency": MAX_CONCURRENT_CALLS}
+_slot_lock = threading.Lock()
+_usage_meter = contextvars.ContextVar("llm_usage_meter", default=None)
+_lanes = {
+    lane: {"queues": OrderedDict(), "queued": 0, "active": 0, "calls": 0, "waits": deque(maxlen=WAIT_SAMPLES), "max_wait": 0.0}
+    for lane in LANES
+}
+
+
+def _record(pool):
+    # A connection object we have not seen before means a fresh TCP/TLS handshake
+    with _lock:
+        _stats["requests"] += 1
+        for conn in pool.connections:
+            if conn not in _seen_connections:
+                _seen_connections.add(conn)
+                _stats["connections_opened"] += 1
+
+
+class PooledTransport(httpx.HTTPTransport):
+    def handle_request(self, request):
+        response = super().handle_request(request)
+        _record(self._pool)
+        return response
+
+    def connection_counts(self):
+        # (open, idle) connections in this transport's pool
+        connections = list(self._pool.connections)
+        return len(connections), sum(1 for conn in connections if conn.is_idle())
+
+
+def _build_client(api_key):
+    # Returns (client, transport); the transport is kept so pool_stats can read its pool
+    transport = PooledTransport(limits=POOL_LIMITS)
+    client = openai.OpenAI(
+        api_key=api_key,
+        timeout=REQUEST_TIMEOUT,
+        max_retries=MAX_RETRIES,
+        http_client=openai.DefaultHttpxClient(transport=transport)
+    )
+    return client, transport
+
+
+def get_client(api_key):
+    # One client per server process, shared by every session and rerun
+    with _lock:
+        if api_key not in _clients:
+            _clients[api_key] = _build_client(api_key)
+        return _clients[api_key][0]
+
+
+# --- In-flight Request Coalescing ---
+# Identical requests that overlap in time (double clicks, several analysts checking the same
+# policy) share one API call: the first caller makes it, the others wait for its result.
+# The shared call is only abandoned once every caller waiting on it has been cancelled.
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.token = RunToken()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+def request_key(**params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def single_flight(key, fn, token=None):
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+            _flight_stats["calls"] += 1
+        else:
+            _flight_stats["coalesced"] += 1
+        flight.waiters += 1
+
+    def release():
+        with _lock:
+            flight.waiters -= 1
+            abandoned = flight.waiters == 0
+        if abandoned:
+            flight.token.cancel(token.reason)
+
+    if token is not None:
+        token.on_cancel(release)
+    try:
+        if leader:
+            try:
+                flight.result = fn(flight.token)
+                return flight.result
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with _lock:
+                    del _flights[key]
+                flight.done.set()
+        while not flight.done.wait(0.2):
+            if token is not None:
+                token.check()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+    finally:
+        if token is not None:
+            token.remove_callback(release)
+
+
+# --- Runtime Limits ---
+# Both can be changed while the app is running (Admin Settings); they apply to the next call.
+def set_request_timeout(seconds):
+    _limits["read_timeout"] = float(seconds)
+
+
+def set_concurrency(limit):
+    with _slot_lock:
+        _limits["concurrency"] = max(1, int(limit))
+        _dispatch()
+
+
+# --- Fair Scheduling ---
+# Calls wait for one of the concurrency slots in one of two lanes. The interactive lane
+# (single-section checks, generators, the assistant) is always served first, and background
+# work (All Sections batches, speculative runs, the check service) may never hold the slots
+# reserved for it, so a one-section check does not queue behind someone's batch. Within a lane,
+# tenants (one per user session, or per service client) take turns: each tenant has its own
+# FIFO queue and slots go round-robin across tenants, so one user's 50 queued calls cannot
+# starve another user's single call. Tasks started with run_control.submit also get a worker
+# pool per lane, so background tasks waiting here do not hold the threads interactive calls need.
+def set_call_context(tenant, lane="interactive"):
+    # Tenant and lane for every call made from this context, including worker threads started from it
+    _call_context.set((tenant, lane))
+
+
+@contextlib.contextmanager
+def call_lane(lane):
+    tenant, _ = _call_context.get()
+    context_token = _call_context.set((tenant, lane))
+    try:
+        yield
+    finally:
+        _call_context.reset(context_token)
+
+
+class _Waiter:
+    def __init__(self, tenant, lane):
+        self.tenant = tenant
+        self.lane = lane
+        self.granted = threading.Event()
+
+
+def _background_limit():
+    concurrency = _limits["concurrency"]
+    return max(1, concurrency - max(1, int(concurrency * INTERACTIVE_RESERVE)))
+
+
+def _next_waiter(lane):
+    queues = _lanes[lane]["queues"]
+    tenant, waiters = next(iter(queues.items()))
+    waiter = waiters.popleft()
+    if waiters:
+        queues.move_to_end(tenant)
+    else:
+        del queues[tenant]
+    _lanes[lane]["queued"] -= 1
+    return waiter
+
+
+def _dispatch():
+    # Called with _slot_lock held whenever a slot frees up or a call is queued
+    interactive, background = _lanes["interactive"], _lanes["background"]
+    while interactive["active"] + background["active"] < _limits["concurrency"]:
+        if interactive["queued"]:
+            waiter = _next_waiter("interactive")
+        elif background["queued"] and background["active"] < _background_limit():
+            waiter = _next_waiter("background")
+        else:
+            return
+        _lanes[waiter.lane]["active"] += 1
+        waiter.granted.set()
+
+
+def _acquire_slot(token):
+    tenant, lane = _call_context.get()
+    waiter = _Waiter(tenant, lane)
+    # Wait is measured from when the task was submitted, including any time spent waiting for a worker
+    started = time.perf_counter() - take_queue_delay()
+    with span("llm.queue_wait", lane=lane):
+        with _slot_lock:
+            _lanes[lane]["queues"].setdefault(tenant, deque()).append(waiter)
+            _lanes[lane]["queued"] += 1
+            _dispatch()
+        while not waiter.granted.wait(0.2):
+            if token.cancelled:
+                with _slot_lock:
+                    if not waiter.granted.is_set():
+                        waiters = _lanes[lane]["queues"].get(tenant)
+                        waiters.remove(waiter)
+                        if not waiters:
+                            del _lanes[lane]["queues"][tenant]
+                        _lanes[lane]["queued"] -= 1
+                        token.check()
+                break
+    waited = time.perf_counter() - started
+    with _slot_lock:
+        stats = _lanes[lane]
+        stats["calls"] += 1
+        stats["waits"].append(waited)
+        stats["max_wait"] = max(stats["max_wait"], waited)
+    return lane
+
+
+def _release_slot(lane):
+    with _slot_lock:
+        _lanes[lane]["active"] -= 1
+        _dispatch()
+
+
+def lane_stats():
+    rows = []
+    with _slot_lock:
+        for lane in LANES:
+            stats = _lanes[lane]
+            waits = sorted(stats["waits"])
+            rows.append({
+                "Lane": lane,
+                "Active Calls": stats["active"],
+                "Queued Calls": stats["queued"],
+                "Waiting Tenants": len(stats["queues"]),
+                "Calls": stats["calls"],
+                "Mean Wait (ms)": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95 Wait (ms)": round(1000 * waits[min(len(waits) - 1, int(0.95 * len(waits)))], 1) if waits else 0.0,
+                "Max Wait (ms)": round(1000 * stats["max_wait"], 1)
+            })
+    return rows
+
+
+def reset_lane_stats():
+    # Clears the wait history; calls in flight keep their slots
+    with _slot_lock:
+        for stats in _lanes.values():
+            stats["calls"] = 0
+            stats["waits"].clear()
+            stats["max_wait"] = 0.0
+
+
+def _stream_completion(client, token, timeout, params):
+    token.check()
+    lane = _acquire_slot(token)
+    try:
+        return _stream_in_slot(client, token, timeout, params)
+    finally:
+        _release_slot(lane)
+
+
+def _stream_in_slot(client, token, timeout, params):
+    # Streaming lets a cancelled call stop mid-generation: closing the stream drops the connection.
+    # Cancellation while waiting for the response headers is bounded by the request timeout, and a
+    # deadline shorter than the normal read timeout leaves no room for retries.
+    client = client.with_options(
+        timeout=httpx.Timeout(timeout, connect=min(timeout, REQUEST_TIMEOUT.connect)),
+        max_retries=MAX_RETRIES if timeout >= _limits["read_timeout"] else 0
+    )
+    try:
+        stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **params)
+    except Exception:
+        token.check()
+        raise
+    token.on_cancel(stream.close)
+    parts = []
+    usage = None
+    try:
+        for chunk in stream:
+            if token.cancelled:
+                break
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+    except Exception:
+        if not token.cancelled:
+            raise
+    finally:
+        token.remove_callback(stream.close)
+        stream.close()
+    token.check()
+    text = "".join(parts)
+    _count_tokens(params, text, usage)
+    return text
+
+
+# --- Token Usage ---
+# Servers that do not report usage on streams are estimated at ~4 characters per token.
+@contextlib.contextmanager
+def usage_meter():
+    # Totals for every call made inside the block, including from worker threads it starts
+    meter = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated_calls": 0}
+    context_token = _usage_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _usage_meter.reset(context_token)
+
+
+def _count_tokens(params, text, usage):
+    if usage is not None:
+        prompt_tokens, completion_tokens, estimated = usage.prompt_tokens, usage.completion_tokens, 0
+    else:
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in params.get("messages", []))
+        prompt_tokens, completion_tokens, estimated = prompt_chars // 4, len(text) // 4, 1
+    meter = _usage_meter.get()
+    with _lock:
+        _stats["prompt_tokens"] += prompt_tokens
+        _stats["completion_tokens"] += completion_tokens
+        if meter is not None:
+            meter["calls"] += 1
+            meter["prompt_tokens"] += prompt_tokens
+            meter["completion_tokens"] += completion_tokens
+            meter["estimated_calls"] += estimated
+
+
+def complete(client, token=None, **params):
+    # Returns the message text; raises CallCancelled if every caller gave up or the deadline passed
+    if token is not None:
+        token.check()
+    timeout = _limits["read_timeout"]
+    if token is not None and token.remaining() is not None:
+        timeout = max(0.1, min(timeout, token.remaining()))
+    key = request_key(base_url=str(client.base_url), **params)
+    with span("llm.request", model=params.get("model", "")):
+        return single_flight(key, lambda flight_token: _stream_completion(client, flight_token, timeout, params), token)
+
+
+def pool_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats.update(_flight_stats)
+        in_flight = len(_flights)
+        transports = [transport for _, transport in _clients.values()]
+    with _slot_lock:
+        limits = dict(_limits)
+        limits["active"] = sum(_lanes[lane]["active"] for lane in LANES)
+        limits["queued"] = sum(_lanes[lane]["queued"] for lane in LANES)
+    open_conns = idle_conns = 0
+    for transport in transports:
+        open_count, idle_count = transport.connection_counts()
+        open_conns += open_count
+        idle_conns += idle_count
+    requests = stats["requests"]
+    return {
+        "Requests": requests,
+        "Connections Opened": stats["connections_opened"],
+        "Connection Reuse": round(1 - stats["connections_opened"] / requests, 3) if requests else 0.0,
+        "Open Connections": open_conns,
+        "Idle Connections": idle_conns,
+        "LLM Calls": stats["calls"],
+        "Coalesced Calls": stats["coalesced"],
+        "In-flight Calls": in_flight,
+        "Active Calls": limits["active"],
+        "Queued Calls": limits["queued"],
+        "Concurrency Limit": limits["concurrency"],
+        "Prompt Tokens": stats["prompt_tokens"],
+        "Completion Tokens": stats["completion_tokens"],
+        "Uptime (s)": round(time.time() - stats["started"])
+    }
@@ -0,0 +1,362 @@
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.sync.client import connect
+
+from mock_llm_server import start_mock_server
+
+# --- Concurrent-session load test ---
+# Starts the app once with `streamlit run` against the mock LLM endpoint and drives simulated
+# analysts through its websocket, the way browsers do: each one opens the app, goes to the
+# checker, pastes a policy and runs "All Sections". All sessions share that one server process,
+# so they contend for the same LLM client pool, concurrency slots, coalescing table and run
+# executors as real users would; CPU and memory are those of the server process. Concurrency
+# is ramped level by level until the server saturates.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+ACTIONS = ["open_app", "open_checker", "paste_policy", "select_all_sections", "run_all_sections"]
+ERROR_BADGE = re.compile(r">\s*Error\s*</span>")
+
+SAMPLE_POLICY = """
+We collect your name, email and phone number to provide our services and process it only with your consent.
+You may withdraw consent at any time by writing to privacy@example.com. We retain data for two years and
+protect it with reasonable security safeguards. In case of a personal data breach we will inform the Board.
+""" * 20
+
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def _process_usage(pid):
+    # (cpu seconds, rss MB) for one process, read from /proc
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/statm") as f:
+        rss_pages = int(f.read().split()[1])
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, rss_pages * PAGE_SIZE / 1e6
+
+
+# --- App Server ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    # One `streamlit run` process serving every simulated session
+    def __init__(self, base_url, api_key, port=None, startup_timeout=60):
+        self.port = port or _free_port()
+        self._dir = tempfile.TemporaryDirectory(prefix="dpdpa-load-")
+        secrets_path = os.path.join(self._dir.name, "secrets.toml")
+        with open(secrets_path, "w", encoding="utf-8") as f:
+            f.write(f"OPENAI_API_KEY = {json.dumps(api_key)}\n")
+        self._log = open(os.path.join(self._dir.name, "server.log"), "wb")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", APP_PATH,
+                "--server.headless", "true", "--server.port", str(self.port),
+                "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+                "--secrets.files", secrets_path
+            ],
+            env={**os.environ, "OPENAI_BASE_URL": base_url}, stdout=self._log, stderr=subprocess.STDOUT
+        )
+        self._wait_healthy(startup_timeout)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def _wait_healthy(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"streamlit exited with code {self.process.returncode}; see {self._log.name}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"streamlit did not become healthy within {timeout}s")
+
+    def usage(self):
+        return _process_usage(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+        self._dir.cleanup()
+
+
+class ResourceSampler:
+    def __init__(self, server, interval=0.5):
+        self.server = server
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        last_wall = time.perf_counter()
+        last_cpu, _ = self.server.usage()
+        while not self._stop.wait(self.interval):
+            wall = time.perf_counter()
+            cpu, rss = self.server.usage()
+            self.samples.append({"cpu_pct": 100 * (cpu - last_cpu) / (wall - last_wall), "rss_mb": rss})
+            last_wall, last_cpu = wall, cpu
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        if not self.samples:
+            return {"cpu_pct_mean": 0.0, "cpu_pct_max": 0.0, "rss_mb_max": round(self.server.usage()[1], 1)}
+        return {
+            "cpu_pct_mean": round(statistics.mean(s["cpu_pct"] for s in self.samples), 1),
+            "cpu_pct_max": round(max(s["cpu_pct"] for s in self.samples), 1),
+            "rss_mb_max": round(max(s["rss_mb"] for s in self.samples), 1)
+        }
+
+
+# --- Simulated Browser Session ---
+class BrowserSession:
+    # Speaks the Streamlit websocket protocol: every interaction sends the current widget values
+    # in a rerun request and reads forward messages until the script run finishes
+    def __init__(self, websocket, timeout):
+        self.timeout = timeout
+        self.elements = []
+        self._values = {}
+        self._ws = websocket
+
+    def rerun(self, trigger_id=None):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        for widget_id, (field, value) in self._values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, field, value)
+        if trigger_id is not None:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = trigger_id
+            state.trigger_value = True
+        self._ws.send(msg.SerializeToString())
+        self.elements = []
+        deadline = time.monotonic() + self.timeout
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self._ws.recv(timeout=max(0.0, deadline - time.monotonic())))
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self.elements.append(forward.delta.new_element)
+            elif kind == "new_session":
+                self.elements = []
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("app script failed to compile")
+                return
+
+    def widgets(self, kind):
+        return [getattr(element, kind) for element in self.elements if element.WhichOneof("type") == kind]
+
+    def set_value(self, widget, value):
+        # Text inputs, radios and selectboxes all send their (formatted) value as a string
+        self._values[widget.id] = ("string_value", value)
+        self.rerun()
+
+    def click(self, label):
+        self.rerun(next(button.id for button in self.widgets("button") if button.label == label))
+
+    def errors(self):
+        errors = [exception.message for exception in self.widgets("exception")]
+        errors.extend(alert.body for alert in self.widgets("alert") if alert.format == Alert.ERROR)
+        errors.extend("section evaluation error" for markdown in self.widgets("markdown") if ERROR_BADGE.search(markdown.body))
+        return errors
+
+
+def simulate_session(url, timeout):
+    timings, errors = {}, []
+
+    def timed(action, fn, start=None):
+        if errors:
+            return
+        start = start or time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            errors.append(f"{action}: {e!r}")
+            return
+        timings[action] = time.perf_counter() - start
+
+    def select_all_sections():
+        session.set_value(next(box for box in session.widgets("selectbox") if "All Sections" in box.options), "All Sections")
+
+    # Opening the app includes the websocket handshake
+    opened = time.perf_counter()
+    try:
+        with connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout) as websocket:
+            session = BrowserSession(websocket, timeout)
+            timed("open_app", session.rerun, opened)
+            timed("open_checker", lambda: session.set_value(next(radio for radio in session.widgets("radio") if "Policy Compliance Checker" in radio.options), "Policy Compliance Checker"))
+            timed("paste_policy", lambda: session.set_value(session.widgets("text_area")[0], SAMPLE_POLICY))
+            timed("select_all_sections", select_all_sections)
+            timed("run_all_sections", lambda: session.click("Run Compliance Check"))
+            errors.extend(session.errors())
+    except Exception as e:
+        errors.append(f"open_app: {e!r}")
+    return timings, errors
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_level(server, concurrency, sessions_per_user, timeout):
+    # Each pool thread is one user opening sessions back to back; the clients only wait on
+    # sockets, so the load lands on the server process
+    timings = {action: [] for action in ACTIONS}
+    sessions = errored = 0
+    error_samples = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        with ResourceSampler(server) as sampler:
+            start = time.perf_counter()
+            futures = [pool.submit(simulate_session, server.url, timeout) for _ in range(concurrency * sessions_per_user)]
+            for future in futures:
+                session_timings, errors = future.result()
+                sessions += 1
+                errored += bool(errors)
+                error_samples.extend(errors[:1])
+                for action, seconds in session_timings.items():
+                    timings[action].append(seconds)
+            wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "error_rate": round(errored / sessions, 3) if sessions else 0.0,
+        "error_samples": error_samples[:5],
+        "throughput_runs_per_min": round(60 * sessions / wall, 2),
+        "latency": {
+            action: {
+                "p50": round(percentile(values, 50), 3),
+                "p90": round(percentile(values, 90), 3),
+                "p99": round(percentile(values, 99), 3)
+            }
+            for action, values in timings.items()
+        },
+        **sampler.summary()
+    }
+
+
+def find_saturation(levels, max_error_rate=0.01, latency_factor=2.0, min_throughput_gain=0.1):
+    # Saturated once errors appear, the run p90 doubles over the single-user baseline,
+    # or adding users stops adding throughput.
+    if not levels:
+        return None
+    baseline = levels[0]["latency"]["run_all_sections"]["p90"] or 1e-9
+    for previous, level in zip([None] + levels[:-1], levels):
+        if level["error_rate"] > max_error_rate:
+            return level["concurrency"], "error rate above threshold"
+        if level["latency"]["run_all_sections"]["p90"] > latency_factor * baseline:
+            return level["concurrency"], f"run p90 above {latency_factor}x single-user baseline"
+        if previous and level["throughput_runs_per_min"] < previous["throughput_runs_per_min"] * (1 + min_throughput_gain):
+            return level["concurrency"], "throughput stopped scaling"
+    return None
+
+
+def format_report(levels, saturation, mock_latency):
+    lines = [
+        "# DPDPA Compliance Tool — Load Test Report",
+        "",
+        f"Mock LLM latency: {mock_latency}s per call. Action: 'All Sections' compliance check.",
+        "All sessions run against one `streamlit run` server process; CPU and RSS are that process's.",
+        "",
+        "| Users | Sessions | Runs/min | Error rate | run p50 (s) | run p90 (s) | run p99 (s) | CPU mean % | CPU max % | RSS max (MB) |",
+        "|---|---|---|---|---|---|---|---|---|---|"
+    ]
+    for level in levels:
+        run = level["latency"]["run_all_sections"]
+        lines.append(
+            f"| {level['concurrency']} | {level['sessions']} | {level['throughput_runs_per_min']} | {level['error_rate']:.1%} "
+            f"| {run['p50']} | {run['p90']} | {run['p99']} | {level['cpu_pct_mean']} | {level['cpu_pct_max']} | {level['rss_mb_max']} |"
+        )
+    lines += ["", "## Per-action latency (p50 / p90 / p99, seconds)", "", "| Users | " + " | ".join(ACTIONS) + " |",
+              "|---|" + "---|" * len(ACTIONS)]
+    for level in levels:
+        cells = [f"{level['latency'][a]['p50']} / {level['latency'][a]['p90']} / {level['latency'][a]['p99']}" for a in ACTIONS]
+        lines.append(f"| {level['concurrency']} | " + " | ".join(cells) + " |")
+    lines.append("")
+    if saturation:
+        lines.append(f"**Saturation point:** {saturation[0]} concurrent users ({saturation[1]}).")
+    else:
+        lines.append("**Saturation point:** not reached at the tested concurrency levels.")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent 'All Sections' sessions against a mock LLM.")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrency levels to ramp through.")
+    parser.add_argument("--sessions-per-user", type=int, default=2)
+    parser.add_argument("--mock-latency", type=float, default=0.5, help="Seconds the mock LLM waits per call.")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-action timeout in seconds.")
+    parser.add_argument("--port", type=int, help="Port for the app server (default: a free port).")
+    parser.add_argument("--stop-at-saturation", action="store_true")
+    parser.add_argument("--report", default="load_test_report.md")
+    parser.add_argument("--json", default="load_test_report.json")
+    args = parser.parse_args()
+
+    mock = start_mock_server(latency=args.mock_latency)
+    server = AppServer(f"http://127.0.0.1:{mock.server_address[1]}/v1", "sk-load-test", args.port)
+
+    levels = []
+    saturation = None
+    try:
+        # One untimed session pays the app's import and first-run costs before any level starts
+        simulate_session(server.url, args.timeout)
+        for concurrency in [int(n) for n in args.levels.split(",") if n.strip()]:
+            print(f"Running {concurrency} concurrent session(s)...", flush=True)
+            levels.append(run_level(server, concurrency, args.sessions_per_user, args.timeout))
+            saturation = find_saturation(levels)
+            if saturation and args.stop_at_saturation:
+                break
+    finally:
+        server.stop()
+        mock.shutdown()
+
+    report = format_report(levels, saturation, args.mock_latency)
+    with open(args.report, "w", encoding="utf-8") as f:
+        f.write(report + "\n")
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump({"levels": levels, "saturation": saturation, "mock_latency": args.mock_latency}, f, indent=2)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Mock OpenAI-compatible endpoint ---
+# Answers /v1/chat/completions with deterministic checklist verdicts (or plain text for
+# generator prompts) after a configurable delay. Used by load_test.py; point the app at
+# it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+STATUSES = ["Explicitly Mentioned", "Partially Mentioned", "Missing"]
+ITEM_ID_PATTERN = re.compile(r"^\s*(\d+\.\d+)\. ", re.M)
+
+
+def mock_completion(prompt, model):
+    item_ids = ITEM_ID_PATTERN.findall(prompt)
+    if not item_ids:
+        return "Mock policy text. " * 20
+    evaluations = []
+    for item_id in item_ids:
+        digest = int(hashlib.md5(f"{item_id}:{prompt[-200:]}".encode()).hexdigest(), 16)
+        evaluations.append({
+            "Checklist Item ID": item_id,
+            "Status": STATUSES[digest % 3],
+            "Justification": f"Mock justification for item {item_id}.",
+            "Confidence": round(0.5 + (digest % 50) / 100, 2)
+        })
+    return json.dumps({
+        "Checklist Evaluation": evaluations,
+        "Suggested Rewrite": "Mock rewrite.",
+        "Simplified Legal Meaning": "Mock meaning."
+    })
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.5
+    stats = {"requests": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, payload):
+        data = f"data: {payload}\n\n".encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.stats_lock:
+            self.stats["requests"] += 1
+        prompt = body["messages"][-1]["content"]
+        content = mock_completion(prompt, body.get("model", ""))
+        time.sleep(self.latency)
+
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": "mock", "created": int(time.time()), "model": body.get("model", "")}
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(content), 40):
+                self._send_chunk(json.dumps({**base, "object": "chat.completion.chunk", "choices": [
+                    {"index": 0, "delta": {"content": content[start:start + 40]}, "finish_reason": None}
+                ]}))
+            self._send_chunk(json.dumps({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {}, "finish_reason": "stop"}
+            ]}))
+            self._send_chunk("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+        ]})
+
+
+def start_mock_server(port=0, latency=0.5):
+    handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {
+        "latency": latency, "stats": {"requests": 0}, "stats_lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions endpoint for local testing.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to wait before answering each request.")
+    args = parser.parse_args()
+    server = start_mock_server(args.port, args.latency)
+    print(f"Mock LLM listening on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
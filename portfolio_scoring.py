@@ -0,0 +1,149 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from compliance_checklists import dpdpa_checklists
+from verdict_store import load_verdicts
+
+# --- Portfolio Scoring ---
+# Every checked document as one row of a document x checklist-item matrix of small status codes,
+# built incrementally from the verdict log (the latest verdict for an item wins). Section scores,
+# match levels, weighted document scores and gap rankings for the whole portfolio are computed in
+# one vectorised pass over the matrix, so changing the scoring weights re-scores everything
+# without re-reading verdicts or calling GPT. Columns are grouped by section, in checklist order.
+NOT_CHECKED, MISSING, PARTIAL, EXPLICIT = -1, 0, 1, 2
+STATUS_CODES = {"Missing": MISSING, "Partially Mentioned": PARTIAL, "Explicitly Mentioned": EXPLICIT}
+PARTIAL_CREDIT = 0.5
+
+SECTION_IDS = list(dpdpa_checklists)
+ITEM_KEYS = [(sid, item["id"]) for sid in SECTION_IDS for item in dpdpa_checklists[sid]["items"]]
+ITEM_COLUMNS = {key: col for col, key in enumerate(ITEM_KEYS)}
+ITEM_SECTION = np.array([SECTION_IDS.index(sid) for sid, _ in ITEM_KEYS])
+SECTION_STARTS = np.searchsorted(ITEM_SECTION, np.arange(len(SECTION_IDS)))
+
+
+def match_levels(scores):
+    # Same levels as a single-section check: exactly 1 is fully compliant, exactly 0 non-compliant
+    return np.select(
+        [np.isnan(scores), np.isclose(scores, 1.0), np.isclose(scores, 0.0)],
+        ["Not Checked", "Fully Compliant", "Non-Compliant"],
+        "Partially Compliant"
+    )
+
+
+def _weights(item_weights, section_weights):
+    item_weights = np.ones(len(ITEM_KEYS)) if item_weights is None else np.asarray(item_weights, dtype=float)
+    section_weights = np.ones(len(SECTION_IDS)) if section_weights is None else np.asarray(section_weights, dtype=float)
+    return item_weights, section_weights
+
+
+def checked_sections(codes):
+    return np.logical_or.reduceat(codes != NOT_CHECKED, SECTION_STARTS, axis=1)
+
+
+class StatusMatrix:
+    def __init__(self):
+        self.documents = []
+        self.last_checked = []
+        self.codes = np.full((0, len(ITEM_KEYS)), NOT_CHECKED, dtype=np.int8)
+        self._rows = {}
+        self._verdict_offset = 0
+        self._lock = threading.Lock()
+
+    def _row(self, doc_hash):
+        row = self._rows.get(doc_hash)
+        if row is None:
+            row = self._rows[doc_hash] = len(self.documents)
+            self.documents.append(doc_hash)
+            self.last_checked.append("")
+            if row == len(self.codes):
+                grown = np.full((max(64, 2 * len(self.codes)), len(ITEM_KEYS)), NOT_CHECKED, dtype=np.int8)
+                grown[:len(self.codes)] = self.codes
+                self.codes = grown
+        return row
+
+    def refresh(self):
+        # Reads only the verdicts appended since the last refresh
+        with self._lock:
+            verdicts, self._verdict_offset = load_verdicts(self._verdict_offset)
+            for verdict in verdicts:
+                col = ITEM_COLUMNS.get((verdict.get("section"), verdict.get("item_id")))
+                if col is None or not verdict.get("doc_hash"):
+                    continue
+                row = self._row(verdict["doc_hash"])
+                self.codes[row, col] = STATUS_CODES.get(verdict.get("status"), MISSING)
+                self.last_checked[row] = max(self.last_checked[row], verdict.get("timestamp") or "")
+        return len(verdicts)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.documents), list(self.last_checked), self.codes[:len(self.documents)].copy()
+
+
+def score_portfolio(codes, partial_credit=PARTIAL_CREDIT, item_weights=None, section_weights=None):
+    # codes: documents x items status matrix. Returns (section scores, document scores); a section
+    # never checked for a document is NaN and left out of that document's weighted score.
+    # Within a checked section, items without a verdict count as missing.
+    item_weights, section_weights = _weights(item_weights, section_weights)
+    credit = np.array([0.0, partial_credit, 1.0, 0.0])  # indexed by code; NOT_CHECKED (-1) takes the last entry
+    checked = checked_sections(codes)
+    totals = np.add.reduceat(credit[codes] * item_weights, SECTION_STARTS, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        section_scores = np.where(checked, totals / np.add.reduceat(item_weights, SECTION_STARTS), np.nan)
+        applied = np.where(checked, section_weights, 0.0)
+        document_scores = np.nansum(section_scores * section_weights, axis=1) / applied.sum(axis=1)
+    return section_scores, document_scores
+
+
+def rank_gaps(codes, partial_credit=PARTIAL_CREDIT, item_weights=None, section_weights=None):
+    # Checklist items ordered by how much score they cost across the documents whose section was checked
+    item_weights, section_weights = _weights(item_weights, section_weights)
+    in_scope = checked_sections(codes)[:, ITEM_SECTION]
+    documents = in_scope.sum(axis=0)
+    shortfall = np.array([1.0, 1.0 - partial_credit, 0.0, 1.0])[codes] * in_scope
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap = shortfall.sum(axis=0) / documents
+        missing_rate = ((codes <= MISSING) & in_scope).sum(axis=0) / documents
+        partial_rate = ((codes == PARTIAL) & in_scope).sum(axis=0) / documents
+    frame = pd.DataFrame({
+        "Section": [sid for sid, _ in ITEM_KEYS],
+        "Checklist Item ID": [item_id for _, item_id in ITEM_KEYS],
+        "Checklist Text": [item["text"] for sid in SECTION_IDS for item in dpdpa_checklists[sid]["items"]],
+        "Documents": documents,
+        "Missing Rate": missing_rate.round(3),
+        "Partial Rate": partial_rate.round(3),
+        "Weighted Gap": (gap * item_weights * section_weights[ITEM_SECTION]).round(3)
+    })
+    return frame[frame["Documents"] > 0].sort_values("Weighted Gap", ascending=False, kind="stable")
+
+
+def portfolio_report(matrix, partial_credit=PARTIAL_CREDIT, item_weights=None, section_weights=None):
+    # One row per document with its section scores, weighted score and match level, the number of
+    # documents at each match level per section, and the gap ranking
+    documents, last_checked, codes = matrix.snapshot()
+    section_scores, document_scores = score_portfolio(codes, partial_credit, item_weights, section_weights)
+    levels = match_levels(section_scores)
+    level_counts = pd.DataFrame(
+        {f"Section {sid}": pd.Series(levels[:, i]).value_counts() for i, sid in enumerate(SECTION_IDS)},
+        index=["Fully Compliant", "Partially Compliant", "Non-Compliant", "Not Checked"]
+    ).fillna(0).astype(int)
+    frame = pd.DataFrame(section_scores.round(2), columns=[f"Section {sid}" for sid in SECTION_IDS])
+    frame.insert(0, "Document", [doc_hash[:12] for doc_hash in documents])
+    frame.insert(1, "Last Checked", last_checked)
+    frame["Weighted Score"] = document_scores.round(3)
+    frame["Match Level"] = match_levels(document_scores)
+    return frame, level_counts, rank_gaps(codes, partial_credit, item_weights, section_weights)
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def get_status_matrix():
+    global _matrix
+    with _matrix_lock:
+        if _matrix is None:
+            _matrix = StatusMatrix()
+    _matrix.refresh()
+    return _matrix
@@ -0,0 +1,349 @@
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import threading
+import time
+
+import httpx
+import openai
+
+from compliance_checklists import dpdpa_checklists
+from compliance_engine import STATUS_CODES, analyze_policy_section
+from llm_client import call_lane, set_call_context, usage_meter
+from run_control import RUN_TIMEOUT, RunToken, submit
+from runtime_settings import DEFAULT_SETTINGS
+from verdict_store import DATA_DIR, load_document, load_verdicts
+
+# --- Accuracy vs Latency Regression Harness ---
+# Runs a labelled golden set of policies through analyze_policy_section under several strategies
+# (model, cascade, lean output, local model, batching) and reports, side by side: agreement with
+# the expected per-item statuses, section score error, latency per policy and LLM tokens.
+# Responses can be recorded and replayed, so a strategy can be re-scored offline with the same
+# model outputs (and, by default, the same per-call latencies). Harness runs never write to the
+# verdict store or fingerprint index.
+#
+# Golden set (JSON):
+#   {"policies": [{"id": "acme", "text": "..." | "path": "policies/acme.txt", "reviewed": true,
+#                  "expected": {"4.1": "Explicitly Mentioned", "4.2": "M", ...}}]}
+# Statuses may be written out or given as E / P / M codes. The reviewed set under golden/ is
+# committed with the repo; bootstrap drafts go to the data directory and are marked unreviewed,
+# and unreviewed entries are left out of runs unless asked for.
+GOLDEN_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "golden_set.json")
+GOLDEN_DRAFT_PATH = os.path.join(DATA_DIR, "golden_set_draft.json")
+RECORDINGS_PATH = os.path.join(DATA_DIR, "harness_recordings.jsonl")
+REPLAY_MODES = ["live", "record", "replay"]
+
+STRATEGIES = {
+    "baseline": {"model": DEFAULT_SETTINGS["check_model"]},
+    "fast-model": {"model": DEFAULT_SETTINGS["cascade_fast_model"]},
+    "cascade": {"cascade": True},
+    "lean": {"lean": True},
+    "lean-cascade": {"lean": True, "cascade": True},
+    "sequential": {"batching": "sequential"}
+}
+DEFAULT_STRATEGIES = ["baseline", "cascade", "lean"]
+
+
+# --- Recorded Responses ---
+class RecordingTransport(httpx.BaseTransport):
+    # Keyed by the request body, so the same prompt/model/temperature replays the same response
+    def __init__(self, path=RECORDINGS_PATH, mode="record", replay_delay=True):
+        self.path = path
+        self.mode = mode
+        self.replay_delay = replay_delay
+        self._inner = httpx.HTTPTransport() if mode != "replay" else None
+        self._lock = threading.Lock()
+        self._responses = {}
+        if mode != "live" and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        recording = json.loads(line)
+                        self._responses[recording["key"]] = recording
+
+    @staticmethod
+    def request_key(request):
+        body = json.loads(request.content or b"{}")
+        return hashlib.sha256(json.dumps([request.url.path, body], sort_keys=True).encode("utf-8")).hexdigest()
+
+    def handle_request(self, request):
+        key = self.request_key(request) if self.mode != "live" else None
+        recording = self._responses.get(key)
+        if recording is not None:
+            if self.replay_delay:
+                time.sleep(recording["elapsed"])
+            return httpx.Response(
+                recording["status"], headers={"Content-Type": recording["content_type"]},
+                content=recording["body"].encode("utf-8"), request=request
+            )
+        if self.mode == "replay":
+            raise httpx.ConnectError(f"No recorded response for this request (key {key[:12]}); run with --mode record first", request=request)
+        started = time.perf_counter()
+        response = self._inner.handle_request(request)
+        body = response.read()
+        elapsed = time.perf_counter() - started
+        content_type = response.headers.get("Content-Type", "application/json")
+        if self.mode == "record" and response.status_code == 200:
+            recording = {"key": key, "status": 200, "content_type": content_type, "body": body.decode("utf-8"), "elapsed": round(elapsed, 3)}
+            with self._lock:
+                self._responses[key] = recording
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(recording) + "\n")
+        return httpx.Response(response.status_code, headers={"Content-Type": content_type}, content=body, request=request)
+
+
+def build_client(mode="record", recordings_path=RECORDINGS_PATH, replay_delay=True):
+    return openai.OpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY", "replay-only"),
+        max_retries=0,
+        http_client=httpx.Client(transport=RecordingTransport(recordings_path, mode, replay_delay), timeout=None)
+    )
+
+
+# --- Golden Set ---
+def normalize_status(status):
+    status = str(status).strip()
+    return STATUS_CODES.get(status.upper(), status) if len(status) == 1 else status
+
+
+def load_golden_set(path=GOLDEN_SET_PATH, include_unreviewed=False):
+    # Returns (policies, ids of unreviewed entries that were left out)
+    with open(path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    policies, unreviewed = [], []
+    for policy in golden["policies"]:
+        if not policy.get("reviewed", False) and not include_unreviewed:
+            unreviewed.append(policy["id"])
+            continue
+        text = policy.get("text")
+        if text is None:
+            with open(os.path.join(base_dir, policy["path"]), "r", encoding="utf-8") as f:
+                text = f.read()
+        expected = {item_id: normalize_status(status) for item_id, status in policy["expected"].items()}
+        policies.append({"id": policy["id"], "text": text, "expected": expected})
+    return policies, unreviewed
+
+
+def golden_coverage(policies):
+    # Checklist items without an expected status, per policy
+    all_items = [item["id"] for section in dpdpa_checklists.values() for item in section["items"]]
+    return {policy["id"]: [item_id for item_id in all_items if item_id not in policy["expected"]] for policy in policies}
+
+
+def bootstrap_golden_set(path=GOLDEN_DRAFT_PATH, limit=20):
+    # Labelling aid: drafts entries from documents checked in the app (latest GPT verdict per item)
+    # for a reviewer to correct. Every entry is marked "reviewed": false; a reviewer sets it to true
+    # once every status has been checked against the text.
+    latest = {}
+    verdicts, _ = load_verdicts()
+    for verdict in verdicts:
+        if verdict.get("origin", "gpt") == "gpt":
+            latest.setdefault(verdict["doc_hash"], {})[verdict["item_id"]] = verdict["status"]
+    item_count = sum(len(section["items"]) for section in dpdpa_checklists.values())
+    policies = []
+    for doc_hash, expected in sorted(latest.items(), key=lambda entry: -len(entry[1])):
+        text = load_document(doc_hash)
+        if text is None:
+            continue
+        policies.append({"id": doc_hash[:12], "text": text, "expected": expected, "reviewed": False})
+        if len(policies) >= limit:
+            break
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"policies": policies}, f, indent=2)
+    return len(policies), item_count
+
+
+# --- Running Strategies ---
+def strategy_options(strategy):
+    options = {"model": strategy.get("model", DEFAULT_SETTINGS["check_model"]), "record": False}
+    if strategy.get("cascade"):
+        cascade = strategy["cascade"] if isinstance(strategy["cascade"], dict) else {}
+        options["cascade_policy"] = {
+            "fast_model": cascade.get("fast_model", DEFAULT_SETTINGS["cascade_fast_model"]),
+            "strong_model": cascade.get("strong_model", DEFAULT_SETTINGS["cascade_strong_model"]),
+            "escalate_statuses": cascade.get("escalate_statuses", ["Partially Mentioned"]),
+            "min_confidence": cascade.get("min_confidence", 0.7)
+        }
+    for key in ("lean", "reuse_verdicts", "local_threshold"):
+        if strategy.get(key) is not None:
+            options[key] = strategy[key]
+    return options
+
+
+def run_policy(client, policy, strategy, timeout=RUN_TIMEOUT):
+    options = strategy_options(strategy)
+    token = RunToken(timeout)
+    started = time.perf_counter()
+    with usage_meter() as usage, call_lane("background"):
+        def start(sid):
+            return submit(analyze_policy_section, client, sid, dpdpa_checklists[sid]["items"], policy["text"], token=token, **options)
+
+        try:
+            if strategy.get("batching", "parallel") == "sequential":
+                results = [start(sid).result() for sid in dpdpa_checklists]
+            else:
+                futures = [start(sid) for sid in dpdpa_checklists]
+                results = [future.result() for future in futures]
+        except BaseException as e:
+            # Stop the policy's remaining sections; the caller records the policy as failed
+            token.cancel(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            token.finish()
+    return results, time.perf_counter() - started, dict(usage)
+
+
+def expected_score(section_id, expected):
+    statuses = [expected.get(item["id"]) for item in dpdpa_checklists[section_id]["items"]]
+    if any(status is None for status in statuses):
+        return None
+    return (statuses.count("Explicitly Mentioned") + 0.5 * statuses.count("Partially Mentioned")) / len(statuses)
+
+
+def score_run(results, expected):
+    compared = agreed = errors = 0
+    confusion = {}
+    score_errors = []
+    for result in results:
+        if result.get("Match Level") == "Error":
+            errors += 1
+            continue
+        for item in result["Matched Details"]:
+            want = expected.get(item["Checklist Item ID"])
+            if want is None:
+                continue
+            compared += 1
+            agreed += item["Status"] == want
+            confusion[f"{want} -> {item['Status']}"] = confusion.get(f"{want} -> {item['Status']}", 0) + 1
+        target = expected_score(result["Section"], expected)
+        if target is not None:
+            score_errors.append(abs(result["Compliance Score"] - target))
+    return {"compared": compared, "agreed": agreed, "errors": errors, "score_errors": score_errors, "confusion": confusion}
+
+
+def run_harness(client, policies, strategies):
+    report = {}
+    for name, strategy in strategies.items():
+        runs, failed = [], []
+        for policy in policies:
+            # One cancelled run or API error fails that policy, not the whole strategy
+            try:
+                results, latency, usage = run_policy(client, policy, strategy)
+            except Exception as e:
+                failed.append({"policy": policy["id"], "error": f"{type(e).__name__}: {e}"})
+                continue
+            runs.append({"policy": policy["id"], "latency": latency, "usage": usage, **score_run(results, policy["expected"])})
+        compared = sum(run["compared"] for run in runs)
+        score_errors = [error for run in runs for error in run["score_errors"]]
+        latencies = sorted(run["latency"] for run in runs)
+        confusion = {}
+        for run in runs:
+            for key, count in run["confusion"].items():
+                confusion[key] = confusion.get(key, 0) + count
+        report[name] = {
+            "strategy": strategy,
+            "agreement": round(sum(run["agreed"] for run in runs) / compared, 4) if compared else None,
+            "items_compared": compared,
+            "score_mae": round(statistics.mean(score_errors), 4) if score_errors else None,
+            "section_errors": sum(run["errors"] for run in runs),
+            "failed_policies": failed,
+            "latency_mean_s": round(statistics.mean(latencies), 2) if latencies else None,
+            "latency_p95_s": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2) if latencies else None,
+            "llm_calls": sum(run["usage"]["calls"] for run in runs),
+            "prompt_tokens": sum(run["usage"]["prompt_tokens"] for run in runs),
+            "completion_tokens": sum(run["usage"]["completion_tokens"] for run in runs),
+            "tokens_estimated": any(run["usage"]["estimated_calls"] for run in runs),
+            "disagreements": {key: count for key, count in sorted(confusion.items(), key=lambda entry: -entry[1]) if key.split(" -> ")[0] != key.split(" -> ")[1]},
+            "policies": [{key: value for key, value in run.items() if key != "confusion"} for run in runs]
+        }
+    return report
+
+
+def format_report(report, baseline=None):
+    columns = ["Strategy", "Agreement", "Δ vs base", "Score MAE", "Errors", "Failed", "Latency mean (s)", "p95 (s)", "Calls", "Prompt tok", "Output tok"]
+    base = report.get(baseline) if baseline else None
+    rows = []
+    for name, entry in report.items():
+        delta = ""
+        if base and name != baseline and entry["agreement"] is not None and base["agreement"] is not None:
+            delta = f"{entry['agreement'] - base['agreement']:+.1%}"
+        rows.append([
+            name,
+            f"{entry['agreement']:.1%}" if entry["agreement"] is not None else "-",
+            delta,
+            f"{entry['score_mae']:.3f}" if entry["score_mae"] is not None else "-",
+            str(entry["section_errors"]),
+            str(len(entry["failed_policies"])),
+            f"{entry['latency_mean_s']:.2f}" if entry["latency_mean_s"] is not None else "-",
+            f"{entry['latency_p95_s']:.2f}" if entry["latency_p95_s"] is not None else "-",
+            str(entry["llm_calls"]),
+            f"{entry['prompt_tokens']}{'~' if entry['tokens_estimated'] else ''}",
+            f"{entry['completion_tokens']}{'~' if entry['tokens_estimated'] else ''}"
+        ])
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+    if any(entry["tokens_estimated"] for entry in report.values()):
+        lines.append("~ token counts estimated (the server did not report usage)")
+    for name, entry in report.items():
+        for failure in entry["failed_policies"]:
+            lines.append(f"{name}: {failure['policy']} failed ({failure['error']})")
+        top = list(entry["disagreements"].items())[:3]
+        if top:
+            lines.append(f"{name}: most common disagreements (expected -> got): " + "; ".join(f"{key} ×{count}" for key, count in top))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare accuracy, latency and tokens of checker strategies on a golden set.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run strategies over the golden set.")
+    run_parser.add_argument("--golden", default=GOLDEN_SET_PATH)
+    run_parser.add_argument("--include-unreviewed", action="store_true", help="Also run entries not yet marked as reviewed.")
+    run_parser.add_argument("--strategies", default=",".join(DEFAULT_STRATEGIES), help=f"Comma-separated, from: {', '.join(STRATEGIES)}")
+    run_parser.add_argument("--strategy-file", help="JSON object of extra named strategies (model, cascade, lean, local_threshold, reuse_verdicts, batching).")
+    run_parser.add_argument("--mode", choices=REPLAY_MODES, default="record", help="live: always call the API; record: replay what is recorded and record the rest; replay: offline only.")
+    run_parser.add_argument("--recordings", default=RECORDINGS_PATH)
+    run_parser.add_argument("--no-replay-delay", action="store_true", help="Replay instantly instead of with the recorded per-call latency.")
+    run_parser.add_argument("--report", help="Optional path for the JSON report.")
+
+    bootstrap_parser = subparsers.add_parser("bootstrap", help="Draft a golden set from policies checked in the app, for review.")
+    bootstrap_parser.add_argument("--out", default=GOLDEN_DRAFT_PATH)
+    bootstrap_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "bootstrap":
+        count, item_count = bootstrap_golden_set(args.out, args.limit)
+        print(f"Wrote {count} draft golden-set entries to {args.out}. Review every status (and fill in any of the {item_count} items that are missing), then set \"reviewed\": true on the entry and copy it into {GOLDEN_SET_PATH}.")
+    else:
+        strategies = dict(STRATEGIES)
+        if args.strategy_file:
+            with open(args.strategy_file, "r", encoding="utf-8") as f:
+                strategies.update(json.load(f))
+        names = [name.strip() for name in args.strategies.split(",") if name.strip()]
+        unknown = [name for name in names if name not in strategies]
+        if unknown:
+            parser.error(f"Unknown strategies: {', '.join(unknown)}")
+
+        policies, unreviewed = load_golden_set(args.golden, args.include_unreviewed)
+        if unreviewed:
+            print(f"warning: skipping {len(unreviewed)} unreviewed entr{'y' if len(unreviewed) == 1 else 'ies'} (pass --include-unreviewed to run them): {', '.join(unreviewed[:8])}{' ...' if len(unreviewed) > 8 else ''}")
+        if not policies:
+            parser.error(f"No reviewed policies in {args.golden}")
+        for policy_id, missing in golden_coverage(policies).items():
+            if missing:
+                print(f"warning: {policy_id} has no expected status for {len(missing)} item(s): {', '.join(missing[:8])}{' ...' if len(missing) > 8 else ''}")
+        set_call_context("harness", "background")
+        client = build_client(args.mode, args.recordings, not args.no_replay_delay)
+        report = run_harness(client, policies, {name: strategies[name] for name in names})
+        print(format_report(report, baseline=names[0]))
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
@@ -0,0 +1,150 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
+# --- Run Deadlines & Cancellation ---
+# Every compliance check / generation run gets a RunToken with a deadline. LLM calls run on a
+# shared worker pool while the script thread waits and keeps touching the page (heartbeat);
+# when Streamlit abandons the script (rerun after an input change, or the session closes) the
+# heartbeat raises inside the script thread, the token is cancelled, and the worker closes the
+# streaming response so the API stops generating.
+RUN_TIMEOUT = float(os.environ.get("DPDPA_RUN_TIMEOUT", 600))
+RUN_WORKERS = int(os.environ.get("DPDPA_RUN_WORKERS", 32))
+HEARTBEAT_INTERVAL = 0.5
+
+# The (tenant, lane) every LLM call is scheduled under (see llm_client). Each lane gets its own
+# worker pool: background work blocked waiting for a concurrency slot holds only background
+# workers, so an interactive call never queues behind it for a thread.
+call_context = contextvars.ContextVar("llm_call_context", default=("default", "interactive"))
+_queue_delay = contextvars.ContextVar("run_queue_delay", default=0.0)
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+class CallCancelled(Exception):
+    pass
+
+
+class RunToken:
+    def __init__(self, timeout=None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.reason = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._timer = None
+        if timeout:
+            self._timer = threading.Timer(timeout, self.cancel, args=(f"deadline of {timeout:g}s exceeded",))
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="cancelled"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        if self._timer is not None:
+            self._timer.cancel()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def finish(self):
+        # The run completed; stop the deadline timer without cancelling anything
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        if self._event.is_set():
+            raise CallCancelled(self.reason)
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def _executor_for(lane):
+    with _executors_lock:
+        if lane not in _executors:
+            _executors[lane] = ThreadPoolExecutor(max_workers=RUN_WORKERS, thread_name_prefix=f"llm-run-{lane}")
+        return _executors[lane]
+
+
+def _run_submitted(submitted, fn, *args, **kwargs):
+    _queue_delay.set(time.perf_counter() - submitted)
+    return fn(*args, **kwargs)
+
+
+def submit(fn, *args, **kwargs):
+    # Workers run in a copy of the caller's context, so tracing spans keep their parent
+    # and calls keep the caller's tenant and lane
+    lane = call_context.get()[1]
+    return _executor_for(lane).submit(contextvars.copy_context().run, _run_submitted, time.perf_counter(), fn, *args, **kwargs)
+
+
+def take_queue_delay():
+    # How long the current task waited for a worker thread; counted once, by its first LLM call
+    delay = _queue_delay.get()
+    _queue_delay.set(0.0)
+    return delay
+
+
+def await_result(future, token, heartbeat=None):
+    # Called from the script thread. heartbeat() must write to the page: that is where
+    # Streamlit raises its stop/rerun exceptions, which cancel the token here.
+    while True:
+        try:
+            return future.result(timeout=HEARTBEAT_INTERVAL)
+        except FutureTimeout:
+            pass
+        token.check()
+        if heartbeat is not None:
+            try:
+                heartbeat()
+            except BaseException:
+                token.cancel("run abandoned")
+                raise
+
+
+def await_each(futures, token, heartbeat=None):
+    # await_result for several futures: yields each one as soon as it finishes
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=HEARTBEAT_INTERVAL, return_when=FIRST_COMPLETED)
+        yield from done
+        if not pending:
+            return
+        token.check()
+        if heartbeat is not None:
+            try:
+                heartbeat()
+            except BaseException:
+                token.cancel("run abandoned")
+                raise
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+
+import tracing
+from compliance_engine import details_cache
+from export_service import artifact_cache
+from knowledge_base import retrieval_cache, synthesis_cache
+from llm_client import MAX_CONCURRENT_CALLS, REQUEST_TIMEOUT, set_concurrency, set_request_timeout
+from run_control import RUN_TIMEOUT
+from speculation import set_budget as set_speculative_budget
+from text_store import MEMORY_BUDGET_MB, get_text_store
+from verdict_store import DATA_DIR
+
+# --- Runtime Settings ---
+# Tunables edited on the Admin Settings page. Stored as JSON next to the other runtime data and
+# re-applied whenever the file changes, so every session (and every server process sharing the
+# data directory) picks up a change on its next rerun without a restart.
+SETTINGS_PATH = os.path.join(DATA_DIR, "settings.json")
+BATCHING_MODES = ["parallel", "sequential"]
+
+DEFAULT_SETTINGS = {
+    "check_model": "gpt-4",
+    "cascade_fast_model": "gpt-4o-mini",
+    "cascade_strong_model": "gpt-4",
+    "generator_model": "gpt-4",
+    "assistant_model": "gpt-4",
+    "generator_temperature": 0.5,
+    "llm_concurrency": MAX_CONCURRENT_CALLS,
+    "batching_mode": "parallel",
+    "request_timeout": REQUEST_TIMEOUT.read,
+    "run_timeout": RUN_TIMEOUT,
+    "speculative_checks": False,
+    "speculative_budget": 60,
+    "retrieval_cache_size": retrieval_cache.max_size,
+    "retrieval_cache_ttl": retrieval_cache.ttl,
+    "synthesis_cache_size": synthesis_cache.max_size,
+    "synthesis_cache_ttl": synthesis_cache.ttl,
+    "artifact_cache_size": artifact_cache.max_size,
+    "artifact_cache_ttl": artifact_cache.ttl,
+    "details_cache_size": details_cache.max_size,
+    "details_cache_ttl": details_cache.ttl,
+    "text_memory_mb": MEMORY_BUDGET_MB,
+    "tracing": tracing.enabled()
+}
+
+_lock = threading.Lock()
+# "mtime" is None when there is no settings file; _NOT_LOADED makes the first call apply the
+# defaults to the services even on a fresh install
+_NOT_LOADED = object()
+_state = {"settings": dict(DEFAULT_SETTINGS), "mtime": _NOT_LOADED}
+
+
+def validate_settings(values):
+    # Unknown keys are dropped; values are coerced to the type of their default
+    settings = dict(DEFAULT_SETTINGS)
+    for key, default in DEFAULT_SETTINGS.items():
+        if key not in values:
+            continue
+        value = values[key]
+        if isinstance(default, bool):
+            settings[key] = bool(value)
+        elif isinstance(default, int):
+            settings[key] = max(1, int(value))
+        elif isinstance(default, float):
+            settings[key] = max(0.0, float(value))
+        else:
+            settings[key] = str(value).strip() or default
+    if settings["batching_mode"] not in BATCHING_MODES:
+        settings["batching_mode"] = DEFAULT_SETTINGS["batching_mode"]
+    return settings
+
+
+def apply_settings(settings):
+    set_concurrency(settings["llm_concurrency"])
+    set_request_timeout(settings["request_timeout"])
+    set_speculative_budget(settings["speculative_budget"] if settings["speculative_checks"] else 0)
+    retrieval_cache.resize(settings["retrieval_cache_size"], settings["retrieval_cache_ttl"])
+    synthesis_cache.resize(settings["synthesis_cache_size"], settings["synthesis_cache_ttl"])
+    artifact_cache.resize(settings["artifact_cache_size"], settings["artifact_cache_ttl"])
+    details_cache.resize(settings["details_cache_size"], settings["details_cache_ttl"])
+    get_text_store().set_memory_budget(settings["text_memory_mb"])
+    tracing.set_enabled(settings["tracing"])
+
+
+def get_settings():
+    # Cheap on every rerun: one stat() call unless the file changed
+    mtime = os.path.getmtime(SETTINGS_PATH) if os.path.exists(SETTINGS_PATH) else None
+    with _lock:
+        if mtime != _state["mtime"]:
+            values = {}
+            if mtime is not None:
+                try:
+                    with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+                        values = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    values = {}
+            _state["settings"] = validate_settings(values)
+            _state["mtime"] = mtime
+            apply_settings(_state["settings"])
+        return dict(_state["settings"])
+
+
+def save_settings(values):
+    settings = validate_settings(values)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = f"{SETTINGS_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+    os.replace(tmp_path, SETTINGS_PATH)
+    return get_settings()
+
+
+def reset_settings():
+    if os.path.exists(SETTINGS_PATH):
+        os.remove(SETTINGS_PATH)
+    return get_settings()
@@ -0,0 +1,115 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from run_control import RunToken, submit
+
+# --- Speculative Pre-evaluation ---
+# While an analyst reviews the extracted text and picks a section, the checker can already
+# evaluate every section in the background. A run is keyed by the policy text and the check
+# options; any change cancels it and starts a new one. When "Run Compliance Check" is clicked,
+# finished sections are used as-is, running ones are awaited and the rest are evaluated
+# normally. Speculative work runs only a few sections at a time and draws on a process-wide
+# hourly budget of section evaluations, so abandoned uploads cannot burn the API quota.
+SPECULATIVE_PARALLEL = 2
+BUDGET_WINDOW = 3600
+
+_lock = threading.Lock()
+_budget = {"limit": 60, "window_start": time.time(), "used": 0}
+_stats = {"runs": 0, "sections": 0, "used": 0, "cancelled": 0, "over_budget": 0}
+
+
+def set_budget(limit):
+    with _lock:
+        _budget["limit"] = max(0, int(limit))
+
+
+def _take_budget():
+    with _lock:
+        now = time.time()
+        if now - _budget["window_start"] >= BUDGET_WINDOW:
+            _budget["window_start"], _budget["used"] = now, 0
+        if _budget["used"] >= _budget["limit"]:
+            _stats["over_budget"] += 1
+            return False
+        _budget["used"] += 1
+        _stats["sections"] += 1
+        return True
+
+
+class SpeculativeRun:
+    def __init__(self, key, section_ids, evaluate, timeout=None, parallel=SPECULATIVE_PARALLEL):
+        # evaluate(section_id, token) -> section result
+        self.key = key
+        self.token = RunToken(timeout)
+        self._evaluate = evaluate
+        self._pending = list(section_ids)
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._drainers = min(parallel, len(self._pending))
+        with _lock:
+            _stats["runs"] += 1
+        for _ in range(self._drainers):
+            submit(self._drain)
+
+    def _next(self):
+        with self._lock:
+            if self._pending and not self.token.cancelled and _take_budget():
+                section_id = self._pending.pop(0)
+                future = self._futures[section_id] = Future()
+                return section_id, future
+            # Out of sections, cancelled or over budget: this drainer stops
+            self._pending.clear()
+            self._drainers -= 1
+            if self._drainers == 0:
+                # The evaluate closure captures the policy text; drop it so the run kept in
+                # session_state does not hold a copy after it is done
+                self._evaluate = None
+                self.token.finish()
+            return None, None
+
+    def _drain(self):
+        while True:
+            section_id, future = self._next()
+            if section_id is None:
+                return
+            try:
+                future.set_result(self._evaluate(section_id, self.token))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def claim(self, section_id):
+        # The section's future if speculation already started it; otherwise the caller runs it
+        with self._lock:
+            if section_id in self._pending:
+                self._pending.remove(section_id)
+            future = self._futures.get(section_id)
+        if future is not None:
+            with _lock:
+                _stats["used"] += 1
+        return future
+
+    def done_count(self):
+        with self._lock:
+            return sum(future.done() and future.exception() is None for future in self._futures.values())
+
+    def cancel(self, reason="policy text or check options changed"):
+        with self._lock:
+            unfinished = bool(self._pending) or not all(future.done() for future in self._futures.values())
+            self._pending.clear()
+        if unfinished and not self.token.cancelled:
+            with _lock:
+                _stats["cancelled"] += 1
+        self.token.cancel(reason)
+
+
+def speculation_stats():
+    with _lock:
+        return {
+            "Speculative Runs": _stats["runs"],
+            "Sections Pre-evaluated": _stats["sections"],
+            "Pre-evaluated Sections Used": _stats["used"],
+            "Runs Cancelled": _stats["cancelled"],
+            "Skipped (Budget)": _stats["over_budget"],
+            "Budget Used This Hour": f"{_budget['used']} / {_budget['limit']}"
+        }
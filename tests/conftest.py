@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Runtime data (verdicts, drafts, settings) goes to a throwaway directory, not .dpdpa_data
+os.environ.setdefault("DPDPA_DATA_DIR", tempfile.mkdtemp(prefix="dpdpa-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
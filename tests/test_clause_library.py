@@ -0,0 +1,85 @@
+import pytest
+
+from clause_library import assemble_sections, build_clause_context, build_sections, split_sections
+
+
+def make_context(**overrides):
+    fields = {
+        "policy_type": "Privacy Policy",
+        "org_name": "Acme Retail",
+        "sector": "E-commerce",
+        "data_types_final": ["Name", "Email", "Phone Number"],
+        "children_data": "No",
+        "lawful_purpose": "To process orders and provide customer support.",
+        "consent_type": "Explicit Consent",
+        "legitimate_use": ["None of the Above"],
+        "retention_period": "Two years after the last order.",
+        "cross_border": "No",
+        "grievance_email": "grievance@acme.example"
+    }
+    fields.update(overrides)
+    return build_clause_context(**fields)
+
+
+def stored(sections):
+    # What the app keeps in session_state between reruns: the text lives only in the editor
+    return [{key: section[key] for key in ("id", "title", "fingerprint")} for section in sections]
+
+
+def edit_and_rebuild(sections, draft, context):
+    edited = split_sections(draft, stored(sections))
+    previous = [dict(section, text=edited[section["id"]]) for section in stored(sections)]
+    return build_sections(context, previous=previous)
+
+
+def test_assemble_and_split_round_trip():
+    sections, regenerated = build_sections(make_context())
+    assert regenerated == [section["id"] for section in sections]
+    texts = split_sections(assemble_sections(sections), stored(sections))
+    assert texts == {section["id"]: section["text"] for section in sections}
+
+
+@pytest.mark.parametrize("consent_type, wording", [
+    ("Explicit Consent", "clear affirmative action of the Data Principal"),
+    ("Deemed Consent", "has not indicated that they do not consent"),
+    ("Notice Only (limited use cases)", "on the basis of notice only")
+])
+def test_consent_section_follows_the_selected_consent_type(consent_type, wording):
+    # The values are the consent type select box options in the generator form
+    sections, _ = build_sections(make_context(consent_type=consent_type))
+    assert wording in next(section["text"] for section in sections if section["id"] == "consent")
+
+
+def test_regenerate_keeps_user_edits_in_unchanged_sections():
+    context = make_context()
+    sections, _ = build_sections(context)
+    purpose = next(section for section in sections if section["id"] == "purpose")
+    draft = assemble_sections(sections).replace(purpose["text"], purpose["text"] + "\nAdded by the reviewer.")
+
+    rebuilt, regenerated = edit_and_rebuild(sections, draft, make_context(retention_period="Five years."))
+    assert regenerated == ["retention"]
+    by_id = {section["id"]: section for section in rebuilt}
+    assert by_id["purpose"]["text"].endswith("Added by the reviewer.")
+    assert "Five years" in by_id["retention"]["text"]
+
+
+def test_unchanged_inputs_regenerate_nothing():
+    context = make_context()
+    sections, _ = build_sections(context)
+    rebuilt, regenerated = edit_and_rebuild(sections, assemble_sections(sections), context)
+    assert regenerated == []
+    assert assemble_sections(rebuilt) == assemble_sections(sections)
+
+
+def test_conditional_section_is_added_when_its_input_turns_on():
+    sections, _ = build_sections(make_context())
+    assert "children" not in [section["id"] for section in sections]
+    rebuilt, regenerated = edit_and_rebuild(sections, assemble_sections(sections), make_context(children_data="Yes"))
+    assert "children" in regenerated
+    assert "children" in [section["id"] for section in rebuilt]
+
+
+def test_renamed_heading_cannot_be_split():
+    sections, _ = build_sections(make_context())
+    draft = assemble_sections(sections).replace(f"1. {sections[0]['title']}", "1. Something Else")
+    assert split_sections(draft, stored(sections)) is None
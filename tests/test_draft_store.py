@@ -0,0 +1,76 @@
+import json
+import random
+
+import pytest
+
+from draft_store import SNAPSHOT_INTERVAL, DraftStore, apply_delta, make_delta
+
+
+@pytest.mark.parametrize("previous, current", [
+    ("", ""),
+    ("", "first line\nsecond line"),
+    ("one\ntwo\nthree\n", ""),
+    ("one\ntwo\nthree\n", "one\n2\nthree\nfour\n"),
+    ("no trailing newline", "no trailing newline\n"),
+    ("a\nb\nc", "c\nb\na"),
+    ("line\r\nwindows\r\n", "line\r\nwindows edited\r\n")
+])
+def test_delta_round_trips(previous, current):
+    ops = make_delta(previous, current)
+    assert apply_delta(previous, json.loads(json.dumps(ops))) == current
+
+
+def test_delta_round_trips_random_edits():
+    rng = random.Random(7)
+    lines = [f"clause {i}: {'x' * rng.randint(0, 40)}\n" for i in range(60)]
+    for _ in range(50):
+        edited = list(lines)
+        for _ in range(rng.randint(1, 6)):
+            position = rng.randrange(len(edited) + 1)
+            action = rng.choice(["insert", "delete", "replace"])
+            if action == "insert":
+                edited.insert(position, f"inserted {rng.random()}\n")
+            elif edited and position < len(edited):
+                if action == "delete":
+                    del edited[position]
+                else:
+                    edited[position] = f"replaced {rng.random()}\n"
+        previous, current = "".join(lines), "".join(edited)
+        assert apply_delta(previous, make_delta(previous, current)) == current
+        lines = edited
+
+
+def test_unchanged_lines_are_copied_not_stored():
+    previous = "".join(f"line {i}\n" for i in range(100))
+    current = previous.replace("line 50\n", "line fifty\n")
+    ops = make_delta(previous, current)
+    assert [op for op in ops if isinstance(op, str)] == ["line fifty\n"]
+
+
+def test_store_restores_every_version_across_snapshots(tmp_path):
+    store = DraftStore(str(tmp_path / "drafts.db"))
+    contents = []
+    lines = [f"Section {i}\n" for i in range(30)]
+    for version in range(1, 2 * SNAPSHOT_INTERVAL + 3):
+        lines[version % len(lines)] = f"Section {version % len(lines)} rev {version}\n"
+        text = "".join(lines)
+        draft_id, saved = store.save("Acme policy", text, organisation="Acme")
+        assert saved == version
+        contents.append(text)
+
+    assert store.save("Acme policy", text, organisation="Acme") == (draft_id, len(contents))
+    for version, content in enumerate(contents, start=1):
+        assert store.load(draft_id, version) == content
+    assert store.load(draft_id) == contents[-1]
+    snapshots = [row["version"] for row in store.versions(draft_id) if row["is_snapshot"]]
+    assert sorted(snapshots) == [1, SNAPSHOT_INTERVAL + 1, 2 * SNAPSHOT_INTERVAL + 1]
+
+
+def test_search_matches_wildcard_characters_literally(tmp_path):
+    store = DraftStore(str(tmp_path / "drafts.db"))
+    for name in ["Retention 50% policy", "Retention 500 policy", "data_subject rights", "dataXsubject rights", "back\\slash"]:
+        store.save(name, "text")
+    assert [draft["name"] for draft in store.list(search="50%")[0]] == ["Retention 50% policy"]
+    assert [draft["name"] for draft in store.list(search="data_subject")[0]] == ["data_subject rights"]
+    assert [draft["name"] for draft in store.list(search="back\\slash")[0]] == ["back\\slash"]
+    assert store.list(search="Retention")[1] == 2
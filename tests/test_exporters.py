@@ -0,0 +1,23 @@
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from exporters import available_formats, export_bytes, iter_evaluation_rows
+
+RESULTS = [{
+    "Section": "4",
+    "Match Level": "Partially Compliant",
+    "Compliance Score": 0.5,
+    "Matched Details": [
+        {"Checklist Item ID": "4.1", "Checklist Text": "Processed as per the Act", "Status": "Explicitly Mentioned", "Justification": "Clause 1.1"},
+        {"Checklist Item ID": "4.2", "Checklist Text": "Lawful purpose", "Status": "Missing", "Justification": "Not stated"}
+    ]
+}]
+
+
+@pytest.mark.parametrize("fmt", available_formats())
+def test_combined_export_is_accepted_by_download_button(fmt):
+    # The Combined download buttons pass a callable returning export_bytes(...) to st.download_button
+    data, _ = convert_data_to_bytes_and_infer_mime(export_bytes(fmt, iter_evaluation_rows(RESULTS)), RuntimeError(f"unsupported {fmt}"))
+    assert data
+    if fmt == "CSV":
+        assert data.decode("utf-8").splitlines()[0].startswith("Section,Checklist Item ID")
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from llm_client import MAX_CONCURRENT_CALLS, call_lane, complete, get_client, lane_stats, reset_lane_stats, set_call_context, set_concurrency
+from mock_llm_server import start_mock_server
+from run_control import RUN_WORKERS, RunToken, submit
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    server = start_mock_server(latency=1.0)
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    yield get_client(f"sk-lanes-{server.server_address[1]}")
+    server.shutdown()
+
+
+def lane_row(lane):
+    return next(row for row in lane_stats() if row["Lane"] == lane)
+
+
+def test_interactive_call_does_not_queue_behind_background_batch(mock_client):
+    # 60 background calls with 16 slots used to fill the shared worker pool, so a single
+    # interactive call waited several seconds for a thread before reaching the scheduler
+    set_concurrency(16)
+    set_call_context("batch-user")
+    batch_token = RunToken()
+    try:
+        with call_lane("background"):
+            batch = [
+                submit(complete, mock_client, token=batch_token, model="gpt-4", messages=[{"role": "user", "content": f"background {i}"}])
+                for i in range(60)
+            ]
+        time.sleep(0.3)
+
+        set_call_context("analyst")
+        started = time.perf_counter()
+        answer = submit(complete, mock_client, model="gpt-4", messages=[{"role": "user", "content": "interactive"}]).result(timeout=30)
+        elapsed = time.perf_counter() - started
+
+        assert answer
+        assert elapsed < 2.0
+        assert lane_row("interactive")["Max Wait (ms)"] < 1000
+    finally:
+        batch_token.cancel("test finished")
+        for future in batch:
+            future.exception(timeout=30)
+        set_concurrency(MAX_CONCURRENT_CALLS)
+        set_call_context("default")
+
+
+def test_wait_includes_time_waiting_for_a_worker(mock_client):
+    # Every background worker is busy for a second, so the call below waits that long for a
+    # thread before it asks for a (free) concurrency slot; that second must count as wait
+    set_call_context("worker-wait")
+    busy = []
+    try:
+        with call_lane("background"):
+            busy += [submit(time.sleep, 1.0) for _ in range(RUN_WORKERS)]
+            time.sleep(0.1)
+            reset_lane_stats()
+            future = submit(complete, mock_client, model="gpt-4", messages=[{"role": "user", "content": "queued"}])
+        future.result(timeout=30)
+        row = lane_row("background")
+        assert row["Calls"] == 1
+        assert row["Max Wait (ms)"] >= 800
+    finally:
+        for task in busy:
+            task.result(timeout=30)
+        set_call_context("default")
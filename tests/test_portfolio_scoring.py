@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pytest
+
+from portfolio_scoring import (EXPLICIT, ITEM_KEYS, MISSING, NOT_CHECKED, PARTIAL, SECTION_IDS, match_levels, rank_gaps,
+                               score_portfolio)
+
+
+def row_wise_scores(codes, partial_credit, item_weights, section_weights):
+    # Reference: one document and one section at a time
+    credit = {MISSING: 0.0, PARTIAL: partial_credit, EXPLICIT: 1.0, NOT_CHECKED: 0.0}
+    section_scores, document_scores = [], []
+    for row in codes:
+        scores = []
+        for sid in SECTION_IDS:
+            cols = [col for col, (item_sid, _) in enumerate(ITEM_KEYS) if item_sid == sid]
+            if all(row[col] == NOT_CHECKED for col in cols):
+                scores.append(math.nan)
+                continue
+            earned = sum(item_weights[col] * credit[row[col]] for col in cols)
+            scores.append(earned / sum(item_weights[col] for col in cols))
+        checked = [(score, weight) for score, weight in zip(scores, section_weights) if not math.isnan(score)]
+        document_scores.append(sum(score * weight for score, weight in checked) / sum(weight for _, weight in checked) if checked else math.nan)
+        section_scores.append(scores)
+    return np.array(section_scores), np.array(document_scores)
+
+
+def random_codes(rng, documents):
+    codes = rng.choice([MISSING, PARTIAL, EXPLICIT], size=(documents, len(ITEM_KEYS))).astype(np.int8)
+    for row in codes:
+        # Leave some sections unchecked and some items within checked sections without a verdict
+        for s in range(len(SECTION_IDS)):
+            cols = [col for col, (sid, _) in enumerate(ITEM_KEYS) if sid == SECTION_IDS[s]]
+            if rng.random() < 0.3:
+                row[cols] = NOT_CHECKED
+            elif rng.random() < 0.3:
+                row[cols[0]] = NOT_CHECKED
+    return codes
+
+
+@pytest.mark.parametrize("partial_credit, weighted", [(0.5, False), (0.25, True), (1.0, True)])
+def test_vectorised_scores_match_row_wise(partial_credit, weighted):
+    rng = np.random.default_rng(48)
+    codes = random_codes(rng, 40)
+    item_weights = rng.uniform(0.5, 3.0, len(ITEM_KEYS)) if weighted else np.ones(len(ITEM_KEYS))
+    section_weights = rng.uniform(0.5, 3.0, len(SECTION_IDS)) if weighted else np.ones(len(SECTION_IDS))
+
+    section_scores, document_scores = score_portfolio(codes, partial_credit, item_weights, section_weights)
+    expected_sections, expected_documents = row_wise_scores(codes, partial_credit, item_weights, section_weights)
+    np.testing.assert_allclose(section_scores, expected_sections, equal_nan=True)
+    np.testing.assert_allclose(document_scores, expected_documents, equal_nan=True)
+
+
+def test_unchecked_sections_are_nan_and_excluded():
+    codes = np.full((2, len(ITEM_KEYS)), NOT_CHECKED, dtype=np.int8)
+    first_section = [col for col, (sid, _) in enumerate(ITEM_KEYS) if sid == SECTION_IDS[0]]
+    codes[0, first_section] = EXPLICIT
+    section_scores, document_scores = score_portfolio(codes)
+    assert section_scores[0, 0] == 1.0 and np.isnan(section_scores[0, 1:]).all()
+    assert document_scores[0] == 1.0
+    assert np.isnan(document_scores[1])
+    assert list(match_levels(section_scores[0, :2])) == ["Fully Compliant", "Not Checked"]
+
+
+def test_gap_ranking_puts_most_missed_item_first():
+    codes = np.full((3, len(ITEM_KEYS)), EXPLICIT, dtype=np.int8)
+    codes[:, 5] = MISSING
+    codes[0, 9] = PARTIAL
+    gaps = rank_gaps(codes)
+    assert (gaps.iloc[0]["Section"], gaps.iloc[0]["Checklist Item ID"]) == ITEM_KEYS[5]
+    assert gaps.iloc[0]["Missing Rate"] == 1.0
+    assert (gaps.iloc[1]["Section"], gaps.iloc[1]["Checklist Item ID"]) == ITEM_KEYS[9]
@@ -0,0 +1,37 @@
+import json
+
+import regression_harness
+from regression_harness import golden_coverage, load_golden_set, run_harness
+from run_control import CallCancelled
+
+
+def test_committed_golden_set_is_reviewed_and_covers_every_item():
+    policies, unreviewed = load_golden_set()
+    assert policies and not unreviewed
+    assert all(not missing for missing in golden_coverage(policies).values())
+
+
+def test_unreviewed_entries_are_skipped_unless_asked_for(tmp_path):
+    path = tmp_path / "golden.json"
+    path.write_text(json.dumps({"policies": [
+        {"id": "draft", "text": "We collect your email.", "reviewed": False, "expected": {"4.1": "M"}},
+        {"id": "checked", "text": "We collect your email.", "reviewed": True, "expected": {"4.1": "M"}}
+    ]}))
+    policies, unreviewed = load_golden_set(str(path))
+    assert [policy["id"] for policy in policies] == ["checked"] and unreviewed == ["draft"]
+    policies, unreviewed = load_golden_set(str(path), include_unreviewed=True)
+    assert len(policies) == 2 and not unreviewed
+
+
+def test_failed_policy_is_recorded_and_the_run_continues(monkeypatch):
+    def run_policy(client, policy, strategy):
+        if policy["id"] == "slow":
+            raise CallCancelled("run timed out")
+        return [], 0.5, {"calls": 1, "prompt_tokens": 10, "completion_tokens": 5, "estimated_calls": 0}
+
+    monkeypatch.setattr(regression_harness, "run_policy", run_policy)
+    policies = [{"id": "slow", "text": "", "expected": {}}, {"id": "fast", "text": "", "expected": {}}]
+    entry = run_harness(None, policies, {"baseline": {}})["baseline"]
+    assert entry["failed_policies"] == [{"policy": "slow", "error": "CallCancelled: run timed out"}]
+    assert [run["policy"] for run in entry["policies"]] == ["fast"]
+    assert entry["llm_calls"] == 1
@@ -0,0 +1,19 @@
+import os
+
+import runtime_settings
+import speculation
+from runtime_settings import DEFAULT_SETTINGS, SETTINGS_PATH, get_settings
+from text_store import get_text_store
+
+
+def test_defaults_are_applied_on_first_call_without_a_settings_file(monkeypatch):
+    if os.path.exists(SETTINGS_PATH):
+        os.remove(SETTINGS_PATH)
+    monkeypatch.setattr(runtime_settings, "_state", {"settings": dict(DEFAULT_SETTINGS), "mtime": runtime_settings._NOT_LOADED})
+    speculation.set_budget(999)
+    get_text_store().set_memory_budget(1)
+
+    get_settings()
+    expected_budget = DEFAULT_SETTINGS["speculative_budget"] if DEFAULT_SETTINGS["speculative_checks"] else 0
+    assert speculation._budget["limit"] == expected_budget
+    assert get_text_store().memory_budget == DEFAULT_SETTINGS["text_memory_mb"] * 1024 * 1024
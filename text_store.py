@@ -0,0 +1,248 @@
+import atexit
+import gzip
+import hashlib
+import os
+import shutil
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+from verdict_store import DATA_DIR
+
+# --- Shared Text Store ---
+# Large texts held by sessions (extracted policies, generated drafts) are stored once per
+# content hash and reference-counted. Sessions hold a SessionTexts object in session_state
+# that maps slot names to content keys; replacing a slot releases the old content, and when
+# Streamlit drops a closed session the object is garbage-collected and all its references
+# are released. Texts are kept in memory up to a byte budget, least recently used first;
+# colder ones spill to a per-process directory on disk and are read back on access.
+TEXT_STORE_DIR = os.path.join(DATA_DIR, "text_store")
+MEMORY_BUDGET_MB = int(os.environ.get("DPDPA_TEXT_MEMORY_MB", 128))
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TextStore:
+    def __init__(self, root=TEXT_STORE_DIR, memory_budget_mb=MEMORY_BUDGET_MB):
+        self.root = root
+        self.spill_dir = os.path.join(root, str(os.getpid()))
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hot = OrderedDict()
+        self._hot_bytes = 0
+        self._stats = {"puts": 0, "dedup_hits": 0, "spills": 0, "disk_loads": 0}
+        # References dropped by garbage-collected sessions. Finalizers can run on any thread, including
+        # one already holding _lock, so they only queue keys here; the next store call releases them.
+        self._deferred = deque()
+        self._remove_stale_spill_dirs()
+
+    def _remove_stale_spill_dirs(self):
+        # Spill files of processes that are gone have no references left
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if not name.isdigit() or int(name) == os.getpid():
+                continue
+            try:
+                os.kill(int(name), 0)
+            except ProcessLookupError:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            except PermissionError:
+                pass
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.txt.gz")
+
+    def set_memory_budget(self, megabytes):
+        with self._lock:
+            self.memory_budget = max(1, int(megabytes)) * 1024 * 1024
+            self._enforce_budget()
+
+    def release_later(self, keys):
+        self._deferred.extend(keys)
+
+    def _release_deferred(self):
+        while True:
+            try:
+                key = self._deferred.popleft()
+            except IndexError:
+                return
+            self.release(key)
+
+    def put(self, text):
+        # Adds one reference; returns the content key
+        self._release_deferred()
+        key = text_key(text)
+        with self._lock:
+            self._stats["puts"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._stats["dedup_hits"] += 1
+                entry["refs"] += 1
+                return key
+            self._entries[key] = {"refs": 1, "size": len(text.encode("utf-8")), "on_disk": False}
+            self._warm(key, text)
+        return key
+
+    def _warm(self, key, text):
+        self._hot[key] = text
+        self._hot_bytes += self._entries[key]["size"]
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        # Spill least recently used texts until the in-memory total fits the budget
+        while self._hot_bytes > self.memory_budget and len(self._hot) > 1:
+            key, text = self._hot.popitem(last=False)
+            entry = self._entries[key]
+            if not entry["on_disk"]:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                with gzip.open(self._spill_path(key), "wt", encoding="utf-8", compresslevel=1) as f:
+                    f.write(text)
+                entry["on_disk"] = True
+                self._stats["spills"] += 1
+            self._hot_bytes -= entry["size"]
+
+    def get(self, key):
+        self._release_deferred()
+        with self._lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                return self._hot[key]
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            with gzip.open(self._spill_path(key), "rt", encoding="utf-8") as f:
+                text = f.read()
+            self._stats["disk_loads"] += 1
+            self._warm(key, text)
+            return text
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["refs"] -= 1
+            if entry["refs"] > 0:
+                return
+            del self._entries[key]
+            if self._hot.pop(key, None) is not None:
+                self._hot_bytes -= entry["size"]
+            if entry["on_disk"]:
+                try:
+                    os.remove(self._spill_path(key))
+                except OSError:
+                    pass
+
+    def size(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["size"] if entry else 0
+
+    def refs(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["refs"] if entry else 0
+
+    def stats(self):
+        self._release_deferred()
+        with self._lock:
+            total = sum(entry["size"] for entry in self._entries.values())
+            referenced = sum(entry["size"] * entry["refs"] for entry in self._entries.values())
+            return {
+                "Texts": len(self._entries),
+                "References": sum(entry["refs"] for entry in self._entries.values()),
+                "Unique MB": round(total / 1048576, 2),
+                "Referenced MB": round(referenced / 1048576, 2),
+                "In Memory MB": round(self._hot_bytes / 1048576, 2),
+                "Memory Budget MB": round(self.memory_budget / 1048576),
+                "On Disk Only": len(self._entries) - len(self._hot),
+                "Dedup Hits": self._stats["dedup_hits"],
+                "Spills": self._stats["spills"],
+                "Disk Loads": self._stats["disk_loads"]
+            }
+
+    def close(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+_store = None
+_store_lock = threading.Lock()
+_sessions = weakref.WeakSet()
+
+
+def get_text_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TextStore()
+            atexit.register(_store.close)
+        return _store
+
+
+def _release_all(store, keys):
+    # Session finalizer: must not take the store lock
+    store.release_later(list(keys.values()))
+    keys.clear()
+
+
+class SessionTexts:
+    # Per-session view onto the shared store: slot name -> content key
+    def __init__(self, label=""):
+        self.label = label
+        self.created = time.time()
+        self._store = get_text_store()
+        self._keys = {}
+        # (length, hash) of the text last set per slot; Python caches a string's hash, so an
+        # unchanged widget value is recognised without hashing the whole draft again
+        self._seen = {}
+        weakref.finalize(self, _release_all, self._store, self._keys)
+        _sessions.add(self)
+
+    def set(self, slot, text):
+        seen = (len(text), hash(text))
+        if self._seen.get(slot) == seen and self.get(slot) == text:
+            return self._keys[slot]
+        key = self._store.put(text)
+        old = self._keys.get(slot)
+        self._keys[slot] = key
+        self._seen[slot] = seen
+        if old is not None:
+            self._store.release(old)
+        return key
+
+    def get(self, slot, default=None):
+        key = self._keys.get(slot)
+        if key is None:
+            return default
+        text = self._store.get(key)
+        return default if text is None else text
+
+    def key(self, slot):
+        return self._keys.get(slot)
+
+    def has(self, slot):
+        return slot in self._keys
+
+    def pop(self, slot):
+        key = self._keys.pop(slot, None)
+        self._seen.pop(slot, None)
+        if key is not None:
+            self._store.release(key)
+
+    def usage(self):
+        # Bytes this session references, and its share when content is shared with other sessions
+        referenced = shared = 0
+        for key in set(self._keys.values()):
+            size = self._store.size(key)
+            referenced += size
+            shared += size / max(1, self._store.refs(key))
+        return {"Session": self.label, "Slots": len(self._keys), "Referenced KB": round(referenced / 1024, 1), "Attributed KB": round(shared / 1024, 1)}
+
+
+def session_usage():
+    return sorted((session.usage() for session in list(_sessions)), key=lambda row: -row["Referenced KB"])
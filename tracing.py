@@ -0,0 +1,247 @@
+import argparse
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+from verdict_store import DATA_DIR
+
+# --- Phase Tracing ---
+# Lightweight spans around the hot path (PDF extraction, prompt building, LLM calls, JSON
+# parsing, scoring, rendering). Finished spans are appended to a local JSONL file, one OTLP/JSON
+# "resourceSpans" document per line (the OpenTelemetry file exporter format), and folded into
+# per-phase latency histograms. When tracing is off, span() hands back a shared no-op object.
+TRACES_PATH = os.path.join(DATA_DIR, "traces.jsonl")
+SERVICE_NAME = "dpdpa-compliance"
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+FLUSH_EVERY = 32
+
+_enabled = os.environ.get("DPDPA_TRACING", "").lower() in ("1", "true", "yes")
+_current = contextvars.ContextVar("current_span", default=None)
+_lock = threading.Lock()
+_pending = []
+_histograms = {}
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    global _enabled
+    _enabled = bool(flag)
+    if not _enabled:
+        flush()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def end(self):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    def __init__(self, name, attributes):
+        parent = _current.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = os.urandom(8).hex()
+        self.attributes = dict(attributes)
+        self.error = None
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self._token = _current.set(self)
+        self._ended = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.end()
+        return False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self._ended:
+            return
+        self._ended = True
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Ended from a different context than it started in
+            pass
+        _record(self, duration_ms)
+
+
+def span(name, **attributes):
+    # Use as a context manager, or call .end() when the phase spans a long block of page code
+    if not _enabled:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def reset_context():
+    # A script run abandoned mid-span leaves it current in the script thread; start each run clean
+    _current.set(None)
+
+
+def traced(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans):
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "dpdpa.tracing"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _attribute_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+                } for s in spans]
+            }]
+        }]
+    }
+
+
+def _observe(histograms, name, duration_ms):
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(BUCKETS_MS) + 1)}
+    histogram["count"] += 1
+    histogram["sum"] += duration_ms
+    histogram["max"] = max(histogram["max"], duration_ms)
+    histogram["buckets"][bisect.bisect_left(BUCKETS_MS, duration_ms)] += 1
+
+
+def _record(span_obj, duration_ms):
+    span_obj.end_ns = span_obj.start_ns + int(duration_ms * 1e6)
+    with _lock:
+        _observe(_histograms, span_obj.name, duration_ms)
+        _pending.append(span_obj)
+        should_flush = span_obj.parent_id is None or len(_pending) >= FLUSH_EVERY
+    if should_flush:
+        flush()
+
+
+def flush(path=TRACES_PATH):
+    with _lock:
+        spans = list(_pending)
+        _pending.clear()
+        if not spans:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(to_otlp(spans)) + "\n")
+
+
+def _quantile(histogram, q):
+    # Upper bound of the bucket holding the q-th observation
+    target = q * histogram["count"]
+    seen = 0
+    for bound, count in zip(BUCKETS_MS + [histogram["max"]], histogram["buckets"]):
+        seen += count
+        if seen >= target:
+            return min(bound, histogram["max"])
+    return histogram["max"]
+
+
+def summarize(histograms_by_name):
+    rows = []
+    for name, histogram in sorted(histograms_by_name.items(), key=lambda item: -item[1]["sum"]):
+        rows.append({
+            "Phase": name,
+            "Count": histogram["count"],
+            "Mean (ms)": round(histogram["sum"] / histogram["count"], 1),
+            "p50 (ms)": _quantile(histogram, 0.5),
+            "p95 (ms)": _quantile(histogram, 0.95),
+            "Max (ms)": round(histogram["max"], 1),
+            "Total (s)": round(histogram["sum"] / 1000, 2)
+        })
+    return rows
+
+
+def phase_summary():
+    with _lock:
+        snapshot = {name: dict(h, buckets=list(h["buckets"])) for name, h in _histograms.items()}
+    return summarize(snapshot)
+
+
+def histograms_from_file(path=TRACES_PATH):
+    histograms = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                document = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            for resource in document.get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for s in scope.get("spans", []):
+                        _observe(histograms, s["name"], (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6)
+    return histograms
+
+
+def format_histograms(histograms_by_name):
+    lines = []
+    for name, histogram in sorted(histograms_by_name.items()):
+        lines.append(f"{name}  (n={histogram['count']}, mean={histogram['sum'] / histogram['count']:.1f} ms, max={histogram['max']:.1f} ms)")
+        peak = max(histogram["buckets"]) or 1
+        labels = [f"<= {b} ms" for b in BUCKETS_MS] + [f"> {BUCKETS_MS[-1]} ms"]
+        for label, count in zip(labels, histogram["buckets"]):
+            if count:
+                lines.append(f"  {label:>12} | {'#' * max(1, round(40 * count / peak))} {count}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-phase latency histograms from a trace file.")
+    parser.add_argument("path", nargs="?", default=TRACES_PATH)
+    args = parser.parse_args()
+    print(format_histograms(histograms_from_file(args.path)))
@@ -0,0 +1,91 @@
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+# --- Verdict Store ---
+# Append-only JSONL log of every checklist verdict the compliance checker produces, plus one
+# compressed copy of each checked document. Feeds the Knowledge Assistant's index of prior
+# justifications and the training set of the distilled local classifier.
+DATA_DIR = os.environ.get("DPDPA_DATA_DIR", ".dpdpa_data")
+VERDICTS_PATH = os.path.join(DATA_DIR, "verdicts.jsonl")
+DOCUMENTS_DIR = os.path.join(DATA_DIR, "documents")
+
+_lock = threading.Lock()
+
+
+def document_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def verdict_origin(item):
+    if item.get("Inherited"):
+        return "inherited"
+    if item.get("Local Model"):
+        return "local"
+    return "gpt"
+
+
+def save_document(doc_hash, policy_text):
+    path = os.path.join(DOCUMENTS_DIR, f"{doc_hash}.txt.gz")
+    if not os.path.exists(path):
+        os.makedirs(DOCUMENTS_DIR, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(policy_text)
+
+
+def load_document(doc_hash):
+    path = os.path.join(DOCUMENTS_DIR, f"{doc_hash}.txt.gz")
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def record_verdicts(result, policy_text):
+    # Each GPT verdict carries the model that produced it ("Model")
+    if result.get("Match Level") == "Error":
+        return 0
+    doc_hash = document_hash(policy_text)
+    timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    lines = [
+        json.dumps({
+            "doc_hash": doc_hash,
+            "section": result["Section"],
+            "item_id": item["Checklist Item ID"],
+            "status": item["Status"],
+            "justification": item["Justification"],
+            "model": item.get("Model"),
+            "origin": verdict_origin(item),
+            "timestamp": timestamp
+        })
+        for item in result["Matched Details"]
+    ]
+    if not lines:
+        return 0
+    with _lock:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        save_document(doc_hash, policy_text)
+        with open(VERDICTS_PATH, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return len(lines)
+
+
+def load_verdicts(offset=0):
+    # offset is a byte position, so callers can read only what was appended since last time
+    if not os.path.exists(VERDICTS_PATH):
+        return [], 0
+    verdicts = []
+    with _lock, open(VERDICTS_PATH, "r", encoding="utf-8") as f:
+        f.seek(offset)
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    verdicts.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        end = f.tell()
+    return verdicts, end